@@ -0,0 +1,348 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from metrics import registry
+
+# Admission control for the expensive endpoints. Each request's CPU cost is
+# estimated from its inputs before it runs; every client gets a bounded
+# number of concurrent requests and a token bucket of CPU-seconds. Requests
+# that do not fit wait briefly or are turned away with a Retry-After, and
+# the measured cost of each admitted request recalibrates the estimates.
+#
+# Budgets are per worker process: with several workers behind serve.py a
+# client can hold one budget in each.
+
+# Starting CPU-seconds per unit of work for each cost component; these are
+# rough single-core figures and are corrected online from measured runs.
+DEFAULT_COEFFICIENTS = {
+    'request': 2e-4,             # Fixed per-request overhead
+    'topology_parse': 2e-5,      # Per node/link parsed from a request body
+    'rip_convergence': 3e-7,     # Per node x directed link x log(nodes)
+    'rip_events': 1.5e-6,        # Per link event x node x (nodes + links)
+    'table_copy': 1e-6,          # Per routing-table entry copied
+    'topology_view': 1e-6,       # Per routing-table entry or link serialized
+    'layout': 2e-4,              # Per node laid out
+    'path_search': 2e-6,         # Per path x (nodes + links) searched
+    'traffic_matrix': 5e-7,      # Per source/destination cell
+    'tcp_steps': 2e-5,           # Per simulated RTT
+    'tcp_loss_events': 2e-6,     # Per fast-forwarded loss event
+    'plot': 0.3,                 # Per rendered matplotlib figure
+    'trace_replay': 2e-6,        # Per trace record x parameter set
+    'spf': 7e-7,                 # Per node x (nodes + links) x log(nodes) of link-state SPF
+    'table_scan': 1e-6,          # Per routing-table entry analyzed or followed
+    'anneal_steps': 1.8e-5,      # Per simulated-annealing step of a Playfair key search
+}
+
+# Bytes of a JSON topology body per node or link, used to size uploads
+# before they are parsed
+BYTES_PER_ELEMENT = 40
+
+# Size assumed for uploads sent without a Content-Length (chunked bodies)
+UNSIZED_BODY_BYTES = int(os.environ.get('DCN_ADMISSION_UNSIZED_BYTES', 256 * 1024 * 1024))
+
+# Bounds on the online correction, so one odd run cannot swing estimates
+CALIBRATION_RATE = 0.2
+MIN_COEFFICIENT_SCALE = 0.01
+MAX_COEFFICIENT_SCALE = 100.0
+
+ADMISSION_DECISIONS = registry.counter(
+    'dcn_admission_decisions_total',
+    'Admission decisions for cost-controlled requests.', ('endpoint', 'decision'))
+ADMISSION_COST_RATIO = registry.histogram(
+    'dcn_admission_cost_ratio',
+    'Measured CPU cost of admitted requests divided by their estimate.', ('endpoint',),
+    buckets=(0.1, 0.25, 0.5, 0.8, 1.25, 2.0, 4.0, 10.0))
+
+
+def rip_convergence_units(nodes, links):
+    """Work to converge fresh tables: every node's table crosses every link for ~log(nodes) rounds."""
+    return nodes * 2 * links * math.log2(nodes + 2)
+
+
+def topology_body_units(content_length):
+    """
+    (nodes, links) guessed from the size of a topology body, assuming mean
+    degree 4. Bodies of unknown length are priced at UNSIZED_BODY_BYTES.
+    """
+    if content_length is None:
+        content_length = UNSIZED_BODY_BYTES
+    elements = content_length / BYTES_PER_ELEMENT
+    return elements / 3, 2 * elements / 3
+
+
+def spf_units(nodes, links):
+    """Work to build link-state routing: one Dijkstra run per node."""
+    return nodes * (nodes + links) * math.log2(nodes + 2)
+
+
+def tcp_units(data_size, mss, max_time, packet_loss_rate=0.0, long_horizon=False, max_points=0):
+    """
+    Cost components of a TCP transfer.
+
+    Step-by-step runs take at most one step per RTT and at least one packet
+    per step; long-horizon runs take one step per loss event.
+    """
+    packets = max(1.0, data_size / max(1, mss))
+    if long_horizon:
+        events = min(max_time, packets * max(packet_loss_rate, 1e-3))
+        return [('tcp_loss_events', events + max_points)]
+    return [('tcp_steps', min(max_time, packets))]
+
+
+class CostModel:
+    """
+    Linear CPU-time model over named cost components.
+
+    An estimate is sum(coefficient[kind] * units). After a run, every
+    component of the request is scaled by the same correction
+    (measured / estimated), weighted by its share of the estimate, so
+    components that dominate a request learn the most from it.
+    """
+
+    def __init__(self, coefficients=None, rate=CALIBRATION_RATE):
+        self.defaults = dict(DEFAULT_COEFFICIENTS, **(coefficients or {}))
+        self.coefficients = dict(self.defaults)
+        self.observations = {kind: 0 for kind in self.coefficients}
+        self.rate = rate
+        self.lock = threading.Lock()
+
+    def estimate(self, components):
+        with self.lock:
+            return sum(self.coefficients.get(kind, 0.0) * units for kind, units in components)
+
+    def observe(self, components, cpu_seconds):
+        """Move the coefficients of `components` toward a measured cost."""
+        with self.lock:
+            parts = [(kind, self.coefficients.get(kind, 0.0) * units) for kind, units in components if units > 0]
+            estimate = sum(part for _, part in parts)
+            if estimate <= 0:
+                return
+            correction = math.log(max(cpu_seconds, 1e-6) / estimate)
+            for kind, part in parts:
+                scaled = self.coefficients[kind] * math.exp(self.rate * correction * part / estimate)
+                default = self.defaults[kind]
+                self.coefficients[kind] = min(max(scaled, default * MIN_COEFFICIENT_SCALE),
+                                              default * MAX_COEFFICIENT_SCALE)
+                self.observations[kind] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {kind: {'coefficient': value, 'default': self.defaults[kind],
+                           'observations': self.observations[kind]}
+                    for kind, value in self.coefficients.items()}
+
+
+class AdmissionRejected(Exception):
+    """A request that does not fit its client's budget (429) or any budget (413)."""
+
+    def __init__(self, message, status, estimate, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.estimate = estimate
+        self.retry_after = retry_after
+
+
+class _ClientBudget:
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+        self.running = {}  # ticket id -> (start, estimate)
+        self.queued = 0
+
+
+class Ticket:
+    """An admitted request; hand it back to AdmissionController.release when done."""
+
+    def __init__(self, ticket_id, client, endpoint, components, estimate, waited):
+        self.id = ticket_id
+        self.client = client
+        self.endpoint = endpoint
+        self.components = components
+        self.estimate = estimate
+        self.waited = waited
+
+
+class AdmissionController:
+    """
+    Per-client concurrency limits and CPU-time token buckets.
+
+    Args:
+        max_concurrent: Admitted requests a client may have running at once
+        cpu_budget: Bucket size in CPU-seconds; also the burst a client may spend
+        refill_rate: CPU-seconds per second returned to each bucket
+        max_wait: Seconds a request may queue for a slot or tokens before a 429
+        max_queued: Requests a client may have queued at once
+        max_cost: Estimated CPU-seconds above which a request is refused outright (413)
+        slots: Admitted requests running at once across all clients
+    """
+
+    def __init__(self, model=None, max_concurrent=2, cpu_budget=60.0, refill_rate=0.5,
+                 max_wait=5.0, max_queued=4, max_cost=600.0, slots=4, history=200):
+        self.model = model or CostModel()
+        self.max_concurrent = max_concurrent
+        self.cpu_budget = cpu_budget
+        self.refill_rate = refill_rate
+        self.max_wait = max_wait
+        self.max_queued = max_queued
+        self.max_cost = max_cost
+        self.slots = slots
+        self.running = 0
+        self.clients = {}
+        self.history = deque(maxlen=history)
+        self.condition = threading.Condition()
+        self._next_id = 0
+
+    @classmethod
+    def from_environment(cls):
+        """Controller configured from DCN_ADMISSION_* variables."""
+        env = os.environ.get
+        return cls(
+            max_concurrent=int(env('DCN_ADMISSION_CONCURRENCY', 2)),
+            cpu_budget=float(env('DCN_ADMISSION_CPU_BUDGET', 60.0)),
+            refill_rate=float(env('DCN_ADMISSION_REFILL', 0.5)),
+            max_wait=float(env('DCN_ADMISSION_MAX_WAIT', 5.0)),
+            max_queued=int(env('DCN_ADMISSION_MAX_QUEUED', 4)),
+            max_cost=float(env('DCN_ADMISSION_MAX_COST', 600.0)),
+            slots=int(env('DCN_ADMISSION_SLOTS', max(2, os.cpu_count() or 1)))
+        )
+
+    def _budget(self, client, now):
+        budget = self.clients.get(client)
+        if budget is None:
+            if len(self.clients) >= 10000:
+                self._prune(now)
+            budget = self.clients[client] = _ClientBudget(self.cpu_budget, now)
+        else:
+            budget.tokens = min(self.cpu_budget, budget.tokens + (now - budget.updated) * self.refill_rate)
+            budget.updated = now
+        return budget
+
+    def _prune(self, now):
+        # Idle clients whose buckets have refilled carry no state worth keeping
+        for client, budget in list(self.clients.items()):
+            refilled = budget.tokens + (now - budget.updated) * self.refill_rate
+            if not budget.running and not budget.queued and refilled >= self.cpu_budget:
+                del self.clients[client]
+
+    def _wait_time(self, budget, estimate, now):
+        """Seconds until a request of this estimate could start; 0 if it can start now."""
+        wait = 0.0
+        if len(budget.running) >= self.max_concurrent or self.running >= self.slots:
+            # Expect a slot when the client's shortest-remaining request finishes
+            remaining = [start + cost - now for start, cost in budget.running.values()]
+            wait = max(min(remaining, default=1.0), 0.1)
+        # Requests larger than the bucket need a full one and leave it in debt
+        deficit = min(estimate, self.cpu_budget) - budget.tokens
+        if deficit > 0:
+            wait = max(wait, deficit / self.refill_rate if self.refill_rate > 0 else math.inf)
+        return wait
+
+    def admit(self, client, endpoint, components):
+        """
+        Admit a request, queueing up to max_wait seconds if it does not fit yet.
+
+        Returns:
+            Ticket
+        Raises:
+            AdmissionRejected: with a Retry-After estimate when the client is over budget
+        """
+        estimate = self.model.estimate(components)
+        if estimate > self.max_cost:
+            ADMISSION_DECISIONS.inc(endpoint=endpoint, decision='too_large')
+            raise AdmissionRejected(
+                f"Estimated cost {estimate:.1f} CPU-seconds exceeds the per-request limit of {self.max_cost:g}",
+                413, estimate)
+
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        queued = False
+        with self.condition:
+            budget = self._budget(client, start)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(budget, estimate, now)
+                    if wait == 0:
+                        break
+                    if now + wait > deadline or (not queued and budget.queued >= self.max_queued):
+                        ADMISSION_DECISIONS.inc(endpoint=endpoint, decision='rejected')
+                        raise AdmissionRejected(
+                            "Client budget exhausted; retry later",
+                            429, estimate, retry_after=max(1, math.ceil(min(wait, 3600))))
+                    if not queued:
+                        queued = True
+                        budget.queued += 1
+                    self.condition.wait(min(wait, deadline - now))
+                    budget = self._budget(client, time.monotonic())
+            finally:
+                if queued:
+                    budget.queued -= 1
+
+            self._next_id += 1
+            ticket = Ticket(self._next_id, client, endpoint, components, estimate, time.monotonic() - start)
+            budget.tokens -= estimate
+            budget.running[ticket.id] = (time.monotonic(), estimate)
+            self.running += 1
+        ADMISSION_DECISIONS.inc(endpoint=endpoint, decision='queued' if queued else 'admitted')
+        return ticket
+
+    def release(self, ticket, cpu_seconds, calibrate=True):
+        """
+        Settle an admitted request at its measured cost and free its slot.
+
+        Pass calibrate=False for runs that say nothing about the model
+        (cached responses, failed requests).
+        """
+        with self.condition:
+            budget = self._budget(ticket.client, time.monotonic())
+            budget.running.pop(ticket.id, None)
+            budget.tokens = min(self.cpu_budget, budget.tokens + ticket.estimate - cpu_seconds)
+            self.running -= 1
+            self.history.append({
+                'endpoint': ticket.endpoint,
+                'components': {kind: units for kind, units in ticket.components},
+                'estimate': ticket.estimate,
+                'cpu_seconds': cpu_seconds,
+                'waited': ticket.waited,
+                'calibrated': calibrate,
+                'finished': time.time()
+            })
+            self.condition.notify_all()
+        if ticket.estimate > 0:
+            ADMISSION_COST_RATIO.observe(cpu_seconds / ticket.estimate, endpoint=ticket.endpoint)
+        if calibrate:
+            self.model.observe(ticket.components, cpu_seconds)
+
+    def stats(self, client=None):
+        """Limits, model coefficients, recent estimate/actual pairs and (optionally) one client's budget."""
+        with self.condition:
+            now = time.monotonic()
+            report = {
+                'limits': {
+                    'max_concurrent': self.max_concurrent,
+                    'cpu_budget': self.cpu_budget,
+                    'refill_rate': self.refill_rate,
+                    'max_wait': self.max_wait,
+                    'max_queued': self.max_queued,
+                    'max_cost': self.max_cost,
+                    'slots': self.slots
+                },
+                'running': self.running,
+                'clients': len(self.clients),
+                'recent': list(self.history)[-20:]
+            }
+            if client is not None:
+                budget = self._budget(client, now)
+                report['client'] = {'id': client, 'tokens': budget.tokens,
+                                    'running': len(budget.running), 'queued': budget.queued}
+        report['model'] = self.model.snapshot()
+        return report
+
+
+def cpu_time():
+    """CPU-seconds used by this thread plus any child processes reaped so far."""
+    times = os.times()
+    return time.thread_time() + times.children_user + times.children_system
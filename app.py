@@ -1,20 +1,49 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import json
 import base64
+import functools
 import io
+import math
 import os
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+import time
+import uuid
+os.environ['MPLBACKEND'] = 'Agg'  # Non-interactive backend, applied when matplotlib is first imported
 from playfair_cipher import encrypt, decrypt, display_matrix, prepare_key
 from rip_simulator import RIPNetwork, create_sample_network
 from tcp_reno_simulator import TCPRenoSimulator
 from main import simulate_network_transmission
+from result_cache import ResultCache
+from topology_cache import TopologyCache, converge_network
+from topology_ingest import TopologyParseError, ingest_topology
+from topology_view import parse_fields, serialize_topology
+from metrics import (registry, profile_store, stage_timer, REQUEST_LATENCY,
+                     REQUEST_COUNT, REQUESTS_IN_FLIGHT)
+from admission import (AdmissionController, AdmissionRejected, cpu_time, rip_convergence_units,
+                       spf_units, tcp_units, topology_body_units)
 import logging
 
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records encoding time as a metrics stage."""
+    
+    def dumps(self, obj, **kwargs):
+        with stage_timer('json_encode'):
+            return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+app.json = TimedJSONProvider(app)
+CORS(app, expose_headers=['X-Request-ID', 'X-Cache', 'X-Cost-Estimate', 'Retry-After'])  # Enable CORS for all routes
+
+# Per-request profiling is requested with ?profile=cprofile|sample or X-Profile
+# once enabled with DCN_PROFILING=1; it is off by default
+PROFILING_ENABLED = os.environ.get('DCN_PROFILING', '0') == '1'
+
+# Cost-based admission for the expensive endpoints; DCN_ADMISSION=0 turns it off
+admission = AdmissionController.from_environment() if os.environ.get('DCN_ADMISSION', '1') != '0' else None
+
+# Header naming the client behind a trusted proxy (e.g. X-Forwarded-For); the peer address otherwise
+CLIENT_HEADER = os.environ.get('DCN_CLIENT_HEADER')
 
 # Global variable to store the current network
 current_network = None
@@ -26,6 +55,36 @@ current_network = {
     'links': []
 }
 
+# (topology dict, RIPNetwork converged from it) for dict-backed topologies
+_topology_graph = None
+
+# (RIPNetwork, its version, LinkStateNetwork mirroring it) for protocol=link-state
+_link_state_graph = None
+
+ROUTING_PROTOCOLS = ('rip', 'link-state')
+
+# Recorded loss/RTT traces available for replay (created on first use)
+_trace_registry = None
+
+# Converged routing tables shared by all worker processes
+topology_cache = TopologyCache()
+
+# k-shortest-path answers for the current topology version (created on first use)
+_path_cache = None
+
+# Server-side node positions, relaxed incrementally as the topology changes
+_layout = None
+
+# Saved RIP/TCP simulation checkpoints (created on first use)
+_checkpoint_store = None
+
+# Rendered responses of seeded (deterministic) simulations
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('DCN_CACHE_ENTRIES', 256)),
+    disk_dir=os.environ.get('DCN_CACHE_DIR'),
+    disk_max_bytes=int(os.environ.get('DCN_CACHE_DISK_BYTES', 1024 * 1024 * 1024))
+)
+
 def ensure_network():
     """Ensure we have a network loaded"""
     global current_network, custom_network_data
@@ -37,8 +96,7 @@ def load_sample_network():
     """Load the default sample network"""
     global current_network, custom_network_data
     current_network = create_sample_network()
-    current_network.initialize_routing_tables()
-    current_network.simulate_rip()
+    converge_network(current_network, topology_cache)
     
     # Store default network data
     custom_network_data = {
@@ -70,80 +128,398 @@ def load_sample_network():
         }
     }
 
+def get_trace_registry():
+    """Return the trace registry, importing the NumPy-backed trace code lazily."""
+    global _trace_registry
+    if _trace_registry is None:
+        from trace_replay import TraceRegistry
+        _trace_registry = TraceRegistry()
+    return _trace_registry
+
+def get_checkpoint_store():
+    """Return the checkpoint store, importing the NumPy-backed checkpoint code lazily."""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        from simulation_checkpoint import CheckpointStore
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
+
+def cached_response(body, mimetype, hit):
+    """Build a response from a cached body, flagging JSON payloads with `cached`."""
+    if mimetype == 'application/json' and body.startswith(b'{'):
+        flag = b'{"cached":true,' if hit else b'{"cached":false,'
+        body = flag + body[1:]
+    response = Response(body, mimetype=mimetype)
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+def store_cached_response(cache_key, response):
+    """Store a freshly rendered response under cache_key (if any) and return it."""
+    if cache_key is None:
+        return response
+    body = response.get_data()
+    result_cache.put(cache_key, body, response.mimetype)
+    return cached_response(body, response.mimetype, hit=False)
+
 def create_network_from_data(network_data):
     """Create a RIPNetwork from custom data"""
-    network = RIPNetwork()
-    
-    # Add all nodes
-    for node_data in network_data['nodes']:
-        network.add_node(node_data['id'])
-    
-    # Add all links (support both 'distance' and 'cost' keys)
-    for link in network_data['links']:
-        distance = link.get('distance', link.get('cost', 1))
-        network.add_bidirectional_link(
-            link['source'],
-            link['target'],
-            distance
-        )
+    node_ids = [node_data['id'] for node_data in network_data['nodes']]
+    
+    # Support both 'distance' and 'cost' keys
+    edges = [
+        (link['source'], link['target'], link.get('distance', link.get('cost', 1)))
+        for link in network_data['links']
+    ]
     
-    return network
+    # Loaded topologies are weighted; keep routes from being cut off at 16
+    return RIPNetwork.from_edges(node_ids, edges, cost_bound=True)
+
+def get_topology_graph():
+    """
+    Return the converged RIPNetwork behind the current topology.
+
+    Dict topologies are built and converged once and reused until
+    current_network is replaced, so routing-table versions stay stable
+    between polls.
+    """
+    global _topology_graph
+    if not isinstance(current_network, dict):
+        if current_network.version == 0:
+            converge_network(current_network, topology_cache)  # e.g. imported without converge=1
+        return current_network
+    if _topology_graph is None or _topology_graph[0] is not current_network:
+        graph = create_network_from_data(current_network)
+        converge_network(graph, topology_cache)
+        _topology_graph = (current_network, graph)
+    return _topology_graph[1]
+
+def get_routing_graph(protocol=None):
+    """
+    Return the converged network for a routing protocol.
+
+    The link-state network mirrors the RIP topology; when that changes, the
+    differences are replayed as link events so only the affected shortest
+    path trees are recomputed.
+    """
+    global _link_state_graph
+    protocol = protocol or 'rip'
+    if protocol not in ROUTING_PROTOCOLS:
+        raise ValueError(f"Unknown protocol {protocol!r}; expected one of {', '.join(ROUTING_PROTOCOLS)}")
+    graph = get_topology_graph()
+    if protocol == 'rip':
+        return graph
+    
+    from link_state import LinkStateNetwork
+    if _link_state_graph is None or _link_state_graph[0] is not graph:
+        link_state = LinkStateNetwork.from_network(graph)
+        link_state.converge()
+    else:
+        link_state = _link_state_graph[2]
+        if _link_state_graph[1] != graph.version:
+            link_state.sync(graph)
+            link_state.converge()
+    _link_state_graph = (graph, graph.version, link_state)
+    return link_state
+
+def get_topology_layout(positions=None):
+    """
+    Return the server-side layout of the current topology.
+
+    Nodes with hand-placed x/y in `positions` are pinned there; the rest
+    are laid out around them. Positions are kept per topology version and
+    only the neighbourhood of added or removed nodes and links is relaxed.
+    """
+    global _layout
+    from topology_layout import TopologyLayout
+    if _layout is None:
+        _layout = TopologyLayout()
+    pinned = {node_id: (node['x'], node['y']) for node_id, node in (positions or {}).items()
+              if node.get('x') is not None and node.get('y') is not None}
+    return _layout.update(get_topology_graph(), pinned)
+
+def save_topology_file(payload, large):
+    """Persist a topology; large ones are written compactly."""
+    with open('custom_network.json', 'w') as f:
+        json.dump(payload, f, indent=None if large else 2)
+
+def client_id():
+    """Identify the caller whose budget a request is charged to."""
+    if CLIENT_HEADER and request.headers.get(CLIENT_HEADER):
+        return request.headers[CLIENT_HEADER].split(',')[0].strip()
+    return request.remote_addr or 'unknown'
+
+def admission_controlled(estimator, background=False):
+    """
+    Admit the decorated endpoint against the caller's budget.
+    
+    `estimator` is called with the view arguments and returns the request's
+    cost components as [(kind, units)]. Requests over budget get a 429
+    with Retry-After (or a 413 if no budget could cover them); admitted
+    ones are charged their measured CPU time, and successful uncached runs
+    recalibrate the cost model. Endpoints that start `background` work
+    are charged the estimate instead, since their cost is spent after the
+    response.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if admission is None:
+                return view(*args, **kwargs)
+            try:
+                components = [('request', 1)] + list(estimator(*args, **kwargs))
+            except Exception:
+                components = [('request', 1)]  # Malformed input; the endpoint itself reports it
+            try:
+                ticket = admission.admit(client_id(), g.metrics_endpoint, components)
+            except AdmissionRejected as e:
+                message = str(e)
+                if e.status == 413 and request.content_length is None and request.headers.get('Transfer-Encoding'):
+                    message += "; send a Content-Length, bodies without one are priced at their maximum size"
+                response = jsonify({"error": message, "estimate": e.estimate, "retry_after": e.retry_after})
+                response.status_code = e.status
+                if e.retry_after is not None:
+                    response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            
+            start = cpu_time()
+            calibrate = False
+            try:
+                response = app.make_response(view(*args, **kwargs))
+                calibrate = response.status_code < 400 and response.headers.get('X-Cache') != 'HIT'
+                response.headers['X-Cost-Estimate'] = f"{ticket.estimate:.4f}"
+                return response
+            finally:
+                if background:
+                    started = calibrate  # Rejected requests started nothing
+                    admission.release(ticket, ticket.estimate if started else cpu_time() - start, False)
+                else:
+                    admission.release(ticket, cpu_time() - start, calibrate)
+        return wrapper
+    return decorator
+
+def current_graph():
+    """The RIPNetwork behind the current topology if it is already built, else None."""
+    if not isinstance(current_network, dict):
+        return current_network
+    if _topology_graph is not None and _topology_graph[0] is current_network:
+        return _topology_graph[1]
+    return None
+
+def topology_size():
+    """(nodes, links) of the current topology, without building or converging it."""
+    if isinstance(current_network, dict):
+        return len(current_network['nodes']), len(current_network['links'])
+    nodes = current_network.nodes
+    return len(nodes), sum(len(node.neighbors) for node in nodes.values()) // 2
+
+def pending_graph_cost():
+    """Cost of building and converging the current topology, if that is still to be done."""
+    graph = current_graph()
+    if graph is not None and graph.version != 0:
+        return []
+    nodes, links = topology_size()
+    return [('topology_parse', nodes + links), ('rip_convergence', rip_convergence_units(nodes, links))]
+
+def pending_routing_cost(protocol):
+    """Cost of bringing the routing tables of `protocol` up to date with the current topology."""
+    cost = pending_graph_cost()
+    if protocol == 'link-state' and (_link_state_graph is None or _link_state_graph[0] is not current_graph()):
+        cost.append(('spf', spf_units(*topology_size())))
+    return cost
+
+def estimate_topology_edit():
+    """Cost of re-converging incrementally after one node or link change."""
+    nodes, links = topology_size()
+    return [('rip_events', nodes * (nodes + links))]
+
+def pending_layout_cost():
+    """Cost of a full server-side layout, if the current topology has none yet."""
+    graph = current_graph()
+    if graph is not None and _layout is not None and _layout.epoch == graph.epoch:
+        return []
+    return [('layout', topology_size()[0])]
+
+def estimate_topology_upload(converge):
+    """Cost of parsing (and optionally converging) the topology in the request body."""
+    nodes, links = topology_body_units(request.content_length)
+    cost = [('topology_parse', nodes + links)]
+    if converge:
+        cost.append(('rip_convergence', rip_convergence_units(nodes, links)))
+    return cost
+
+def estimate_tcp(data):
+    """Cost of a TCP simulation request body (see tcp_simulation_params)."""
+    _, data_size, params = tcp_simulation_params(data)
+    cost = tcp_units(data_size, params['mss'], params['max_time'], params['packet_loss_rate'],
+                     long_horizon='max_points' in params, max_points=params.get('max_points', 0))
+    if data.get('include_plot', True):
+        cost.append(('plot', 1))
+    return cost
+
+@app.before_request
+def start_request_metrics():
+    """Start latency tracking and, if requested, a profiler for this request."""
+    g.request_start = time.perf_counter()
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+    
+    mode = request.args.get('profile') or request.headers.get('X-Profile')
+    if PROFILING_ENABLED and mode:
+        try:
+            g.profile_handle = profile_store.start('sample' if mode == 'sample' else 'cprofile')
+        except ValueError as e:
+            # Only one cProfile session can be active at a time
+            logging.warning(f"Profiling unavailable for request {g.request_id}: {e}")
+
+@app.after_request
+def finish_request_metrics(response):
+    """Count the response, store any profile and tag the response with its request id."""
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        # Profiles are stored under their own id, never the client-supplied request id
+        profile_id = uuid.uuid4().hex
+        profile_store.finish(profile_id, handle, g.request_id)
+        response.headers['X-Profile-URL'] = f"/api/profiles/{profile_id}"
+    REQUEST_COUNT.inc(endpoint=g.metrics_endpoint, method=request.method,
+                      status=str(response.status_code))
+    response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def record_request_latency(exc):
+    if 'request_start' not in g:
+        return
+    REQUEST_LATENCY.observe(time.perf_counter() - g.request_start,
+                            endpoint=g.metrics_endpoint, method=request.method)
+    REQUESTS_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose request and simulator stage metrics in Prometheus text format."""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admission', methods=['GET'])
+def get_admission():
+    """Admission limits, the caller's remaining budget and the calibrated cost model."""
+    if admission is None:
+        return jsonify({"enabled": False, "success": True})
+    return jsonify(dict(admission.stats(client_id()), enabled=True, success=True))
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """List stored per-request profiles."""
+    return jsonify({"profiles": profile_store.list(), "success": True})
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """Download a captured profile by the id in X-Profile-URL (?format=text|pstats)."""
+    profile = profile_store.get(profile_id, request.args.get('format', 'text'))
+    if profile is None:
+        return jsonify({"error": f"No profile {profile_id}"}), 404
+    body, mimetype, filename = profile
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
     return jsonify({"status": "healthy", "message": "DCN API is running"})
 
+def estimate_topology_view():
+    nodes, links = topology_size()
+    fields = parse_fields(request.args.get('fields'))
+    limit = request.args.get('limit')
+    page = min(nodes, max(1, int(limit))) if limit else nodes
+    cost = [('topology_view', page * (nodes if 'routing_table' in fields else 1) + links)]
+    cost += pending_routing_cost(request.args.get('protocol'))
+    return cost + (pending_layout_cost() if 'position' in fields else [])
+
 @app.route('/api/network/topology', methods=['GET'])
+@admission_controlled(estimate_topology_view)
 def get_network_topology():
-    """Get the current network topology and routing information."""
+    """
+    Get the current network topology and routing information.
+
+    Query parameters: `fields` (comma-separated subset of neighbors,
+    routing_table, position, links and the opt-in ecmp), `offset`/`limit`
+    to page through nodes, `since`/`epoch` from a previous response to
+    receive only what changed, `encoding=compact` to leave unreachable
+    routes out, and `protocol` (rip or link-state) to choose whose routing
+    tables are returned.
+    """
     try:
-        # If stored as dict, build a temporary RIP graph to compute routing tables.
+        fields = parse_fields(request.args.get('fields'))
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = request.args.get('limit')
+        limit = max(1, int(limit)) if limit else None
+        since = request.args.get('since')
+        since = int(since) if since not in (None, '') else None
+        
+        protocol = request.args.get('protocol') or 'rip'
+        graph = get_routing_graph(protocol)
         if isinstance(current_network, dict):
-            graph = create_network_from_data(current_network)
-            graph.initialize_routing_tables()
-            graph.simulate_rip()
-
             # Preserve positions from original data, if any
-            pos_lookup = {node['id']: node for node in current_network['nodes']}
-
-            enriched_nodes = []
-            for node_id, node_obj in graph.nodes.items():
-                original = pos_lookup.get(node_id, {})
-                enriched_nodes.append({
-                    'id': node_id,
-                    'neighbors': [{'id': n_id, 'distance': node_obj.neighbors[n_id]} for n_id in node_obj.neighbors],
-                    'routing_table': node_obj.routing_table,
-                    'x': original.get('x'),
-                    'y': original.get('y')
-                })
-
-            return jsonify({
-                'success': True,
-                'nodes': enriched_nodes,
-                'links': current_network['links']
-            })
+            positions = {node['id']: node for node in current_network['nodes']}
+            links = current_network['links']
         else:
-            # current_network is already a RIPNetwork object
-            graph = current_network
-            graph.initialize_routing_tables()
-            graph.simulate_rip()
-            nodes_resp = []
-            for node_id, node_obj in graph.nodes.items():
-                nodes_resp.append({
-                    'id': node_id,
-                    'neighbors': [{'id': n_id, 'distance': node_obj.neighbors[n_id]} for n_id in node_obj.neighbors],
-                    'routing_table': node_obj.routing_table
-                })
-            return jsonify({
-                'success': True,
-                'nodes': nodes_resp,
-                'links': []  # links not directly stored in RIPNetwork, could extend if needed
-            })
+            positions = None
+            links = []  # links not directly stored in RIPNetwork, could extend if needed
+        
+        layout = None
+        if 'position' in fields and (positions is None or any(
+                node.get('x') is None or node.get('y') is None for node in positions.values())):
+            # Lay out nodes that arrived without coordinates on the server
+            layout = get_topology_layout(positions)
+            positions = layout.positions()
+        
+        response = serialize_topology(
+            graph, positions, links, fields, offset, limit,
+            since=since, epoch=request.args.get('epoch'),
+            compact=request.args.get('encoding') == 'compact'
+        )
+        response['protocol'] = protocol
+        if layout is not None:
+            response['layout_version'] = layout.layout_version
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting network topology: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/network/layout', methods=['GET'])
+@admission_controlled(lambda: pending_graph_cost() + pending_layout_cost())
+def get_network_layout():
+    """
+    Server-side node positions as {id: [x, y]}.
+
+    Pass `since` (a layout_version from an earlier response) to receive
+    only the nodes that moved since then.
+    """
+    try:
+        positions = current_network['nodes'] if isinstance(current_network, dict) else []
+        layout = get_topology_layout({node['id']: node for node in positions})
+        since = request.args.get('since')
+        delta = since not in (None, '') and request.args.get('epoch') == layout.epoch
+        moved = layout.moved_since(int(since)) if delta else None
+        return jsonify({
+            "success": True,
+            "epoch": layout.epoch,
+            "version": layout.version,
+            "layout_version": layout.layout_version,
+            "delta": delta,
+            "positions": {node_id: [point['x'], point['y']]
+                          for node_id, point in layout.positions(moved).items()},
+            "stats": layout.stats
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/network/save', methods=['POST'])
 def save_network():
     """Save the current network configuration"""
@@ -167,8 +543,7 @@ def save_network():
         # Optionally validate by building RIP network (not stored globally)
         try:
             rip_net = create_network_from_data(custom_network_data)
-            rip_net.initialize_routing_tables()
-            rip_net.simulate_rip()
+            converge_network(rip_net, topology_cache)
         except Exception as validation_error:
             logging.warning(f"Validation of saved network failed: {validation_error}")
         
@@ -195,23 +570,33 @@ def load_sample_network_endpoint():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/network/load-custom', methods=['POST'])
+@admission_controlled(lambda: estimate_topology_upload(converge=True))
 def load_custom_network():
     """Load a custom network from JSON data"""
     try:
-        data = request.get_json()
+        # Parse, validate and build in a single streaming pass over the body
+        ingest = ingest_topology(request.stream)
+        if not ingest.nodes:
+            return jsonify({"error": "No valid nodes in topology", "summary": ingest.summary()}), 400
         global custom_network_data, current_network
         
-        custom_network_data = data
-        current_network = create_network_from_data(custom_network_data)
-        current_network.initialize_routing_tables()
-        current_network.simulate_rip()
+        custom_network_data = dict(ingest.meta, nodes=ingest.nodes, links=ingest.links)
+        current_network = ingest.build_network()
+        converge_network(current_network, topology_cache)
         
-        return jsonify({"success": True, "message": "Custom network loaded"})
+        return jsonify({
+            "success": True,
+            "message": "Custom network loaded",
+            "summary": ingest.summary()
+        })
     
+    except TopologyParseError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/network/add-node', methods=['POST'])
+@admission_controlled(estimate_topology_edit)
 def add_node():
     """Add a new node to the network"""
     try:
@@ -227,10 +612,9 @@ def add_node():
         if node_id in current_network.nodes:
             return jsonify({"error": "Node already exists"}), 400
         
-        # Add node to network
-        current_network.add_node(node_id)
-        current_network.initialize_routing_tables()
-        current_network.simulate_rip()
+        # Add node to network (to `area`, when the network is split into areas)
+        current_network.add_node(node_id, data.get('area'))
+        converge_network(current_network, topology_cache, incremental=True)
         
         return jsonify({"success": True, "message": f"Node {node_id} added"})
     
@@ -238,6 +622,7 @@ def add_node():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/network/remove-node', methods=['POST'])
+@admission_controlled(estimate_topology_edit)
 def remove_node():
     """Remove a node from the network"""
     try:
@@ -253,16 +638,9 @@ def remove_node():
         if node_id not in current_network.nodes:
             return jsonify({"error": "Node does not exist"}), 400
         
-        # Remove node from network
-        del current_network.nodes[node_id]
-        
-        # Remove all links to this node
-        for node in current_network.nodes.values():
-            if node_id in node.neighbors:
-                del node.neighbors[node_id]
-        
-        current_network.initialize_routing_tables()
-        current_network.simulate_rip()
+        # Remove the node and its links; routes through it are invalidated in place
+        current_network.remove_node(node_id)
+        converge_network(current_network, topology_cache, incremental=True)
         
         return jsonify({"success": True, "message": f"Node {node_id} removed"})
     
@@ -270,6 +648,7 @@ def remove_node():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/network/add-link', methods=['POST'])
+@admission_controlled(estimate_topology_edit)
 def add_link():
     """Add a link between two nodes"""
     try:
@@ -289,14 +668,83 @@ def add_link():
         
         # Add bidirectional link
         current_network.add_bidirectional_link(source_id, target_id, distance)
-        current_network.initialize_routing_tables()
-        current_network.simulate_rip()
+        converge_network(current_network, topology_cache, incremental=True)
         
         return jsonify({"success": True, "message": f"Link added between {source_id} and {target_id}"})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/network/areas', methods=['POST'])
+@admission_controlled(lambda: pending_graph_cost() + [('rip_convergence', rip_convergence_units(*topology_size()))])
+def set_network_areas():
+    """Group the current topology into areas with summarized routes, or make it flat again."""
+    try:
+        from routing_areas import assign_areas, split_areas
+        data = request.get_json() or {}
+        graph = get_topology_graph()
+        
+        if data.get('count'):
+            areas = assign_areas(graph, max(1, int(data['count'])))
+        else:
+            # JSON object keys are strings; match them to integer node ids too
+            by_name = {str(node_id): node_id for node_id in graph.nodes}
+            requested = data.get('areas') or {}
+            unknown = [node_id for node_id in requested if node_id not in graph.nodes and node_id not in by_name]
+            if unknown:
+                return jsonify({"error": f"Unknown nodes: {', '.join(map(str, unknown))}"}), 400
+            areas = {node_id if node_id in graph.nodes else by_name[node_id]: area
+                     for node_id, area in requested.items()}
+            split = split_areas(graph, areas) if areas else []
+            if split:
+                return jsonify({"error": f"Areas must be connected; split areas: {', '.join(split)}",
+                                "split_areas": split}), 400
+        
+        graph.set_areas(areas)
+        converge_network(graph, topology_cache)
+        
+        sizes = [len(node.routing_table) for node in graph.nodes.values()]
+        return jsonify({
+            "success": True,
+            "areas": graph.areas,
+            "table_entries": sum(sizes),
+            "max_table_entries": max(sizes, default=0)
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def estimate_areas_report():
+    nodes, links = topology_size()
+    pairs = max(0, min(int(request.args.get('pairs', 1000)), 100000))
+    return pending_graph_cost() + [
+        ('table_copy', 2 * nodes * nodes),
+        ('rip_convergence', 2 * rip_convergence_units(nodes, links)),
+        ('table_scan', 2 * pairs * math.log2(nodes + 2))  # Two table walks per sampled pair
+    ]
+
+@app.route('/api/network/areas/report', methods=['GET'])
+@admission_controlled(estimate_areas_report)
+def network_areas_report():
+    """Compare flat and area-summarized routing on the current topology."""
+    try:
+        from routing_areas import area_report, assign_areas
+        graph = get_topology_graph()
+        count = request.args.get('count')
+        areas = assign_areas(graph, max(1, int(count))) if count else graph.areas
+        if not areas:
+            return jsonify({"error": "The network has no areas; pass count to assign them"}), 400
+        
+        pairs = max(0, min(int(request.args.get('pairs', 1000)), 100000))
+        return jsonify({"success": True, "report": area_report(graph, areas, pairs)})
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/rip/network', methods=['GET'])
 def get_rip_network():
     """Legacy endpoint - redirects to new topology endpoint"""
@@ -344,78 +792,626 @@ def playfair_decrypt():
             "decrypted_text": decrypted_text,
             "success": True
         })
-    
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def estimate_playfair_crack():
+    data = request.get_json(silent=True) or {}
+    restarts = max(1, min(int(data.get('restarts', 8)), 256))
+    iterations = max(1000, min(int(data.get('iterations', 400000)), 10000000))
+    return [('anneal_steps', restarts * iterations)]
+
+@app.route('/api/playfair/crack', methods=['POST'])
+@admission_controlled(estimate_playfair_crack, background=True)
+def playfair_crack():
+    """Start a ciphertext-only key-recovery job."""
+    try:
+        from playfair_cryptanalysis import crack_jobs
+        data = request.get_json() or {}
+        ciphertext = data.get('ciphertext', '')
+
+        if not ciphertext:
+            return jsonify({"error": "Ciphertext is required"}), 400
+
+        workers = data.get('workers')
+        job = crack_jobs.submit(
+            ciphertext,
+            restarts=max(1, min(int(data.get('restarts', 8)), 256)),
+            iterations=max(1000, min(int(data.get('iterations', 400000)), 10000000)),
+            workers=max(1, min(int(workers), 64)) if workers else None,
+            known_plaintext=data.get('known_plaintext'),
+            seed=data.get('seed')
+        )
+
+        return jsonify({"job_id": job.id, "success": True}), 202
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/playfair/crack/<job_id>', methods=['GET', 'DELETE'])
+def playfair_crack_status(job_id):
+    """Report progress of a key-recovery job, or cancel it."""
+    try:
+        from playfair_cryptanalysis import crack_jobs
+        job = crack_jobs.cancel(job_id) if request.method == 'DELETE' else crack_jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": f"Unknown job: {job_id}"}), 404
+
+        return jsonify({"job": job.progress(), "success": True})
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/rip/shortest-path', methods=['POST'])
+@admission_controlled(lambda: pending_routing_cost((request.get_json(silent=True) or {}).get('protocol')))
 def find_shortest_path():
     """Find shortest path between two nodes."""
     try:
         data = request.get_json()
         source = data.get('source', 'A')
         destination = data.get('destination', 'F')
+        protocol = data.get('protocol') or 'rip'
         
-        # Build a RIPNetwork object from the current dictionary if necessary
-        if isinstance(current_network, dict):
-            graph = create_network_from_data(current_network)
-            graph.initialize_routing_tables()
-            graph.simulate_rip()
-        else:
-            graph = current_network
+        # Dict topologies are backed by a cached, converged RIPNetwork
+        graph = get_routing_graph(protocol)
         
         path = graph.find_shortest_path(source, destination)
         cost = graph.get_path_cost(path) if path else -1
         
-        return jsonify({
+        response = {
             "path": path,
             "cost": cost,
+            "protocol": protocol,
             "success": True
+        }
+        if data.get('ecmp'):
+            # Every path the tables can forward along, over all equal-cost next hops
+            from path_queries import equal_cost_paths
+            response['equal_cost_paths'] = equal_cost_paths(graph, source, destination)
+        return jsonify(response)
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def estimate_k_shortest_paths():
+    data = request.get_json(silent=True) or {}
+    queries = min(len(data.get('pairs') or [None]), 10000) * max(1, min(int(data.get('k', 3)), 32))
+    return pending_graph_cost() + [('path_search', queries * sum(topology_size()))]
+
+@app.route('/api/rip/k-shortest-paths', methods=['POST'])
+@admission_controlled(estimate_k_shortest_paths)
+def k_shortest_paths():
+    """
+    Up to k loopless paths per (source, destination) pair, cheapest first.
+
+    Body: `k` plus either `source`/`destination` or `pairs` as a list of
+    [source, destination] lists or {source, destination} objects. Answers
+    are cached until the topology changes.
+    """
+    global _path_cache
+    try:
+        from path_queries import PathQueryCache, batch_k_shortest_paths
+        data = request.get_json() or {}
+        k = int(data.get('k', 3))
+        pairs = data.get('pairs')
+        if pairs is None:
+            pairs = [(data.get('source', 'A'), data.get('destination', 'F'))]
+        pairs = [(pair['source'], pair['destination']) if isinstance(pair, dict) else tuple(pair)
+                 for pair in pairs]
+        if any(len(pair) != 2 for pair in pairs):
+            return jsonify({"error": "Each pair needs a source and a destination"}), 400
+        
+        if _path_cache is None:
+            _path_cache = PathQueryCache()
+        graph = get_topology_graph()
+        results = batch_k_shortest_paths(graph, pairs, k, _path_cache)
+        
+        return jsonify({
+            "success": True,
+            "k": k,
+            "epoch": graph.epoch,
+            "version": graph.version,
+            "results": results,
+            "cache": _path_cache.stats()
+        })
+    
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/rip/traffic-matrix', methods=['POST'])
+@admission_controlled(lambda: pending_routing_cost((request.get_json(silent=True) or {}).get('protocol'))
+                      + [('traffic_matrix', topology_size()[0] ** 2)])
+def traffic_matrix_loads():
+    """
+    Route a traffic matrix over the converged tables and report link loads.
+
+    Body: `matrix` (with optional `nodes` order), `demands` or
+    `model: "gravity"` with `total`; `ecmp` to split traffic evenly over
+    equal-cost next hops; `capacity` for every link and/or
+    `link_capacities` as [{source, target, capacity}] per direction; `top`
+    hottest links and histogram `bins`; `protocol` (rip or link-state).
+    """
+    try:
+        import traffic_matrix
+        data = request.get_json() or {}
+        graph = get_routing_graph(data.get('protocol'))
+        demand = traffic_matrix.parse_traffic_matrix(data, graph)
+        link_capacities = {(link['source'], link['target']): float(link['capacity'])
+                           for link in data.get('link_capacities') or []}
+        capacity = data.get('capacity')
+        
+        report = traffic_matrix.route_traffic_matrix(
+            graph, demand,
+            ecmp=bool(data.get('ecmp')),
+            capacity=float(capacity) if capacity else None,
+            link_capacities=link_capacities,
+            top=max(0, min(int(data.get('top', 10)), 1000)),
+            bins=max(1, min(int(data.get('bins', 10)), 100))
+        )
+        report.update(success=True, epoch=graph.epoch, version=graph.version)
+        return jsonify(report)
+    
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def estimate_routing_analysis():
+    nodes, links = topology_size()
+    if request.args.get('timeline') != '1':
+        return pending_graph_cost() + [('table_scan', nodes * nodes)]
+    return pending_graph_cost() + [
+        ('table_copy', nodes * nodes),
+        ('rip_convergence', rip_convergence_units(nodes, links)),
+        ('table_scan', nodes * nodes * math.log2(nodes + 2))  # Loop analysis after every round
+    ]
+
+@app.route('/api/rip/analysis', methods=['GET'])
+@admission_controlled(estimate_routing_analysis)
+def analyze_routing():
+    """Report forwarding loops and black holes in the current routing tables."""
+    try:
+        import routing_analysis
+        limit = max(0, min(int(request.args.get('limit', 100)), 10000))
+        graph = get_topology_graph()
+        
+        if request.args.get('timeline') == '1':
+            # Re-converge a copy from scratch and chart loops round by round
+            import copy
+            graph = copy.deepcopy(graph)
+            for node in graph.nodes.values():
+                node.reset_routing_table()
+            graph.initialize_routing_tables()
+            converged, timeline = routing_analysis.convergence_timeline(graph)
+            return jsonify({"success": True, "converged": converged, "timeline": timeline})
+        
+        analysis = routing_analysis.analyze_network(graph)
+        return jsonify({
+            "success": True,
+            "counts": analysis.counts(),
+            "loops": analysis.loops(limit),
+            "black_holes": analysis.black_holes(limit)
         })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def estimate_rip_scenarios():
+    data = request.get_json(silent=True) or {}
+    if 'timeline' in data:
+        events = len(data['timeline'])
+    else:
+        options = data.get('random', {})
+        events = max(1, min(int(options.get('scenarios', 1000)), 20000)) * max(1, min(int(options.get('events', 5)), 50))
+    nodes, links = topology_size()
+    return pending_graph_cost() + [('table_copy', nodes * nodes), ('rip_events', events * nodes * (nodes + links))]
+
+@app.route('/api/rip/scenarios', methods=['POST'])
+@admission_controlled(estimate_rip_scenarios)
+def run_rip_scenarios():
+    """Replay a link-event timeline, or many random ones, against the current network."""
+    try:
+        import copy
+        import rip_scenarios
+        data = request.get_json() or {}
+        
+        graph = copy.deepcopy(get_topology_graph())
+        
+        if 'timeline' in data:
+            results = rip_scenarios.run_scenario(graph, data['timeline'],
+                                                 max_rounds=min(int(data.get('max_rounds', 500)), 5000))
+            return jsonify({"success": True, "results": results})
+        
+        options = data.get('random', {})
+        cpus = os.cpu_count() or 1
+        workers = options.get('workers')
+        records, summary = rip_scenarios.run_random_scenarios(
+            graph,
+            scenarios=max(1, min(int(options.get('scenarios', 1000)), 20000)),
+            events=max(1, min(int(options.get('events', 5)), 50)),
+            seed=int(options.get('seed', 0)),
+            workers=max(1, min(int(workers), cpus)) if workers else cpus,
+            max_gap=max(0, int(options.get('max_gap', 10)))
+        )
+        return jsonify({"success": True, "scenarios": len({r['seed'] for r in records}), "summary": summary})
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def parse_seed(seed):
+    """A seed is an integer or a string (or None for an unseeded run)."""
+    if seed is None or (isinstance(seed, (int, str)) and not isinstance(seed, bool)):
+        return seed
+    raise ValueError("seed must be an integer or a string")
+
+def clamp_max_time(value, long_horizon):
+    """max_time bounds of /api/tcp/simulate: 10-200 steps, or up to 1e9 RTTs for long-horizon runs."""
+    return max(10, min(int(value), 10**9 if long_horizon else 200))
+
+def tcp_fork_overrides(data, long_horizon):
+    """Validate TCP checkpoint fork overrides with the /api/tcp/simulate bounds."""
+    overrides = {}
+    if data.get('packet_loss_rate') is not None:
+        overrides['packet_loss_rate'] = max(0.0, min(float(data['packet_loss_rate']), 0.5))
+    if data.get('max_cwnd') is not None:
+        overrides['max_cwnd'] = max(1, int(data['max_cwnd']))
+    if data.get('max_time') is not None:
+        overrides['max_time'] = clamp_max_time(data['max_time'], long_horizon)
+    if data.get('timeout_probability') is not None:
+        overrides['timeout_probability'] = max(0.0, min(float(data['timeout_probability']), 1.0))
+    if data.get('seed') is not None:
+        overrides['seed'] = parse_seed(data['seed'])
+    return overrides
+
+def tcp_simulation_params(data):
+    """
+    Validate TCP simulation parameters from a request body.
+    
+    Returns:
+        (simulator_class, data_size, constructor params)
+    """
+    mss = max(500, min(int(data.get('mss', 1460)), 9000))  # 500B to 9KB (jumbo frames)
+    initial_cwnd = max(1, min(int(data.get('initial_cwnd', 1)), 10))  # 1 to 10 MSS
+    packet_loss_rate = max(0.0, min(float(data.get('packet_loss_rate', 0.05)), 0.5))  # 0% to 50%
+    seed = parse_seed(data.get('seed'))
+    long_horizon = data.get('mode') == 'long_horizon'
+    
+    if long_horizon:
+        from tcp_long_horizon import LongHorizonTCPSimulator
+        
+        # Fast-forwarded simulation with bounded, downsampled histories
+        data_size = max(1000, min(int(data.get('data_size', 10**9)), 10**13))  # 1KB to 10TB
+        ssthresh = max(2, min(int(data.get('ssthresh', 65535)), 10**9))
+        max_time = clamp_max_time(data.get('max_time', 10**7), long_horizon)  # up to 1e9 RTTs
+        max_cwnd = data.get('max_cwnd')
+        simulator_class = LongHorizonTCPSimulator
+        extra_params = {
+            'max_cwnd': None if max_cwnd is None else max(1, int(max_cwnd)),
+            'max_points': max(100, min(int(data.get('max_points') or 2000), 20000))
+        }
+    else:
+        # Extract parameters with validation
+        data_size = max(1000, min(int(data.get('data_size', 10000)), 1000000))  # 1KB to 1MB
+        ssthresh = max(2, min(int(data.get('ssthresh', 65535)), 100))  # 2 to 100 MSS
+        max_time = clamp_max_time(data.get('max_time', 100), long_horizon)  # 10 to 200 steps
+        simulator_class = TCPRenoSimulator
+        extra_params = {}
+    
+    params = dict(
+        mss=mss,
+        initial_cwnd=initial_cwnd,
+        ssthresh=ssthresh,
+        max_time=max_time,
+        packet_loss_rate=packet_loss_rate,
+        seed=seed,
+        **extra_params
+    )
+    return simulator_class, data_size, params
+
 @app.route('/api/tcp/simulate', methods=['POST'])
+@admission_controlled(lambda: estimate_tcp(request.get_json(silent=True) or {}))
 def simulate_tcp():
     """Simulate TCP Reno transmission."""
     try:
         data = request.get_json()
         
-        # Extract parameters with validation
-        data_size = max(1000, min(int(data.get('data_size', 10000)), 1000000))  # 1KB to 1MB
-        mss = max(500, min(int(data.get('mss', 1460)), 9000))  # 500B to 9KB (jumbo frames)
-        initial_cwnd = max(1, min(int(data.get('initial_cwnd', 1)), 10))  # 1 to 10 MSS
-        ssthresh = max(2, min(int(data.get('ssthresh', 65535)), 100))  # 2 to 100 MSS
-        packet_loss_rate = max(0.0, min(float(data.get('packet_loss_rate', 0.05)), 0.5))  # 0% to 50%
-        max_time = max(10, min(int(data.get('max_time', 100)), 200))  # 10 to 200 steps
+        simulator_class, data_size, params = tcp_simulation_params(data)
+        seed = params['seed']
+        
+        # Compact columnar output: binary frame via Accept header, or base64 JSON
+        from tcp_results import BINARY_MIMETYPE, compact_results, to_base64_json, to_binary_frame
+        wants_binary = request.accept_mimetypes.best_match(
+            ['application/json', BINARY_MIMETYPE]) == BINARY_MIMETYPE
+        include_plot = bool(data.get('include_plot', True))
+        max_points = data.get('max_points')
+        if max_points is not None:
+            max_points = max(100, min(int(max_points), 20000))
+        
+        # Seeded runs are deterministic, so their rendered response can be reused
+        cache_key = None
+        if seed is not None:
+            cache_key = result_cache.make_key('tcp', {
+                'simulator': simulator_class.__name__,
+                'data_size': data_size,
+                'params': params,
+                'include_plot': include_plot,
+                'binary': wants_binary,
+                'format': data.get('format'),
+                'max_points': max_points
+            })
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached_response(*cached, hit=True)
         
         # Create simulator instance
-        simulator = TCPRenoSimulator(
-            mss=mss,
-            initial_cwnd=initial_cwnd,
-            ssthresh=ssthresh,
-            max_time=max_time,
-            packet_loss_rate=packet_loss_rate
-        )
+        simulator = simulator_class(**params)
         
         # Run simulation
         results = simulator.simulate_transmission(data_size)
         
         # Generate plot as base64
-        plot_base64 = simulator.plot_results(results, return_base64=True)
+        plot_base64 = None
+        if include_plot:
+            plot_base64 = simulator.plot_results(results, return_base64=True)
         
-        return jsonify({
-            'success': True,
-            'results': results,
-            'plot': plot_base64
-        })
+        if wants_binary or data.get('format') == 'compact':
+            fields, columns = compact_results(results, max_points)
+            if wants_binary:
+                fields['plot'] = plot_base64
+                response = Response(to_binary_frame(fields, columns), mimetype=BINARY_MIMETYPE)
+            else:
+                response = jsonify({
+                    'success': True,
+                    'results': to_base64_json(fields, columns),
+                    'plot': plot_base64
+                })
+        else:
+            response = jsonify({
+                'success': True,
+                'results': results,
+                'plot': plot_base64
+            })
+        
+        return store_cached_response(cache_key, response)
         
     except Exception as e:
         logging.error(f"TCP simulation error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/tcp/traces', methods=['GET'])
+def list_traces():
+    """List registered loss/RTT traces."""
+    return jsonify({"traces": get_trace_registry().list(), "success": True})
+
+@app.route('/api/tcp/traces', methods=['POST'])
+def upload_trace():
+    """Upload a trace as the raw request body, or register a server-side file."""
+    try:
+        if request.is_json:
+            data = request.get_json()
+            if not data.get('path'):
+                return jsonify({"error": "Trace path is required"}), 400
+            metadata = get_trace_registry().register_path(
+                data['path'], data.get('format'), data.get('name')
+            )
+        else:
+            fmt = request.args.get('format', 'bin')
+            metadata = get_trace_registry().upload(request.stream, fmt, request.args.get('name'))
+        
+        return jsonify({"trace": metadata, "success": True})
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def trace_replay_params(parameter_sets):
+    """Clamp replay parameter sets to the /api/tcp/simulate mss bounds; max_time may run the trace's length."""
+    if not isinstance(parameter_sets, list) or not all(isinstance(p, dict) for p in parameter_sets):
+        raise ValueError("parameter_sets must be a list of objects")
+    clamped = []
+    for params in parameter_sets or [{}]:
+        params = dict(params)
+        if params.get('mss') is not None:
+            params['mss'] = max(500, min(int(params['mss']), 9000))
+        if params.get('max_time') is not None:
+            params['max_time'] = clamp_max_time(params['max_time'], long_horizon=True)
+        if params.get('seed') is not None:
+            params['seed'] = parse_seed(params['seed'])
+        clamped.append(params)
+    return clamped
+
+def estimate_trace_replay(trace_id):
+    parameter_sets = trace_replay_params((request.get_json(silent=True) or {}).get('parameter_sets') or [])
+    records = get_trace_registry().record_bound(trace_id)
+    # Each run stops at the end of the trace or at its max_time, whichever comes first
+    return [('trace_replay', sum(min(records, params.get('max_time', 100)) for params in parameter_sets))]
+
+@app.route('/api/tcp/traces/<trace_id>/replay', methods=['POST'])
+@admission_controlled(estimate_trace_replay)
+def replay_tcp_trace(trace_id):
+    """Replay a registered trace against one or more simulator parameter sets."""
+    try:
+        trace = get_trace_registry().get(trace_id)
+        if trace is None:
+            return jsonify({"error": f"Unknown trace: {trace_id}"}), 404
+        
+        data = request.get_json() or {}
+        data_size = max(1, int(data.get('data_size', 100000)))
+        parameter_sets = trace_replay_params(data.get('parameter_sets') or [])
+        workers = data.get('workers')
+        include_history = bool(data.get('include_history', False))
+        
+        from trace_replay import replay_trace
+        results = replay_trace(trace, data_size, parameter_sets,
+                               workers=max(1, min(int(workers), os.cpu_count() or 1)) if workers else None,
+                               include_history=include_history)
+        
+        return jsonify({
+            "trace_id": trace_id,
+            "results": results,
+            "success": True
+        })
+    
+    except TypeError as e:
+        return jsonify({"error": f"Invalid simulator parameters: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Trace replay error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/checkpoints', methods=['GET'])
+def list_checkpoints():
+    """List saved simulation checkpoints."""
+    try:
+        return jsonify({"checkpoints": get_checkpoint_store().list(), "success": True})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/checkpoints/<checkpoint_id>', methods=['GET', 'DELETE'])
+def checkpoint_status(checkpoint_id):
+    """Describe a checkpoint, or delete it."""
+    try:
+        store = get_checkpoint_store()
+        checkpoint = store.describe(checkpoint_id)
+        if request.method == 'DELETE':
+            store.delete(checkpoint_id)
+        
+        return jsonify({"checkpoint": checkpoint, "success": True})
+    
+    except KeyError:
+        return jsonify({"error": f"Unknown checkpoint: {checkpoint_id}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/checkpoints/rip', methods=['POST'])
+@admission_controlled(lambda: pending_graph_cost() + [('table_copy', topology_size()[0] ** 2), ('rip_convergence', rip_convergence_units(*topology_size()))])
+def checkpoint_rip():
+    """
+    Converge the current topology as a resumable job, checkpointing every
+    `checkpoint_every` rounds. Posting an existing job_id resumes it.
+    """
+    try:
+        import copy
+        from simulation_checkpoint import run_rip_job
+        
+        data = request.get_json() or {}
+        job_id = data.get('job_id') or uuid.uuid4().hex
+        max_iterations = max(1, min(int(data.get('max_iterations', 100)), 10000))
+        checkpoint_every = max(1, int(data.get('checkpoint_every', 10)))
+        
+        store = get_checkpoint_store()
+        network = None if store.exists(job_id) else copy.deepcopy(get_topology_graph())
+        _, summary = run_rip_job(store, job_id, network, max_iterations, checkpoint_every)
+        
+        return jsonify({"job": summary, "success": True})
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"RIP checkpoint job error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/checkpoints/tcp', methods=['POST'])
+@admission_controlled(lambda: estimate_tcp(request.get_json(silent=True) or {}))
+def checkpoint_tcp():
+    """
+    Run a TCP transfer (same parameters as /api/tcp/simulate) as a
+    resumable job, checkpointing every `checkpoint_every` RTTs. Posting an
+    existing job_id resumes it.
+    """
+    try:
+        from simulation_checkpoint import run_tcp_job
+        
+        data = request.get_json() or {}
+        job_id = data.get('job_id') or uuid.uuid4().hex
+        checkpoint_every = data.get('checkpoint_every')
+        checkpoint_every = None if checkpoint_every is None else max(1, int(checkpoint_every))
+        
+        store = get_checkpoint_store()
+        simulator, data_size = None, None
+        if not store.exists(job_id):
+            simulator_class, data_size, params = tcp_simulation_params(data)
+            simulator = simulator_class(**params)
+        results, resumed_from = run_tcp_job(store, job_id, simulator, data_size, checkpoint_every)
+        
+        return jsonify({
+            "checkpoint_id": job_id,
+            "resumed_from_time": resumed_from,
+            "results": results,
+            "success": True
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"TCP checkpoint job error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def estimate_checkpoint_fork(checkpoint_id):
+    header, _ = get_checkpoint_store().load(checkpoint_id, header_only=True)
+    data = request.get_json(silent=True) or {}
+    if header['kind'] == 'rip':
+        nodes = header['progress']['nodes']
+        return [('table_copy', nodes * nodes), ('rip_events', len(data.get('events') or []) * nodes * 3 * nodes)]
+    state = header['state']
+    long_horizon = header['simulator'] == 'long_horizon'
+    overrides = tcp_fork_overrides(data, long_horizon)
+    max_time = max(state['time'], overrides.get('max_time', state['max_time']))
+    return tcp_units(header['progress']['remaining_data'], state['mss'], max_time - state['time'],
+                     overrides.get('packet_loss_rate', state['packet_loss_rate']),
+                     long_horizon=long_horizon, max_points=state.get('max_points', 0))
+
+@app.route('/api/checkpoints/<checkpoint_id>/fork', methods=['POST'])
+@admission_controlled(estimate_checkpoint_fork)
+def fork_checkpoint(checkpoint_id):
+    """
+    Continue a checkpoint under changed conditions without modifying it:
+    link events for RIP checkpoints, loss/window/seed overrides for TCP ones.
+    Pass save_as to keep the forked state as a new checkpoint.
+    """
+    try:
+        from simulation_checkpoint import fork_rip, fork_tcp
+        
+        data = request.get_json() or {}
+        store = get_checkpoint_store()
+        save_as = data.get('save_as')
+        header, _ = store.load(checkpoint_id, header_only=True)
+        
+        if header['kind'] == 'rip':
+            events = data.get('events') or []
+            if not isinstance(events, list):
+                return jsonify({"error": "events must be a list"}), 400
+            max_iterations = max(1, min(int(data.get('max_iterations', 500)), 10000))
+            _, summary = fork_rip(store, checkpoint_id, events, save_as, max_iterations)
+            return jsonify({"fork": summary, "success": True})
+        
+        overrides = tcp_fork_overrides(data, header['simulator'] == 'long_horizon')
+        results = fork_tcp(store, checkpoint_id, overrides, save_as)
+        return jsonify({"results": results, "checkpoint_id": save_as, "success": True})
+    
+    except KeyError:
+        return jsonify({"error": f"Unknown checkpoint: {checkpoint_id}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Checkpoint fork error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/simulation/full', methods=['POST'])
+@admission_controlled(lambda: [('tcp_steps', 200), ('plot', 1)])
 def run_full_simulation():
     """Run the complete network transmission simulation."""
     try:
@@ -425,9 +1421,24 @@ def run_full_simulation():
         source_node = data.get('source_node', 'A')
         destination_node = data.get('destination_node', 'F')
         packet_loss_rate = data.get('packet_loss_rate', 0.05)
+        seed = data.get('seed')
+        
+        cache_key = None
+        if seed is not None:
+            cache_key = result_cache.make_key('full', {
+                'plaintext': plaintext,
+                'key': key,
+                'source_node': source_node,
+                'destination_node': destination_node,
+                'packet_loss_rate': packet_loss_rate,
+                'seed': seed
+            })
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached_response(*cached, hit=True)
         
         results = simulate_network_transmission(
-            plaintext, key, source_node, destination_node, packet_loss_rate
+            plaintext, key, source_node, destination_node, packet_loss_rate, seed=seed
         )
         
         # Generate TCP plot if simulation was successful
@@ -435,30 +1446,33 @@ def run_full_simulation():
         if results.get("success") and "tcp_results" in results:
             tcp_results = results["tcp_results"]
             
-            plt.figure(figsize=(12, 6))
-            time_steps = range(len(tcp_results["cwnd_history"]))
-            
-            plt.plot(time_steps, tcp_results["cwnd_history"], 'b-', label='Congestion Window', linewidth=2)
-            plt.plot(time_steps, tcp_results["ssthresh_history"], 'r--', label='Slow Start Threshold', linewidth=2)
-            
-            plt.xlabel('Time Steps')
-            plt.ylabel('Size (MSS)')
-            plt.title('TCP Reno Simulation - Full Network Transmission')
-            plt.grid(True, linestyle='--', alpha=0.7)
-            plt.legend()
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            plot_data = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
+            with stage_timer('full_simulation_plot'):
+                import matplotlib.pyplot as plt
+                
+                plt.figure(figsize=(12, 6))
+                time_steps = range(len(tcp_results["cwnd_history"]))
+                
+                plt.plot(time_steps, tcp_results["cwnd_history"], 'b-', label='Congestion Window', linewidth=2)
+                plt.plot(time_steps, tcp_results["ssthresh_history"], 'r--', label='Slow Start Threshold', linewidth=2)
+                
+                plt.xlabel('Time Steps')
+                plt.ylabel('Size (MSS)')
+                plt.title('TCP Reno Simulation - Full Network Transmission')
+                plt.grid(True, linestyle='--', alpha=0.7)
+                plt.legend()
+                plt.tight_layout()
+                
+                buffer = io.BytesIO()
+                plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+                buffer.seek(0)
+                plot_data = base64.b64encode(buffer.getvalue()).decode()
+                plt.close()
         
-        return jsonify({
+        return store_cached_response(cache_key, jsonify({
             "results": results,
             "plot": plot_data,
             "success": True
-        })
+        }))
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -472,41 +1486,111 @@ def get_all_nodes():
     })
 
 @app.route('/api/network/load-topology', methods=['POST'])
+@admission_controlled(lambda: estimate_topology_upload(converge=False))
 def load_topology():
     try:
-        data = request.get_json()
-        topology_key = data.get('topology')
-        topology_data = data.get('data')
+        # Nodes and links are parsed and validated incrementally from the body
+        ingest = ingest_topology(request.stream, container='data')
+        topology_key = ingest.meta.get('topology')
+        summary = ingest.summary()
         
-        if not topology_data:
-            return jsonify({'success': False, 'error': 'No topology data provided'})
+        if not ingest.nodes:
+            return jsonify({'success': False, 'error': 'No topology data provided', 'summary': summary}), 400
         
         # Update global network state
         global current_network
         current_network = {
-            'nodes': topology_data['nodes'],
-            'links': topology_data['links']
+            'nodes': ingest.nodes,
+            'links': ingest.links
         }
         
         # Save to file for persistence
-        with open('custom_network.json', 'w') as f:
-            json.dump({
-                'topology': topology_key,
-                'data': topology_data
-            }, f, indent=2)
+        save_topology_file({
+            'topology': topology_key,
+            'data': current_network
+        }, large=len(ingest.links) > 10000)
         
-        logging.info(f"Loaded topology: {topology_key} with {len(topology_data['nodes'])} nodes and {len(topology_data['links'])} links")
+        logging.info(f"Loaded topology: {topology_key} with {summary['node_count']} nodes and "
+                     f"{summary['link_count']} links ({summary['error_count']} rejected) "
+                     f"in {ingest.elapsed * 1000:.1f} ms")
         
         return jsonify({
             'success': True,
             'message': f'Topology {topology_key} loaded successfully',
-            'nodes': topology_data['nodes'],
-            'links': topology_data['links']
+            'summary': summary
         })
         
+    except TopologyParseError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logging.error(f"Error loading topology: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/network/export', methods=['GET'])
+def export_network():
+    """Download the current topology as edge-list CSV, GraphML or binary CSR."""
+    try:
+        import topology_formats
+        fmt = request.args.get('format', 'csv')
+        if fmt not in topology_formats.FORMATS:
+            return jsonify({"error": f"Unsupported format '{fmt}'",
+                            "formats": list(topology_formats.FORMATS)}), 400
+        
+        network = ensure_network()
+        if isinstance(network, dict):
+            node_ids, edges = topology_formats.data_edges(network)
+        else:
+            node_ids, edges = topology_formats.network_edges(network)
+        
+        body = topology_formats.export_topology(fmt, node_ids, edges)
+        response = Response(body, mimetype=topology_formats.MIMETYPES[fmt])
+        response.headers['Content-Disposition'] = f'attachment; filename=topology.{fmt}'
+        return response
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/network/import', methods=['POST'])
+@admission_controlled(lambda: estimate_topology_upload(converge=request.args.get('converge', '0') == '1'))
+def import_network():
+    """Bulk-load a topology from an edge-list CSV, GraphML or binary CSR body."""
+    try:
+        import topology_formats
+        fmt = request.args.get('format', 'csv')
+        if fmt not in topology_formats.FORMATS:
+            return jsonify({"error": f"Unsupported format '{fmt}'",
+                            "formats": list(topology_formats.FORMATS)}), 400
+        
+        start = time.perf_counter()
+        network = topology_formats.import_topology(fmt, request.stream)
+        elapsed = time.perf_counter() - start
+        
+        global current_network
+        current_network = network
+        # Large imports are converged lazily on the first topology request
+        if request.args.get('converge', '0') == '1':
+            converge_network(current_network, topology_cache)
+        
+        link_count = sum(len(node.neighbors) for node in network.nodes.values()) // 2
+        logging.info(f"Imported {fmt} topology with {len(network.nodes)} nodes and "
+                     f"{link_count} links in {elapsed * 1000:.1f} ms")
+        
+        return jsonify({
+            "success": True,
+            "message": f"Topology imported from {fmt}",
+            "node_count": len(network.nodes),
+            "link_count": link_count,
+            "elapsed_ms": round(elapsed * 1000, 1)
+        })
+    
+    except topology_formats.TopologyImportError as e:
+        return jsonify({"error": str(e), "summary": e.summary}), 400
+    except (ValueError, SyntaxError) as e:
+        # ElementTree.ParseError is a SyntaxError subclass
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=8003)
+    # Development server only; use serve.py for multi-worker production serving
+    app.run(debug=os.environ.get('FLASK_ENV') == 'development', host='0.0.0.0', port=8003)
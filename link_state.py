@@ -0,0 +1,475 @@
+import argparse
+import heapq
+import time
+import uuid
+
+from rip_simulator import Node, RIPNetwork
+
+# OSPF-style link-state routing on the same node/table model as RIPNetwork:
+# every router originates an LSA listing its links, LSAs are flooded hop by
+# hop into every router's link-state database (LSDB), and each router runs
+# Dijkstra over its LSDB to fill its routing table. A link is used only when
+# both endpoints advertise it (the two-way check).
+
+
+class LSA:
+    """Link-state advertisement; `links` is None for a flushed (MaxAge) LSA."""
+
+    __slots__ = ('origin', 'sequence', 'links')
+
+    def __init__(self, origin, sequence, links):
+        self.origin = origin
+        self.sequence = sequence
+        self.links = links
+
+
+class Router(Node):
+    def __init__(self, node_id, infinity=float('inf')):
+        super().__init__(node_id, infinity)
+        self.lsdb = {}  # origin -> LSA
+        self.pending = {}  # origin -> links before the LSAs installed since the last SPF
+        # Shortest-path tree from this router
+        self.dist = {}
+        self.parent = {}
+        self.children = {}
+        self.first_hop = {}
+
+    def reset_routing_table(self):
+        """Forget the LSDB and shortest-path tree; only the route to itself is kept."""
+        self.lsdb = {}
+        self.pending = {}
+        self.dist, self.parent, self.children, self.first_hop = {}, {}, {}, {}
+        self.routing_table = {self.node_id: (self.node_id, 0)}
+        self.dirty = {self.node_id}
+
+    def install(self, lsa):
+        """Install an LSA if it is newer than the stored copy; returns True if it was."""
+        current = self.lsdb.get(lsa.origin)
+        if current is not None and current.sequence >= lsa.sequence:
+            return False
+        self.pending.setdefault(lsa.origin, current.links if current is not None else None)
+        self.lsdb[lsa.origin] = lsa
+        return True
+
+    def _links(self, origin):
+        lsa = self.lsdb.get(origin)
+        return lsa.links if lsa is not None else None
+
+    def _edge_cost(self, x, y, links=None):
+        """Cost of the directed edge x->y if both ends advertise it, else None."""
+        links = links or self._links
+        x_links, y_links = links(x), links(y)
+        if x_links is None or y_links is None or y not in x_links or x not in y_links:
+            return None
+        return x_links[y]
+
+    def _set_parent(self, node_id, parent):
+        old = self.parent.get(node_id)
+        if old is not None:
+            self.children[old].discard(node_id)
+        self.parent[node_id] = parent
+        if parent is not None:
+            self.children.setdefault(parent, set()).add(node_id)
+
+    def _run_dijkstra(self, heap):
+        """Settle heap entries (distance, node, via) that improve on the current labels."""
+        settled = set()
+        while heap:
+            distance, node_id, via = heapq.heappop(heap)
+            if distance >= self.dist.get(node_id, float('inf')):
+                continue
+            self.dist[node_id] = distance
+            self._set_parent(node_id, via)
+            self.first_hop[node_id] = node_id if via == self.node_id else self.first_hop[via]
+            settled.add(node_id)
+            links = self._links(node_id) or {}
+            for neighbor_id in links:
+                cost = self._edge_cost(node_id, neighbor_id)
+                if cost is not None and distance + cost < self.dist.get(neighbor_id, float('inf')):
+                    heapq.heappush(heap, (distance + cost, neighbor_id, node_id))
+        return settled
+
+    def full_spf(self):
+        """Recompute the whole shortest-path tree; returns the destinations to refresh."""
+        previous = set(self.dist)
+        self.dist, self.parent, self.children, self.first_hop = {self.node_id: 0}, {self.node_id: None}, {}, {}
+        self.first_hop[self.node_id] = self.node_id
+        heap = []
+        for neighbor_id in self._links(self.node_id) or {}:
+            cost = self._edge_cost(self.node_id, neighbor_id)
+            if cost is not None:
+                heap.append((cost, neighbor_id, self.node_id))
+        heapq.heapify(heap)
+        settled = self._run_dijkstra(heap)
+        changed_origins, self.pending = set(self.pending), {}
+        return previous | settled | changed_origins | {self.node_id}, len(settled)
+
+    def incremental_spf(self):
+        """
+        Update the shortest-path tree for the LSAs installed since the last run.
+
+        Edges that got worse only matter if they are tree edges: the subtree
+        below such an edge is detached and re-attached from its best
+        neighbors outside it, while everything else keeps its distance.
+        Edges that got better seed a Dijkstra pass from their tail. Only
+        nodes whose label changes are visited.
+
+        Returns:
+            (destinations whose route may have changed, nodes settled)
+        """
+        if self.node_id not in self.dist:
+            return self.full_spf()
+        pending, self.pending = self.pending, {}
+        old_links = lambda origin: pending[origin] if origin in pending else self._links(origin)
+        pairs = set()
+        for origin, before in pending.items():
+            for neighbor_id in set(before or ()) | set(self._links(origin) or ()):
+                pairs.add((origin, neighbor_id))
+                pairs.add((neighbor_id, origin))
+
+        worse, better = [], []
+        for x, y in pairs:
+            old = self._edge_cost(x, y, old_links)
+            new = self._edge_cost(x, y)
+            if old == new:
+                continue
+            if new is None or (old is not None and new > old):
+                worse.append((x, y))
+            else:
+                better.append((x, y, new))
+
+        detached = set()
+        for x, y in worse:
+            if self.parent.get(y) == x and y not in detached:
+                stack = [y]
+                while stack:
+                    node_id = stack.pop()
+                    if node_id not in detached:
+                        detached.add(node_id)
+                        stack.extend(self.children.get(node_id, ()))
+        for node_id in detached:
+            self._set_parent(node_id, None)
+            del self.dist[node_id]
+            del self.first_hop[node_id]
+
+        heap = []
+        for node_id in detached:
+            for neighbor_id in self._links(node_id) or {}:
+                cost = self._edge_cost(neighbor_id, node_id)
+                if cost is not None and neighbor_id in self.dist:
+                    heap.append((self.dist[neighbor_id] + cost, node_id, neighbor_id))
+        for x, y, cost in better:
+            if x in self.dist:
+                heap.append((self.dist[x] + cost, y, x))
+        heapq.heapify(heap)
+        settled = self._run_dijkstra(heap)
+        return detached | settled | set(pending), len(settled)
+
+    def refresh_routes(self, destinations):
+        """Rewrite routing entries for the given destinations from the shortest-path tree."""
+        for dest_id in destinations:
+            if self._links(dest_id) is None and dest_id != self.node_id:
+                # Flushed router: drop the destination like RIPNetwork.remove_node does
+                if self.routing_table.pop(dest_id, None) is not None:
+                    self.entry_versions.pop(dest_id, None)
+                    self.dirty.discard(dest_id)
+                continue
+            if dest_id in self.dist:
+                entry = (self.first_hop[dest_id], self.dist[dest_id])
+            else:
+                entry = (None, self.infinity)
+            if self.routing_table.get(dest_id) != entry:
+                self.routing_table[dest_id] = entry
+                self.dirty.add(dest_id)
+
+
+class LinkStateNetwork:
+    """
+    Network of link-state routers with the RIPNetwork topology API.
+
+    Topology changes make the affected routers originate new LSAs; converge()
+    floods them in synchronous rounds and runs SPF on every router whose LSDB
+    changed, incrementally unless asked otherwise.
+    """
+
+    def __init__(self, infinity=float('inf')):
+        self.nodes = {}  # node_id -> Router
+        self.infinity = infinity
+        self.round_stats = []  # Per-round flooding statistics of the last converge
+        self.spf_stats = {}
+
+        # Change tracking for incremental topology responses (see RIPNetwork)
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.removed_nodes = {}
+        self.touched = set()
+
+        self.sequences = {}  # origin -> last LSA sequence number, kept across node removal
+        self.flushed = {}  # origin -> flushed LSA of a removed router, until it is everywhere
+        self._outbox = []  # (sender, receiver, LSA) transmissions for the next flooding round
+
+    # Routing tables have the same shape as RIP's, so these work unchanged
+    stamp_changes = RIPNetwork.stamp_changes
+    mark_all_changed = RIPNetwork.mark_all_changed
+    find_shortest_path = RIPNetwork.find_shortest_path
+    get_path_cost = RIPNetwork.get_path_cost
+    equal_cost_hops = RIPNetwork.equal_cost_hops
+    get_next_hops = RIPNetwork.get_next_hops
+
+    @classmethod
+    def from_edges(cls, node_ids, edges, **options):
+        """Build a network from node ids and (source, target, distance) edges; LSAs are originated on converge."""
+        network = cls(**options)
+        for node_id in node_ids:
+            network.nodes[node_id] = Router(node_id, network.infinity)
+        for source, target, distance in edges:
+            for node_id in (source, target):
+                if node_id not in network.nodes:
+                    network.nodes[node_id] = Router(node_id, network.infinity)
+            network.nodes[source].neighbors[target] = distance
+            network.nodes[target].neighbors[source] = distance
+        for router in network.nodes.values():
+            router.reset_routing_table()
+            network.originate(router.node_id)
+        return network
+
+    @classmethod
+    def from_network(cls, network, **options):
+        """Link-state copy of another network's topology (e.g. a RIPNetwork)."""
+        edges = [(a, b, distance) for a, node in network.nodes.items()
+                 for b, distance in node.neighbors.items()]
+        return cls.from_edges(list(network.nodes), edges, **options)
+
+    def originate(self, node_id, links=None):
+        """Install a fresh LSA for node_id in its own LSDB and queue it to every neighbor."""
+        router = self.nodes[node_id]
+        self.sequences[node_id] = self.sequences.get(node_id, 0) + 1
+        lsa = LSA(node_id, self.sequences[node_id], dict(router.neighbors) if links is None else links)
+        router.install(lsa)
+        self._outbox.extend((node_id, neighbor_id, lsa) for neighbor_id in router.neighbors)
+        self.touched.add(node_id)
+
+    def add_node(self, node_id):
+        router = Router(node_id, self.infinity)
+        router.reset_routing_table()
+        router.created_version = self.version + 1
+        self.nodes[node_id] = router
+        self.originate(node_id)
+        return router
+
+    def add_bidirectional_link(self, node1_id, node2_id, distance):
+        """Bring up a link; the endpoints exchange their databases and re-originate."""
+        for node_id in (node1_id, node2_id):
+            if node_id not in self.nodes:
+                self.add_node(node_id)
+        self.nodes[node1_id].neighbors[node2_id] = distance
+        self.nodes[node2_id].neighbors[node1_id] = distance
+        for a, b in ((node1_id, node2_id), (node2_id, node1_id)):
+            # Database exchange on the new adjacency
+            self._outbox.extend((a, b, lsa) for lsa in self.nodes[a].lsdb.values())
+        self.originate(node1_id)
+        self.originate(node2_id)
+
+    def remove_link(self, node1_id, node2_id):
+        for a, b in ((node1_id, node2_id), (node2_id, node1_id)):
+            node = self.nodes.get(a)
+            if node is not None and b in node.neighbors:
+                del node.neighbors[b]
+                self.originate(a)
+
+    def set_link_cost(self, node1_id, node2_id, distance):
+        for a, b in ((node1_id, node2_id), (node2_id, node1_id)):
+            self.nodes[a].neighbors[b] = distance
+            self.originate(a)
+
+    def remove_node(self, node_id):
+        """Remove a router; a former neighbor floods a flushed copy of its LSA."""
+        router = self.nodes.get(node_id)
+        if router is None:
+            return
+        neighbors = list(router.neighbors)
+        for neighbor_id in neighbors:
+            self.remove_link(node_id, neighbor_id)
+        del self.nodes[node_id]
+        self._outbox = [(a, b, lsa) for a, b, lsa in self._outbox if a != node_id and b != node_id]
+        self.sequences[node_id] += 1
+        flushed = self.flushed[node_id] = LSA(node_id, self.sequences[node_id], None)
+        for neighbor_id in neighbors:
+            if self.nodes[neighbor_id].install(flushed):
+                self._outbox.extend((neighbor_id, n, flushed) for n in self.nodes[neighbor_id].neighbors)
+        self.touched.discard(node_id)
+        self.version += 1
+        self.removed_nodes[node_id] = self.version
+
+    def sync(self, network):
+        """Apply the topology differences from another network as link events."""
+        for node_id in [n for n in self.nodes if n not in network.nodes]:
+            self.remove_node(node_id)
+        for node_id in network.nodes:
+            if node_id not in self.nodes:
+                self.add_node(node_id)
+        for node_id, node in network.nodes.items():
+            mine = self.nodes[node_id].neighbors
+            for neighbor_id, distance in node.neighbors.items():
+                if neighbor_id not in mine:
+                    self.add_bidirectional_link(node_id, neighbor_id, distance)
+                elif mine[neighbor_id] != distance:
+                    self.set_link_cost(node_id, neighbor_id, distance)
+            for neighbor_id in [n for n in mine if n not in node.neighbors]:
+                self.remove_link(node_id, neighbor_id)
+
+    def flood(self):
+        """Deliver queued LSAs round by round until every LSDB is up to date."""
+        self.round_stats = []
+        while self._outbox:
+            outbox, self._outbox = self._outbox, []
+            installed = 0
+            for sender, receiver_id, lsa in outbox:
+                receiver = self.nodes.get(receiver_id)
+                if receiver is None or sender not in receiver.neighbors:
+                    continue  # Link went down while the LSA was queued
+                if receiver.install(lsa):
+                    installed += 1
+                    self._outbox.extend((receiver_id, n, lsa) for n in receiver.neighbors if n != sender)
+            self.round_stats.append({'round': len(self.round_stats) + 1,
+                                     'messages': len(outbox), 'installed': installed})
+        return len(self.round_stats)
+
+    def converge(self, incremental=True):
+        """
+        Flood pending LSAs and recompute routes on routers whose LSDB changed.
+
+        Returns:
+            Dict with flood rounds, LSA messages, SPF runs and nodes settled
+        """
+        start = time.perf_counter()
+        rounds = self.flood()
+        for lsa in self.flushed.values():
+            # Routers the flush cannot reach (another partition) age the LSA out
+            for router in self.nodes.values():
+                router.install(lsa)
+        self.flushed = {}
+        stats = {'rounds': rounds, 'messages': sum(r['messages'] for r in self.round_stats),
+                 'spf_runs': 0, 'spf_settled': 0}
+        for router in self.nodes.values():
+            if not router.pending and router.dist:
+                continue
+            destinations, settled = router.incremental_spf() if incremental else router.full_spf()
+            router.refresh_routes(destinations)
+            stats['spf_runs'] += 1
+            stats['spf_settled'] += settled
+        self.stamp_changes()
+        stats['seconds'] = time.perf_counter() - start
+        self.spf_stats = stats
+        return stats
+
+
+def _dijkstra_distances(network, source):
+    dist = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        d, node_id = heapq.heappop(heap)
+        if d > dist[node_id]:
+            continue
+        for neighbor_id, cost in network.nodes[node_id].neighbors.items():
+            if d + cost < dist.get(neighbor_id, float('inf')):
+                dist[neighbor_id] = d + cost
+                heapq.heappush(heap, (d + cost, neighbor_id))
+    return dist
+
+
+def _same_distances(network, reference):
+    """True when every finite route of `network` matches the distance in `reference` tables."""
+    for node_id, router in network.nodes.items():
+        for dest_id, (_, distance) in router.routing_table.items():
+            if distance != reference[node_id].get(dest_id, float('inf')):
+                return False
+    return True
+
+
+def benchmark(n_nodes=500, avg_degree=4, events=50, seed=0, max_cost=1, verify=True):
+    """
+    Compare link-state and RIP convergence on the same random topology.
+
+    Measures the initial convergence and a series of random link failures,
+    recoveries and cost changes. RIP work is routing entries sent; link-state
+    work is LSA transmissions plus nodes settled by SPF, with incremental and
+    full SPF timed separately.
+
+    Returns:
+        Dict of per-engine totals
+    """
+    import contextlib
+    import io
+    import random
+
+    from rip_parallel import random_network
+    from rip_scenarios import apply_event, random_timeline
+
+    rip = random_network(n_nodes, avg_degree, seed, max_cost)
+    engines = {
+        'link_state_incremental': LinkStateNetwork.from_network(rip),
+        'link_state_full': LinkStateNetwork.from_network(rip)
+    }
+    timeline = random_timeline(rip, random.Random(seed), events)
+    rows = {name: {'seconds': 0.0, 'rounds': 0, 'messages': 0, 'spf_settled': 0, 'events': 0}
+            for name in ('rip',) + tuple(engines)}
+
+    def run_rip():
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            rip.simulate_rip(max_iterations=10000, verbose=False)
+            seconds = time.perf_counter() - start
+        row = rows['rip']
+        row['seconds'] += seconds
+        row['rounds'] += len(rip.round_stats)
+        row['messages'] += sum(r['entries_sent'] for r in rip.round_stats)
+
+    def run_link_state():
+        for name, network in engines.items():
+            stats = network.converge(incremental=name == 'link_state_incremental')
+            row = rows[name]
+            for key in ('seconds', 'rounds', 'messages', 'spf_settled'):
+                row[key] += stats[key]
+
+    rip.initialize_routing_tables()
+    run_rip()
+    run_link_state()
+    initial = {name: dict(row) for name, row in rows.items()}
+
+    mismatches = 0
+    original_costs = {}
+    for event in timeline:
+        for network in (rip,) + tuple(engines.values()):
+            apply_event(network, event, original_costs)
+        run_rip()
+        run_link_state()
+        for row in rows.values():
+            row['events'] += 1
+        if verify:
+            reference = {node_id: _dijkstra_distances(rip, node_id) for node_id in rip.nodes}
+            mismatches += sum(not _same_distances(network, reference) for network in engines.values())
+
+    report = {'nodes': n_nodes, 'initial': initial, 'total': rows}
+    if verify:
+        report['mismatches'] = mismatches
+    for name, row in rows.items():
+        first = initial[name]
+        print(f"{name:>24}: initial {first['seconds']:7.3f} s {first['rounds']:>4} rounds "
+              f"{first['messages']:>9} msgs | {events} events {row['seconds'] - first['seconds']:7.3f} s "
+              f"{row['rounds'] - first['rounds']:>5} rounds {row['messages'] - first['messages']:>9} msgs "
+              f"{row['spf_settled'] - first['spf_settled']:>9} settled")
+    if verify:
+        print(f"routes differing from Dijkstra: {mismatches}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare link-state and RIP convergence")
+    parser.add_argument('--nodes', type=int, default=500)
+    parser.add_argument('--degree', type=int, default=4)
+    parser.add_argument('--events', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-verify', action='store_true', help="Skip checking routes against Dijkstra")
+    args = parser.parse_args()
+    benchmark(args.nodes, args.degree, args.events, args.seed, verify=not args.no_verify)
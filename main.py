@@ -4,9 +4,9 @@ import time
 from playfair_cipher import encrypt, decrypt, display_matrix
 from rip_simulator import RIPNetwork, create_sample_network
 from tcp_reno_simulator import TCPRenoSimulator
-import matplotlib.pyplot as plt
 
-def simulate_network_transmission(plaintext, key, source_node, destination_node, packet_loss_rate=0.05):
+def simulate_network_transmission(plaintext, key, source_node, destination_node, packet_loss_rate=0.05,
+                                  seed=None):
     """
     Simulate a complete network transmission with encryption, routing, and transport.
     
@@ -16,6 +16,7 @@ def simulate_network_transmission(plaintext, key, source_node, destination_node,
         source_node: Source node ID
         destination_node: Destination node ID
         packet_loss_rate: Probability of packet loss during transmission
+        seed: Optional seed for the TCP loss RNG, making the run reproducible
         
     Returns:
         Dictionary with results of the simulation
@@ -69,7 +70,8 @@ def simulate_network_transmission(plaintext, key, source_node, destination_node,
         initial_cwnd=1,
         ssthresh=16,
         max_time=100,
-        packet_loss_rate=packet_loss_rate
+        packet_loss_rate=packet_loss_rate,
+        seed=seed
     )
     
     # Simulate the transmission
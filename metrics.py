@@ -0,0 +1,262 @@
+import bisect
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond cache hits to long simulations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            self.values[key] += amount
+
+    def _samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self):
+        lines = []
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labelnames + ('le',), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'dcn_request_duration_seconds', 'API request latency by endpoint.', ('endpoint', 'method'))
+REQUEST_COUNT = registry.counter(
+    'dcn_requests_total', 'API requests by endpoint and status code.', ('endpoint', 'method', 'status'))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    'dcn_requests_in_flight', 'API requests currently being handled.', ('endpoint',))
+STAGE_LATENCY = registry.histogram(
+    'dcn_stage_duration_seconds', 'Time spent in simulator and rendering stages.', ('stage',))
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a block of work under dcn_stage_duration_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+
+def timed(stage):
+    """Decorator form of stage_timer."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a single thread.
+
+    A background thread snapshots the target thread's stack every
+    `interval` seconds; the result is a collapsed-stack text (one
+    "frame;frame;frame count" line per unique stack) suitable for
+    flame graph tools.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def output(self):
+        lines = [f"{stack} {count}" for stack, count in
+                 sorted(self.stacks.items(), key=lambda item: -item[1])]
+        return '\n'.join(lines) + '\n'
+
+
+class ProfileStore:
+    """Bounded store of per-request profiler output, keyed by a server-generated profile id."""
+
+    def __init__(self, max_profiles=50):
+        self.max_profiles = max_profiles
+        self.profiles = OrderedDict()  # profile_id -> (kind, data, request_id)
+        self.lock = threading.Lock()
+
+    def start(self, mode):
+        """Start a profiler for the current thread; returns an opaque handle."""
+        if mode == 'sample':
+            profiler = SamplingProfiler(threading.get_ident())
+            profiler.start()
+            return ('sample', profiler)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return ('cprofile', profiler)
+
+    def finish(self, profile_id, handle, request_id=None):
+        kind, profiler = handle
+        if kind == 'sample':
+            profiler.stop()
+            data = profiler.output()
+        else:
+            profiler.disable()
+            data = profiler
+        with self.lock:
+            self.profiles[profile_id] = (kind, data, request_id)
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+
+    def get(self, profile_id, fmt='text'):
+        """Return (body, mimetype, filename) for a stored profile, or None."""
+        with self.lock:
+            entry = self.profiles.get(profile_id)
+        if entry is None:
+            return None
+        kind, data, _ = entry
+        if kind == 'sample':
+            return data, 'text/plain', f"{profile_id}.collapsed.txt"
+        if fmt == 'pstats':
+            # Binary pstats dump loadable with pstats.Stats(path)
+            data.create_stats()
+            return marshal.dumps(data.stats), 'application/octet-stream', f"{profile_id}.prof"
+        stream = io.StringIO()
+        pstats.Stats(data, stream=stream).sort_stats('cumulative').print_stats(40)
+        return stream.getvalue(), 'text/plain', f"{profile_id}.txt"
+
+    def list(self):
+        with self.lock:
+            return [{"profile_id": profile_id, "request_id": request_id, "kind": kind}
+                    for profile_id, (kind, _, request_id) in self.profiles.items()]
+
+
+profile_store = ProfileStore()
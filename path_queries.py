@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+
+# Alternate-path queries over the current topology: k shortest loopless paths
+# (Yen's algorithm) and the equal-cost paths the routing tables can forward
+# along. Answers are cached per topology version.
+
+MAX_K = 32
+MAX_BATCH_PAIRS = 10000
+MAX_EQUAL_COST_PATHS = 64
+
+
+def shortest_path_tree(network, source):
+    """Dijkstra from `source` over link costs; returns (distance, parent) maps."""
+    nodes = network.nodes
+    distance = {source: 0}
+    parent = {source: None}
+    heap = [(0, 0, source)]
+    order = itertools.count(1)
+    done = set()
+    while heap:
+        dist, _, node_id = heapq.heappop(heap)
+        if node_id in done:
+            continue
+        done.add(node_id)
+        for neighbor_id, cost in nodes[node_id].neighbors.items():
+            candidate = dist + cost
+            if neighbor_id not in distance or candidate < distance[neighbor_id]:
+                distance[neighbor_id] = candidate
+                parent[neighbor_id] = node_id
+                heapq.heappush(heap, (candidate, next(order), neighbor_id))
+    return distance, parent
+
+
+def _tree_path(parent, target):
+    if target not in parent:
+        return None
+    path = [target]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    return path[::-1]
+
+
+def _spur_path(network, source, target, banned_nodes, banned_edges):
+    """Cheapest source -> target path avoiding some nodes and directed edges; (cost, path) or None."""
+    nodes = network.nodes
+    distance = {source: 0}
+    parent = {source: None}
+    heap = [(0, 0, source)]
+    order = itertools.count(1)
+    done = set()
+    while heap:
+        dist, _, node_id = heapq.heappop(heap)
+        if node_id in done:
+            continue
+        if node_id == target:
+            return dist, _tree_path(parent, target)
+        done.add(node_id)
+        for neighbor_id, cost in nodes[node_id].neighbors.items():
+            if neighbor_id in banned_nodes or (node_id, neighbor_id) in banned_edges:
+                continue
+            candidate = dist + cost
+            if neighbor_id not in distance or candidate < distance[neighbor_id]:
+                distance[neighbor_id] = candidate
+                parent[neighbor_id] = node_id
+                heapq.heappush(heap, (candidate, next(order), neighbor_id))
+    return None
+
+
+def k_shortest_paths(network, source, target, k, first=None):
+    """
+    Up to k loopless source -> target paths in order of cost (Yen's algorithm).
+
+    Each accepted path is varied at every node along it: the prefix up to
+    that node is kept, the edges that earlier paths with the same prefix
+    took next are excluded along with the prefix nodes, and the cheapest
+    remaining continuation becomes a candidate.
+
+    Args:
+        network: RIPNetwork (or any network with nodes[...].neighbors costs)
+        first: Shortest path, when already known (e.g. from a shared tree)
+
+    Returns:
+        List of (cost, path)
+    """
+    if first is None:
+        found = _spur_path(network, source, target, set(), set())
+        if found is None:
+            return []
+        first = found[1]
+    nodes = network.nodes
+    accepted = [(network.get_path_cost(first), first)]
+    seen = {tuple(first)}
+    candidates = []
+    order = itertools.count()
+
+    while len(accepted) < k:
+        _, previous = accepted[-1]
+        root_cost = 0
+        for j in range(len(previous) - 1):
+            spur = previous[j]
+            root = previous[:j + 1]
+            banned_edges = {(path[j], path[j + 1]) for _, path in accepted
+                            if len(path) > j + 1 and path[:j + 1] == root}
+            found = _spur_path(network, spur, target, set(root[:-1]), banned_edges)
+            if found is not None:
+                path = root[:-1] + found[1]
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(candidates, (root_cost + found[0], len(path), next(order), path))
+            root_cost += nodes[spur].neighbors[previous[j + 1]]
+        if not candidates:
+            break
+        cost, _, _, path = heapq.heappop(candidates)
+        accepted.append((cost, path))
+    return accepted
+
+
+def equal_cost_paths(network, source, target, limit=MAX_EQUAL_COST_PATHS):
+    """
+    Paths the converged routing tables can forward along, following every
+    equal-cost next hop (at most `limit` of them, depth first).
+    """
+    if source not in network.nodes or target not in network.nodes:
+        return []
+    paths = []
+    stack = [[source]]
+    while stack and len(paths) < limit:
+        path = stack.pop()
+        current = path[-1]
+        if current == target:
+            paths.append(path)
+            continue
+        for next_hop in reversed(network.get_next_hops(current, target)):
+            if next_hop != current and next_hop in network.nodes and next_hop not in path:
+                stack.append(path + [next_hop])
+    return paths
+
+
+class PathQueryCache:
+    """
+    LRU of path query answers for one topology version.
+
+    Keys carry the network's epoch and version; a query against a newer
+    version drops everything cached for the old one.
+    """
+
+    def __init__(self, max_entries=20000):
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.stamp = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, stamp, key):
+        with self.lock:
+            if stamp != self.stamp:
+                self.entries.clear()
+                self.stamp = stamp
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, stamp, key, value):
+        with self.lock:
+            if stamp != self.stamp:
+                return  # The topology moved on while this was computed
+            self.entries[key] = value
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+def batch_k_shortest_paths(network, pairs, k, cache=None):
+    """
+    Answer k-shortest-path queries for many (source, destination) pairs.
+
+    Pairs are grouped by source so one shortest-path tree per source
+    supplies the first path of all its queries; repeated pairs and pairs
+    already answered for this topology version come from `cache`.
+
+    Returns:
+        List of {source, destination, paths: [{path, cost}], cached}
+    """
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+    if len(pairs) > MAX_BATCH_PAIRS:
+        raise ValueError(f"At most {MAX_BATCH_PAIRS} pairs per request")
+    unknown = sorted({str(node_id) for pair in pairs for node_id in pair if node_id not in network.nodes})
+    if unknown:
+        raise ValueError(f"Unknown nodes: {', '.join(unknown)}")
+
+    stamp = (network.epoch, network.version)
+    results = [None] * len(pairs)
+    by_source = {}
+    for i, (source, target) in enumerate(pairs):
+        cached = cache.get(stamp, (source, target, k)) if cache is not None else None
+        if cached is not None:
+            results[i] = {"source": source, "destination": target, "paths": cached, "cached": True}
+        else:
+            by_source.setdefault(source, {}).setdefault(target, []).append(i)
+
+    for source, targets in by_source.items():
+        _, parent = shortest_path_tree(network, source)
+        for target, positions in targets.items():
+            first = _tree_path(parent, target)
+            paths = [] if first is None else [
+                {"path": path, "cost": cost}
+                for cost, path in k_shortest_paths(network, source, target, k, first)
+            ]
+            if cache is not None:
+                cache.put(stamp, (source, target, k), paths)
+            for i in positions:
+                results[i] = {"source": source, "destination": target, "paths": paths, "cached": False}
+    return results
@@ -1,3 +1,7 @@
+from functools import lru_cache
+
+from metrics import timed
+
 def prepare_key(key):
     """
     Prepare the key for Playfair cipher by removing duplicates and creating the 5x5 matrix.
@@ -58,56 +62,165 @@ def prepare_text(text):
     
     return result
 
-def encrypt(plaintext, key):
-    """Encrypt using Playfair cipher."""
-    matrix = prepare_key(key)
-    digraphs = prepare_text(plaintext)
+# Bytes path. Normalization, digraph formation and substitution are NumPy
+# array operations; the str functions above and encrypt/decrypt below keep
+# their exact behaviour and delegate to this path for ASCII text.
+_X = ord('X')
+
+
+@lru_cache(maxsize=1)
+def _normalize_table():
+    """Byte translation table: letters to uppercase with J folded into I, everything else to 0."""
+    import numpy as np
+    table = np.zeros(256, dtype=np.uint8)
+    upper = np.arange(ord('A'), ord('Z') + 1, dtype=np.uint8)
+    table[upper] = upper
+    table[upper + 32] = upper
+    table[[ord('J'), ord('j')]] = ord('I')
+    return table
+
+
+@lru_cache(maxsize=64)
+def _substitution_table(key, inverse):
+    """
+    Ciphertext (or plaintext, when `inverse`) bytes for every byte pair a*256+b.
+
+    Bytes outside the key square get the (-1, -1) position find_position
+    reports, so arbitrary input decrypts exactly like the str path.
+    """
+    import numpy as np
+    matrix = np.array([[ord(char) for char in row] for row in prepare_key(key)], dtype=np.uint8)
+    row = np.full(256, -1, dtype=np.int64)
+    col = np.full(256, -1, dtype=np.int64)
+    row[matrix.ravel()] = np.repeat(np.arange(5), 5)
+    col[matrix.ravel()] = np.tile(np.arange(5), 5)
+    shift = -1 if inverse else 1
+
+    row_a, col_a = np.repeat(row, 256), np.repeat(col, 256)
+    row_b, col_b = np.tile(row, 256), np.tile(col, 256)
+    same_row = row_a == row_b
+    same_col = (col_a == col_b) & ~same_row
+    first = np.where(same_row, matrix[row_a, (col_a + shift) % 5],
+                     np.where(same_col, matrix[(row_a + shift) % 5, col_a], matrix[row_a, col_b]))
+    second = np.where(same_row, matrix[row_b, (col_b + shift) % 5],
+                      np.where(same_col, matrix[(row_b + shift) % 5, col_b], matrix[row_b, col_a]))
+    table = np.stack((first, second), axis=1)
+    table.flags.writeable = False
+    return table
+
+
+def normalize_bytes(data):
+    """Uppercase letters of a bytes-like object with J folded into I and all other bytes removed."""
+    import numpy as np
+    mapped = _normalize_table()[np.frombuffer(data, dtype=np.uint8)]
+    return mapped[mapped != 0]
+
+
+def digraph_bytes(letters):
+    """
+    Split normalized letters into digraphs, as prepare_text does, without a Python loop.
+
+    The second of two equal letters always starts a new digraph (the first
+    one is paired with an X); between those positions digraphs start every
+    two letters, and a run of odd length ends with an X.
+
+    Returns:
+        (first, second) uint8 arrays
+    """
+    import numpy as np
+    n = len(letters)
+    if n == 0:
+        return letters[:0], letters[:0]
+    anchors = np.concatenate(([0], np.flatnonzero(letters[1:] == letters[:-1]) + 1))
+    ends = np.append(anchors[1:], n)
+    counts = (ends - anchors + 1) // 2
+    first_pair = np.cumsum(counts) - counts
+    run = np.repeat(np.arange(len(anchors)), counts)
+    starts = anchors[run] + 2 * (np.arange(int(counts.sum())) - first_pair[run])
+    follows = starts + 1 < ends[run]
+    second = np.where(follows, letters[np.minimum(starts + 1, n - 1)], _X).astype(np.uint8)
+    return letters[starts], second
+
+
+def _substitute(first, second, key, inverse, out):
+    import numpy as np
+    count = len(first)
+    if out is None:
+        out = np.empty(2 * count, dtype=np.uint8)
+    else:
+        out = np.frombuffer(out, dtype=np.uint8)[:2 * count]
+        if len(out) < 2 * count:
+            raise ValueError(f"Output buffer needs {2 * count} bytes")
+    codes = first.astype(np.intp) * 256 + second
+    np.take(_substitution_table(key, inverse), codes, axis=0, out=out.reshape(count, 2))
+    return out
+
+
+def encrypt_bytes(data, key, out=None):
+    """
+    Encrypt a bytes-like object (bytes, memoryview, uint8 array) with Playfair.
+
+    Args:
+        data: Plaintext bytes; non-letters are dropped as in prepare_text
+        key: Cipher key
+        out: Optional writable buffer to receive the ciphertext
+
+    Returns:
+        uint8 array of ciphertext (a view of `out` when given)
+    """
+    first, second = digraph_bytes(normalize_bytes(data))
+    return _substitute(first, second, key, False, out)
+
+
+def decrypt_bytes(data, key, out=None):
+    """Decrypt a bytes-like object with Playfair; a trailing odd byte is ignored like in decrypt()."""
+    import numpy as np
+    pairs = np.frombuffer(data, dtype=np.uint8)
+    pairs = pairs[:len(pairs) - len(pairs) % 2]
+    return _substitute(pairs[0::2], pairs[1::2], key, True, out)
+
+
+def _apply_digraphs(matrix, digraphs, shift):
     result = []
-    
+
     for pair in digraphs:
+        if len(pair) < 2:  # Handle odd length (shouldn't happen in proper Playfair)
+            continue
+
         a, b = pair[0], pair[1]
         row_a, col_a = find_position(matrix, a)
         row_b, col_b = find_position(matrix, b)
-        
+
         # Same row
         if row_a == row_b:
-            result.append(matrix[row_a][(col_a + 1) % 5] + matrix[row_b][(col_b + 1) % 5])
+            result.append(matrix[row_a][(col_a + shift) % 5] + matrix[row_b][(col_b + shift) % 5])
         # Same column
         elif col_a == col_b:
-            result.append(matrix[(row_a + 1) % 5][col_a] + matrix[(row_b + 1) % 5][col_b])
+            result.append(matrix[(row_a + shift) % 5][col_a] + matrix[(row_b + shift) % 5][col_b])
         # Rectangle
         else:
             result.append(matrix[row_a][col_b] + matrix[row_b][col_a])
-    
+
     return ''.join(result)
 
+@timed('playfair_encrypt')
+def encrypt(plaintext, key):
+    """Encrypt using Playfair cipher."""
+    if not plaintext.isascii():
+        plaintext = ''.join(char for char in plaintext.upper() if char.isalpha())
+        if not plaintext.isascii():
+            # Non-ASCII letters pass prepare_text's isalpha() filter; keep the character path for them
+            return _apply_digraphs(prepare_key(key), prepare_text(plaintext), 1)
+    return encrypt_bytes(plaintext.encode('ascii'), key).tobytes().decode('ascii')
+
+@timed('playfair_decrypt')
 def decrypt(ciphertext, key):
     """Decrypt using Playfair cipher."""
-    matrix = prepare_key(key)
-    
+    if ciphertext.isascii():
+        return decrypt_bytes(ciphertext.encode('ascii'), key).tobytes().decode('ascii')
     # Split ciphertext into digraphs
     digraphs = [ciphertext[i:i+2] for i in range(0, len(ciphertext), 2)]
-    result = []
-    
-    for pair in digraphs:
-        if len(pair) < 2:  # Handle odd length (shouldn't happen in proper Playfair)
-            continue
-            
-        a, b = pair[0], pair[1]
-        row_a, col_a = find_position(matrix, a)
-        row_b, col_b = find_position(matrix, b)
-        
-        # Same row
-        if row_a == row_b:
-            result.append(matrix[row_a][(col_a - 1) % 5] + matrix[row_b][(col_b - 1) % 5])
-        # Same column
-        elif col_a == col_b:
-            result.append(matrix[(row_a - 1) % 5][col_a] + matrix[(row_b - 1) % 5][col_b])
-        # Rectangle
-        else:
-            result.append(matrix[row_a][col_b] + matrix[row_b][col_a])
-    
-    return ''.join(result)
+    return _apply_digraphs(prepare_key(key), digraphs, -1)
 
 def display_matrix(key):
     """Display the 5x5 matrix for the given key."""
@@ -0,0 +1,423 @@
+import math
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from playfair_cipher import prepare_key, prepare_text
+
+# Ciphertext-only key recovery for the Playfair layer: simulated annealing
+# over 5x5 key squares, scored with English n-gram log-probabilities.
+
+ALPHABET = "ABCDEFGHIKLMNOPQRSTUVWXYZ"
+
+# Quadgram counts shipped with the app; DCN_NGRAM_CORPUS names a plain-text
+# file to count n-grams from instead
+NGRAM_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'english_quadgrams.txt')
+NGRAM_CORPUS = os.environ.get('DCN_NGRAM_CORPUS')
+NGRAM_ORDER = 4
+
+# One process pool serves every key-recovery job; at most CRACK_JOBS jobs run
+# at once and the rest wait for a slot
+CRACK_WORKERS = int(os.environ.get('DCN_CRACK_WORKERS', os.cpu_count() or 1))
+CRACK_JOBS = int(os.environ.get('DCN_CRACK_JOBS', 4))
+
+_LETTERS = bytes(range(ord('A'), ord('Z') + 1))
+_TO_INDEX = bytes.maketrans(_LETTERS, bytes(ALPHABET.index(c if c != 'J' else 'I') for c in _LETTERS.decode()))
+_NON_LETTERS = bytes(b for b in range(256) if b not in _LETTERS)
+
+_model = None
+_INDICES = np.arange(25)
+
+
+def to_indices(text):
+    """Uppercase, fold J into I, drop everything else and map letters to 0..24."""
+    data = text.upper().encode('ascii', 'ignore')
+    return np.frombuffer(data.translate(_TO_INDEX, _NON_LETTERS), dtype=np.uint8).astype(np.int64)
+
+
+class NgramModel:
+    """Log10 n-gram probabilities over the 25-letter Playfair alphabet."""
+
+    def __init__(self, counts, n=NGRAM_ORDER):
+        self.n = n
+        counts = np.asarray(counts, dtype=np.float64)
+        total = counts.sum()
+        floor = math.log10(0.01 / total)  # Unseen n-grams
+        self.table = np.where(counts > 0, np.log10(np.maximum(counts, 1) / total), floor)
+        self.baseline = float((counts * self.table).sum() / total)  # Mean score per n-gram of English
+
+    @classmethod
+    def from_letters(cls, letters, n=NGRAM_ORDER):
+        codes = np.zeros(len(letters) - n + 1, dtype=np.int64)
+        for k in range(n):
+            codes = codes * 25 + letters[k:len(letters) - n + 1 + k]
+        return cls(np.bincount(codes, minlength=25 ** n), n)
+
+    @classmethod
+    def from_table(cls, path):
+        """Load `NGRAM count` lines (comments start with #)."""
+        grams = []
+        with open(path, encoding='ascii') as f:
+            for line in f:
+                if line.strip() and not line.startswith('#'):
+                    gram, count = line.split()
+                    grams.append((gram, int(count)))
+        n = len(grams[0][0])
+        counts = np.zeros(25 ** n, dtype=np.int64)
+        for gram, count in grams:
+            code = 0
+            for letter in gram:
+                code = code * 25 + ALPHABET.index(letter)
+            counts[code] = count
+        return cls(counts, n)
+
+    def codes(self, text_indices):
+        n = self.n
+        codes = text_indices[:len(text_indices) - n + 1].copy()
+        for k in range(1, n):
+            codes = codes * 25 + text_indices[k:len(text_indices) - n + 1 + k]
+        return codes
+
+    def score(self, text_indices):
+        return float(self.table[self.codes(text_indices)].sum())
+
+
+def get_model():
+    """Load (once per process) the shipped n-gram table or the configured corpus."""
+    global _model
+    if _model is None:
+        if NGRAM_CORPUS:
+            with open(NGRAM_CORPUS, encoding='utf-8', errors='ignore') as f:
+                _model = NgramModel.from_letters(to_indices(f.read()))
+        else:
+            _model = NgramModel.from_table(NGRAM_TABLE)
+    return _model
+
+
+# Playfair decryption only depends on where the two letters sit in the
+# square, so the plaintext cells for every pair of ciphertext cells are fixed.
+# Decrypting a whole ciphertext under a candidate key is then pure index
+# arithmetic: invert the key, look up both cells of every digraph, map the
+# resulting cells back through the key.
+def _cell_table():
+    pa, pb = np.divmod(np.arange(625), 25)
+    ra, ca, rb, cb = pa // 5, pa % 5, pb // 5, pb % 5
+    same_row = ra == rb
+    same_col = (ca == cb) & ~same_row
+    # Rectangle by default, then the same-row and same-column shifts
+    na = np.where(same_row, ra * 5 + (ca - 1) % 5, np.where(same_col, ((ra - 1) % 5) * 5 + ca, ra * 5 + cb))
+    nb = np.where(same_row, rb * 5 + (cb - 1) % 5, np.where(same_col, ((rb - 1) % 5) * 5 + cb, rb * 5 + ca))
+    return np.stack((na, nb), axis=1)
+
+
+_DECRYPT_CELLS = _cell_table()
+
+
+def decrypt_letters(square, first, second):
+    """Decrypt digraphs given as letter-index arrays under a key square; returns letter indices."""
+    position = np.empty(25, dtype=np.int64)
+    position[square] = _INDICES
+    return square[_DECRYPT_CELLS[position[first] * 25 + position[second]]].ravel()
+
+
+def square_to_string(square):
+    return ''.join(ALPHABET[i] for i in square)
+
+
+def key_square(key):
+    """Key square (letter indices, row-major) for a keyword, as built by prepare_key."""
+    return np.array([ALPHABET.index(c) for row in prepare_key(key) for c in row], dtype=np.int64)
+
+
+def _mutate(square, rng):
+    """Neighbouring key: mostly a letter swap, sometimes a row/column shuffle or reflection."""
+    candidate = square.copy()
+    grid = candidate.reshape(5, 5)
+    roll = rng.random()
+    if roll < 0.9:
+        i, j = rng.sample(range(25), 2)
+        candidate[i], candidate[j] = candidate[j], candidate[i]
+    elif roll < 0.92:
+        i, j = rng.sample(range(5), 2)
+        grid[[i, j]] = grid[[j, i]]
+    elif roll < 0.94:
+        i, j = rng.sample(range(5), 2)
+        grid[:, [i, j]] = grid[:, [j, i]]
+    elif roll < 0.96:
+        grid[:] = grid[::-1]
+    elif roll < 0.98:
+        grid[:] = grid[:, ::-1]
+    else:
+        candidate[:] = candidate[::-1]
+    return candidate
+
+
+_counters = None  # Keys tried, one shared counter per job slot
+_stops = None  # Per-slot flag that ends a job's restarts early (cancelled or key found)
+
+
+def _init_worker(counters, stops):
+    global _counters, _stops
+    _counters, _stops = counters, stops
+    get_model()
+
+
+def anneal(digraphs, iterations, seed, temperature=None, expected=None, slot=None,
+           report_every=1000):
+    """
+    One simulated-annealing restart from a random key square.
+
+    The temperature falls linearly to zero over `iterations` candidate keys.
+    When `expected` plaintext indices are given, the run stops as soon as the
+    best key reproduces them. In a pool worker, `slot` selects the job's
+    progress counter and stop flag.
+
+    Returns:
+        Dict with score, key square, plaintext, keys tried, elapsed and broken
+    """
+    model = get_model()
+    rng = random.Random(seed)
+    square = np.array(rng.sample(range(25), 25), dtype=np.int64)
+    plain = decrypt_letters(square, *digraphs)
+    score = model.score(plain)
+    best_square, best_score, best_plain = square, score, plain
+    ngrams = max(1, len(plain) - model.n + 1)
+    if temperature is None:
+        temperature = max(5.0, 0.04 * ngrams)  # Scores are sums over n-grams, so scale with length
+    start = time.perf_counter()
+    broken = False
+    tried = 0
+
+    for iteration in range(iterations):
+        t = temperature * (1 - iteration / iterations)
+        candidate = _mutate(square, rng)
+        plain = decrypt_letters(candidate, *digraphs)
+        candidate_score = model.score(plain)
+        delta = candidate_score - score
+        if delta >= 0 or (t > 0 and rng.random() < math.exp(delta / t)):
+            square, score = candidate, candidate_score
+            if score > best_score:
+                best_square, best_score, best_plain = square, score, plain
+        tried += 1
+        if tried == report_every:
+            if slot is not None:
+                with _counters.get_lock():
+                    _counters[slot] += tried
+            tried = 0
+            if expected is not None and np.array_equal(best_plain[:len(expected)], expected):
+                broken = True
+                break
+            if slot is not None and _stops[slot]:
+                break
+    if slot is not None and tried:
+        with _counters.get_lock():
+            _counters[slot] += tried
+    if expected is not None and np.array_equal(best_plain[:len(expected)], expected):
+        broken = True
+
+    return {
+        "score": best_score,
+        "score_per_ngram": best_score / ngrams,
+        "key_square": square_to_string(best_square),
+        "plaintext": ''.join(ALPHABET[i] for i in best_plain),
+        "elapsed": time.perf_counter() - start,
+        "broken": broken
+    }
+
+
+def prepare_ciphertext(ciphertext):
+    """Split a ciphertext into first and second letter-index arrays of its digraphs."""
+    letters = to_indices(ciphertext)
+    if len(letters) < 2 * NGRAM_ORDER:
+        raise ValueError("Ciphertext is too short to analyze")
+    if len(letters) % 2:
+        letters = letters[:-1]
+    return letters[0::2].copy(), letters[1::2].copy()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_spawn = multiprocessing.get_context('spawn')  # Never fork the threaded server
+_job_counters = _spawn.Array('q', CRACK_JOBS)
+_job_stops = _spawn.Array('b', CRACK_JOBS)
+_free_slots = queue.Queue()
+for _slot in range(CRACK_JOBS):
+    _free_slots.put(_slot)
+
+
+def get_pool():
+    """Shared worker pool for every crack job, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=CRACK_WORKERS, mp_context=_spawn,
+                                        initializer=_init_worker,
+                                        initargs=(_job_counters, _job_stops))
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class CrackJob:
+    """Background key-recovery run with live progress."""
+
+    def __init__(self, ciphertext, restarts=8, iterations=400000, workers=None,
+                 known_plaintext=None, seed=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.digraphs = prepare_ciphertext(ciphertext)
+        self.restarts = restarts
+        self.iterations = iterations
+        # Restarts of this job in flight at once on the shared pool
+        self.workers = min(workers or CRACK_WORKERS, CRACK_WORKERS)
+        self.seed = random.randrange(2 ** 31) if seed is None else seed
+        self.expected = None
+        if known_plaintext:
+            # Benchmark mode: compare against the padded plaintext encrypt() would produce
+            self.expected = to_indices(''.join(prepare_text(known_plaintext)))
+        self.status = 'queued'
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.time_to_break = None
+        self.restarts_done = 0
+        self.best = None
+        self.keys = 0
+        self.slot = None
+
+    def run(self):
+        slot = _free_slots.get()  # Wait for one of the CRACK_JOBS slots
+        _job_counters[slot] = 0
+        _job_stops[slot] = 0
+        self.slot = slot
+        pool = None
+        try:
+            if self.status != 'queued':
+                return
+            self.status = 'running'
+            self.started = time.perf_counter()
+            pool = get_pool()
+            seeds = iter(range(self.seed, self.seed + self.restarts))
+            pending = set()
+            plaintexts = set()
+            while True:
+                if not _job_stops[slot]:
+                    for seed in seeds:
+                        pending.add(pool.submit(anneal, self.digraphs, self.iterations, seed,
+                                                None, self.expected, slot))
+                        if len(pending) >= self.workers:
+                            break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    result = future.result()
+                    self.restarts_done += 1
+                    if self.best is None or result['score'] > self.best['score']:
+                        self.best = result
+                    # Two independent restarts agreeing is strong evidence of the key
+                    agreed = result['plaintext'] in plaintexts
+                    plaintexts.add(result['plaintext'])
+                    if (result['broken'] or agreed) and self.time_to_break is None:
+                        self.time_to_break = time.perf_counter() - self.started
+                        _job_stops[slot] = 1
+                if _job_stops[slot]:
+                    for future in pending:
+                        future.cancel()
+            if self.status == 'running':
+                self.status = 'broken' if self.time_to_break is not None else 'completed'
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and pool is not None:
+                _discard_pool(pool)
+            self.status = 'failed'
+            self.error = str(e)
+        finally:
+            self.keys = _job_counters[slot]
+            self.slot = None
+            self.finished = time.perf_counter()
+            _free_slots.put(slot)
+
+    def cancel(self):
+        if self.status in ('queued', 'running'):
+            self.status = 'cancelled'
+            slot = self.slot
+            if slot is not None:
+                _job_stops[slot] = 1
+
+    def progress(self):
+        elapsed = 0.0
+        if self.started is not None:
+            elapsed = (self.finished or time.perf_counter()) - self.started
+        slot = self.slot
+        keys = _job_counters[slot] if slot is not None else self.keys
+        report = {
+            "job_id": self.id,
+            "status": self.status,
+            "restarts": self.restarts,
+            "restarts_done": self.restarts_done,
+            "iterations_per_restart": self.iterations,
+            "keys_tried": keys,
+            "keys_per_second": keys / elapsed if elapsed else 0.0,
+            "progress": min(1.0, keys / float(self.restarts * self.iterations)),
+            "elapsed": elapsed,
+            "time_to_break": self.time_to_break,
+            "english_score_per_ngram": get_model().baseline
+        }
+        if self.best is not None:
+            report.update(
+                key_square=self.best['key_square'],
+                plaintext=self.best['plaintext'],
+                score_per_ngram=self.best['score_per_ngram']
+            )
+        if self.error:
+            report['error'] = self.error
+        return report
+
+
+class CrackJobRegistry:
+    """Keeps the most recent key-recovery jobs of this process."""
+
+    def __init__(self, max_jobs=50):
+        self.jobs = OrderedDict()
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+
+    def submit(self, ciphertext, **params):
+        job = CrackJob(ciphertext, **params)
+        with self.lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.max_jobs:
+                _, old = self.jobs.popitem(last=False)
+                old.cancel()
+        threading.Thread(target=job.run, daemon=True, name=f"crack-{job.id}").start()
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+
+crack_jobs = CrackJobRegistry()
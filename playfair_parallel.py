@@ -0,0 +1,204 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from playfair_cipher import encrypt, decrypt, encrypt_bytes, decrypt_bytes, normalize_bytes
+
+# Multi-process Playfair for large inputs. The normalized text is copied once
+# into a shared input buffer and cut at positions where the serial digraph
+# parse is guaranteed to start a pair, so every chunk encrypts exactly as it
+# would inside the whole text. Each chunk's output offset is known up front,
+# and workers write their ciphertext straight into a shared output buffer.
+
+PARALLEL_MIN_BYTES = int(os.environ.get('DCN_PLAYFAIR_PARALLEL_MIN_BYTES', 1 << 20))
+CHUNK_BYTES = 1 << 20
+
+_state = {}  # Per-process view of the shared buffers
+
+
+def normalize_text(text):
+    """
+    Letters of `text` exactly as prepare_text sees them before pairing, as a
+    uint8 array; None when a letter outside ASCII survives normalization.
+    """
+    if not text.isascii():
+        text = ''.join(char for char in text.upper() if char.isalpha())
+        if not text.isascii():
+            return None
+    return normalize_bytes(text.encode('ascii'))
+
+
+def digraph_chunks(data, chunk_bytes=CHUNK_BYTES):
+    """
+    Cut normalized text into chunks that each begin a digraph of the serial parse.
+
+    A position holding the second of two equal letters always starts a pair
+    (either the first letter was paired with an inserted X, or it closed the
+    previous pair). Between two such anchors there is no X insertion, so
+    pairs start every two letters from the last anchor.
+
+    Args:
+        data: uint8 array of normalized text
+        chunk_bytes: Approximate chunk length
+
+    Returns:
+        List of (start, end, output_offset, output_length)
+    """
+    n = len(data)
+    anchors = np.concatenate(([0], np.flatnonzero(data[1:] == data[:-1]) + 1))
+    bounds = [0]
+    target = chunk_bytes
+    while target < n:
+        anchor = int(anchors[np.searchsorted(anchors, target, side='right') - 1])
+        start = anchor + (target - anchor + 1) // 2 * 2
+        if start >= n:
+            break
+        bounds.append(start)
+        target = start + chunk_bytes
+    bounds.append(n)
+
+    chunks = []
+    offset = 0
+    for start, end in zip(bounds, bounds[1:]):
+        # A run of length L between anchors (or up to the end) yields ceil(L / 2) pairs
+        inner = anchors[(anchors > start) & (anchors < end)]
+        runs = np.diff(np.concatenate(([start], inner, [end])))
+        length = 2 * int(((runs + 1) // 2).sum())
+        chunks.append((start, end, offset, length))
+        offset += length
+    return chunks
+
+
+def _attach(names):
+    """Pool initializer: map the shared input and output buffers into this worker."""
+    _state['blocks'] = [shared_memory.SharedMemory(name=name) for name in names]
+
+
+def _run_chunk(task):
+    start, end, offset, length, key, mode = task
+    source, target = _state['blocks']
+    # Read the chunk and write its ciphertext in place, without intermediate strings
+    transform = encrypt_bytes if mode == 'encrypt' else decrypt_bytes
+    written = len(transform(source.buf[start:end], key, out=target.buf[offset:offset + length]))
+    if written != length:
+        raise RuntimeError(f"Chunk {start}-{end} produced {written} bytes, expected {length}")
+    return length
+
+
+def _run_parallel(data, chunks, key, mode, workers):
+    total = chunks[-1][2] + chunks[-1][3] if chunks else 0
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, size)) for size in (len(data), total)]
+    pool = None
+    try:
+        blocks[0].buf[:len(data)] = data
+        names = [block.name for block in blocks]
+        tasks = [chunk + (key, mode) for chunk in chunks]
+        if workers > 1 and len(chunks) > 1:
+            pool = Pool(min(workers, len(chunks)), initializer=_attach, initargs=(names,))
+            for _ in pool.imap_unordered(_run_chunk, tasks):
+                pass
+        else:
+            _attach(names)
+            for task in tasks:
+                _run_chunk(task)
+        return bytes(blocks[1].buf[:total]).decode('ascii')
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _state.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def parallel_encrypt(plaintext, key, workers=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Encrypt like playfair_cipher.encrypt, spreading digraph-aligned chunks over processes.
+
+    Inputs smaller than PARALLEL_MIN_BYTES, or whose letters are not all
+    ASCII, go through the serial function. The output is identical to
+    encrypt(plaintext, key).
+    """
+    workers = workers or os.cpu_count() or 1
+    data = normalize_text(plaintext)
+    if data is None or len(data) < PARALLEL_MIN_BYTES:
+        return encrypt(plaintext, key)
+    return _run_parallel(data, digraph_chunks(data, chunk_bytes), key, 'encrypt', workers)
+
+
+def parallel_decrypt(ciphertext, key, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Decrypt like playfair_cipher.decrypt; ciphertext digraphs are fixed pairs, so chunks cut at even offsets."""
+    workers = workers or os.cpu_count() or 1
+    if len(ciphertext) < PARALLEL_MIN_BYTES or not ciphertext.isascii():
+        return decrypt(ciphertext, key)
+    data = np.frombuffer(ciphertext.encode('ascii'), dtype=np.uint8)
+    usable = len(data) - len(data) % 2  # The serial path drops a trailing odd letter
+    step = max(2, chunk_bytes - chunk_bytes % 2)
+    chunks = [(start, min(start + step, usable), start, min(step, usable - start))
+              for start in range(0, usable, step)]
+    return _run_parallel(data[:usable], chunks, key, 'decrypt', workers)
+
+
+def sample_text(size_bytes, seed=0):
+    """English-like benchmark input: stdlib documentation prose repeated to size."""
+    from pydoc_data.topics import topics
+    corpus = ' '.join(topics[name] for name in sorted(topics)).encode('ascii', 'ignore').decode('ascii')
+    start = seed % len(corpus)
+    repeats = size_bytes // len(corpus) + 2
+    return (corpus * repeats)[start:start + size_bytes]
+
+
+def benchmark(size_mb=4, worker_counts=(1, 2, 4, 8), key="NETWORK", verify=True):
+    """
+    Compare serial and parallel encryption/decryption throughput on one input.
+
+    Returns:
+        List of dicts with mode, workers, seconds, mb_per_second and identical
+    """
+    plaintext = sample_text(int(size_mb * (1 << 20)))
+    megabytes = len(plaintext) / (1 << 20)
+    rows = []
+
+    start = time.perf_counter()
+    reference = encrypt(plaintext, key)
+    seconds = time.perf_counter() - start
+    rows.append({'mode': 'encrypt', 'workers': 'serial', 'seconds': seconds,
+                 'mb_per_second': megabytes / seconds, 'identical': True})
+    start = time.perf_counter()
+    reference_plain = decrypt(reference, key)
+    seconds = time.perf_counter() - start
+    rows.append({'mode': 'decrypt', 'workers': 'serial', 'seconds': seconds,
+                 'mb_per_second': len(reference) / (1 << 20) / seconds, 'identical': True})
+
+    for workers in worker_counts:
+        start = time.perf_counter()
+        ciphertext = parallel_encrypt(plaintext, key, workers)
+        seconds = time.perf_counter() - start
+        rows.append({'mode': 'encrypt', 'workers': workers, 'seconds': seconds,
+                     'mb_per_second': megabytes / seconds,
+                     'identical': ciphertext == reference if verify else None})
+        start = time.perf_counter()
+        recovered = parallel_decrypt(reference, key, workers)
+        seconds = time.perf_counter() - start
+        rows.append({'mode': 'decrypt', 'workers': workers, 'seconds': seconds,
+                     'mb_per_second': len(reference) / (1 << 20) / seconds,
+                     'identical': recovered == reference_plain if verify else None})
+
+    for row in rows:
+        print(f"{row['mode']:>7} {str(row['workers']):>6}: {row['seconds']:7.2f} s  "
+              f"{row['mb_per_second']:7.2f} MB/s  identical={row['identical']}")
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark multi-process Playfair encryption")
+    parser.add_argument('--size-mb', type=float, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--key', default="NETWORK")
+    parser.add_argument('--no-verify', action='store_true', help="Skip comparing against the serial output")
+    args = parser.parse_args()
+    benchmark(args.size_mb, tuple(args.workers), args.key, verify=not args.no_verify)
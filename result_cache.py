@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+# Modules whose source determines simulation output or how it is rendered
+_VERSIONED_MODULES = (
+    'app.py',
+    'main.py',
+    'playfair_cipher.py',
+    'result_cache.py',
+    'rip_simulator.py',
+    'tcp_long_horizon.py',
+    'tcp_reno_simulator.py',
+    'tcp_results.py',
+)
+
+# Libraries that render plots and encode result arrays
+_VERSIONED_PACKAGES = ('matplotlib', 'numpy')
+
+
+def compute_code_version(base_dir=None):
+    """Hash the simulator sources so cached results expire on code changes."""
+    base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in _VERSIONED_MODULES:
+        path = os.path.join(base_dir, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(name.encode())
+                digest.update(f.read())
+    for package in _VERSIONED_PACKAGES:
+        # Read from package metadata so the libraries are not imported here
+        try:
+            digest.update(f"{package}=={metadata.version(package)}".encode())
+        except metadata.PackageNotFoundError:
+            continue
+    return digest.hexdigest()[:12]
+
+
+CODE_VERSION = compute_code_version()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of rendered simulation responses.
+
+    Entries are keyed by a hash of (namespace, parameters, seed, code
+    version) and hold the final response body, so a hit skips simulation,
+    plotting and JSON encoding. A bounded in-memory LRU tier sits in front
+    of an optional on-disk tier with its own size limit.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024,
+                 disk_dir=None, disk_max_bytes=1024 * 1024 * 1024,
+                 code_version=CODE_VERSION):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.code_version = code_version
+        self.memory = OrderedDict()  # key -> (body, mimetype)
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.disk_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(disk_dir) if entry.is_file()
+            )
+
+    def make_key(self, namespace, params):
+        """Build the cache key for a parameter dict (must include the seed)."""
+        blob = json.dumps(
+            {"namespace": namespace, "params": params, "version": self.code_version},
+            sort_keys=True, separators=(',', ':'), default=str
+        )
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return (body, mimetype) or None."""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._disk_get(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._memory_put(key, entry)
+        return entry
+
+    def put(self, key, body, mimetype):
+        entry = (bytes(body), mimetype)
+        with self.lock:
+            self._memory_put(key, entry)
+        self._disk_put(key, entry)
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+        if self.disk_dir:
+            for entry in os.scandir(self.disk_dir):
+                if entry.is_file():
+                    os.remove(entry.path)
+            self.disk_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "code_version": self.code_version
+        }
+
+    def _memory_put(self, key, entry):
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous[0])
+        self.memory[key] = entry
+        self.memory_bytes += size
+        while len(self.memory) > self.max_entries or self.memory_bytes > self.max_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted[0])
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key)
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                mimetype = f.readline().decode('ascii').strip()
+                body = f.read()
+            os.utime(self._disk_path(key))  # Refresh recency for eviction
+            return body, mimetype
+        except OSError:
+            return None
+
+    def _disk_put(self, key, entry):
+        if not self.disk_dir:
+            return
+        body, mimetype = entry
+        size = len(body) + len(mimetype) + 1
+        if size > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(mimetype.encode('ascii') + b'\n')
+            f.write(body)
+        with self.lock:
+            # An overwritten entry no longer counts towards the disk tier
+            try:
+                self.disk_bytes -= os.stat(path).st_size
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self.disk_bytes += size
+            if self.disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop least recently used files until the disk tier fits its limit."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.disk_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        self.disk_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.disk_bytes <= self.disk_max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self.disk_bytes -= size
+            except OSError:
+                continue
@@ -0,0 +1,372 @@
+import argparse
+import os
+import random
+import time
+from collections import deque
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from rip_simulator import RIPNetwork
+
+# Partitioned RIP engine. Routing state lives in N x N distance / next-hop /
+# dirty matrices in shared memory, double-buffered so every partition reads
+# the previous round's vectors of all nodes (including boundary neighbors in
+# other partitions) and writes only its own rows. Within a receiver, incoming
+# vectors are applied in sender order, exactly like the serial engine, so the
+# converged tables match simulate_rip entry for entry.
+
+NO_HOP = -1
+INT_UNREACHABLE = 2 ** 62  # Stands in for float('inf') when all link costs are integers
+
+_state = {}  # Per-process view of the shared buffers and partition schedules
+
+
+def partition_graph(network, parts):
+    """
+    Split a network's nodes into `parts` balanced, connected-ish partitions.
+
+    Regions are grown breadth-first from a low-degree seed until they reach
+    their share of nodes, which keeps neighbors together and the number of
+    cut edges low on the sparse topologies RIP is run on.
+
+    Returns:
+        List of node-index lists, one per partition
+    """
+    ids = list(network.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    adjacency = [[index[n] for n in network.nodes[node_id].neighbors] for node_id in ids]
+    n = len(ids)
+    parts = max(1, min(parts, n))
+    owner = [-1] * n
+    partitions = []
+    by_degree = sorted(range(n), key=lambda i: len(adjacency[i]))
+    cursor = 0
+
+    for part in range(parts):
+        target = (n * (part + 1)) // parts - (n * part) // parts
+        members = []
+        queue = deque()
+        while len(members) < target:
+            if not queue:
+                while owner[by_degree[cursor]] != -1:
+                    cursor += 1
+                seed = by_degree[cursor]
+                owner[seed] = part
+                members.append(seed)
+                queue.append(seed)
+                continue
+            node = queue.popleft()
+            for neighbor in adjacency[node]:
+                if owner[neighbor] == -1 and len(members) < target:
+                    owner[neighbor] = part
+                    members.append(neighbor)
+                    queue.append(neighbor)
+        partitions.append(sorted(members))
+    return partitions
+
+
+def count_cut_edges(network, partitions):
+    owner = {}
+    ids = list(network.nodes)
+    for part, members in enumerate(partitions):
+        for i in members:
+            owner[ids[i]] = part
+    return sum(1 for node_id, node in network.nodes.items()
+               for neighbor_id in node.neighbors
+               if node_id < neighbor_id and owner[node_id] != owner[neighbor_id])
+
+
+def _build_schedule(network, index, members):
+    """
+    Group a partition's incoming links into steps.
+
+    Step j holds every receiver's j-th neighbor in sender order, so each step
+    touches distinct receiver rows and can be applied as one array operation.
+    """
+    incoming = []
+    ids = list(network.nodes)
+    for r in members:
+        node = network.nodes[ids[r]]
+        incoming.append(sorted((index[s], w) for s, w in node.neighbors.items()))
+    steps = []
+    depth = max((len(links) for links in incoming), default=0)
+    for j in range(depth):
+        rows = [(r, links[j]) for r, links in zip(members, incoming) if len(links) > j]
+        steps.append((
+            np.array([r for r, _ in rows], dtype=np.int64),
+            np.array([s for _, (s, _) in rows], dtype=np.int64),
+            np.array([w for _, (_, w) in rows])
+        ))
+    return steps
+
+
+def _attach(names, shape, dist_dtype, schedules, options):
+    """Pool initializer: map the shared buffers into this worker."""
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    dtypes = (dist_dtype, dist_dtype, np.int32, np.int32, np.bool_, np.bool_)
+    _state['blocks'] = blocks
+    _state['arrays'] = [np.ndarray(shape, dtype=dtype, buffer=block.buf)
+                        for dtype, block in zip(dtypes, blocks)]
+    _state['schedules'] = schedules
+    _state['options'] = options
+
+
+def _run_partition(task):
+    """Apply one synchronous round to a partition's rows; returns (updated, sent, suppressed)."""
+    part, parity, periodic = task
+    dist = _state['arrays'][0:2]
+    hop = _state['arrays'][2:4]
+    dirty = _state['arrays'][4:6]
+    members, steps = _state['schedules'][part]
+    infinity, split_horizon, poisoned_reverse = _state['options']
+
+    old_dist, new_dist = dist[parity], dist[1 - parity]
+    old_hop, new_hop = hop[parity], hop[1 - parity]
+    old_dirty, new_dirty = dirty[parity], dirty[1 - parity]
+    new_dist[members] = old_dist[members]
+    new_hop[members] = old_hop[members]
+    new_dirty[members] = False
+
+    columns = np.arange(old_dist.shape[1])
+    entries_sent = 0
+    suppressed = 0
+    for receivers, senders, weights in steps:
+        if periodic:
+            sent = np.ones((len(receivers), old_dist.shape[1]), dtype=bool)
+        else:
+            sent = old_dirty[senders]
+            if not sent.any():
+                continue
+        offered = old_dist[senders]
+        if split_horizon:
+            reverse = (old_hop[senders] == receivers[:, None]) & (columns != receivers[:, None])
+            reverse &= sent
+            suppressed += int(reverse.sum())
+            if poisoned_reverse:
+                offered = np.where(reverse, infinity, offered)
+            else:
+                sent &= ~reverse
+        entries_sent += int(sent.sum())
+        sent[np.arange(len(receivers)), receivers] = False  # Receivers skip their own entry
+
+        new = np.minimum(weights[:, None] + offered, infinity)
+        cur_dist = new_dist[receivers]
+        cur_hop = new_hop[receivers]
+        reachable = new < infinity
+        from_hop = cur_hop == senders[:, None]
+        cand_dist = np.where(from_hop & ~reachable, infinity, new)
+        cand_hop = np.where(from_hop & ~reachable, NO_HOP, senders[:, None])
+        changed = np.where(from_hop, (cand_hop != cur_hop) | (cand_dist != cur_dist), new < cur_dist)
+        changed &= sent
+        if changed.any():
+            new_dist[receivers] = np.where(changed, cand_dist, cur_dist)
+            new_hop[receivers] = np.where(changed, cand_hop, cur_hop)
+            new_dirty[receivers] |= changed
+
+    return bool(new_dirty[members].any()), entries_sent, suppressed
+
+
+def _load_state(network, arrays, index, infinity):
+    dist, hop, dirty = arrays[0], arrays[2], arrays[4]
+    dist.fill(infinity)
+    hop.fill(NO_HOP)
+    dirty.fill(False)
+    for node_id, node in network.nodes.items():
+        i = index[node_id]
+        for dest, (next_hop, distance) in node.routing_table.items():
+            if dest in index:
+                dist[i, index[dest]] = distance if distance < network.infinity else infinity
+                hop[i, index[dest]] = index[next_hop] if next_hop in index else NO_HOP
+        for dest in node.dirty:
+            if dest in index:
+                dirty[i, index[dest]] = True
+
+
+def _store_state(network, ids, dist, hop, dirty, infinity):
+    """
+    Write the shared arrays back into routing tables, versioning only the
+    entries that differ from the tables the run started from.
+    """
+    pending = {}
+    for i, node_id in enumerate(ids):
+        hops = hop[i].tolist()
+        node = network.nodes[node_id]
+        old = node.routing_table
+        node.routing_table = {
+            dest: (ids[h] if h != NO_HOP else None, d if d < infinity else network.infinity)
+            for dest, h, d in zip(ids, hops, dist[i].tolist())
+        }
+        pending[node_id] = {ids[j] for j in np.flatnonzero(dirty[i]).tolist()}
+        node.dirty = {dest for dest, route in node.routing_table.items() if old.get(dest) != route}
+        node.dirty |= pending[node_id]
+    network.stamp_changes()
+    for node_id, node in network.nodes.items():
+        node.dirty = pending[node_id]  # Still to be advertised by a later run
+
+
+def simulate_rip_parallel(network, workers=None, max_iterations=100, partitions=None):
+    """
+    Run RIP on an initialized RIPNetwork across worker processes.
+
+    Rounds follow the serial engine exactly: triggered updates of dirty
+    entries, then a periodic full-table round to confirm convergence.
+    Routing tables, dirty sets and round_stats are written back to network.
+
+    Args:
+        network: RIPNetwork whose routing tables have been initialized
+        workers: Number of partitions / processes (default: CPU count)
+        max_iterations: Round limit, as in simulate_rip
+        partitions: Optional precomputed partition_graph() result
+
+    Returns:
+        True if RIP converged
+    """
+    ids = list(network.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    n = len(ids)
+    workers = max(1, workers or os.cpu_count() or 1)
+    if partitions is None:
+        partitions = partition_graph(network, workers)
+
+    weights = [w for node in network.nodes.values() for w in node.neighbors.values()]
+    infinity = network.infinity
+    if all(isinstance(w, int) for w in weights) and (isinstance(infinity, int) or infinity == float('inf')):
+        dist_dtype = np.dtype(np.int64)
+        infinity = infinity if isinstance(infinity, int) else INT_UNREACHABLE
+    else:
+        dist_dtype = np.dtype(np.float64)
+    schedules = [(np.array(members, dtype=np.int64), _build_schedule(network, index, members))
+                 for members in partitions]
+    options = (infinity, network.split_horizon, network.poisoned_reverse)
+
+    shape = (n, n)
+    sizes = [dist_dtype.itemsize] * 2 + [4] * 2 + [1] * 2
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, n * n * size)) for size in sizes]
+    pool = None
+    try:
+        names = [block.name for block in blocks]
+        _attach(names, shape, dist_dtype, schedules, options)
+        _load_state(network, _state['arrays'], index, infinity)
+        if len(partitions) > 1:
+            pool = Pool(len(partitions), initializer=_attach,
+                        initargs=(names, shape, dist_dtype, schedules, options))
+
+        parity = 0
+        periodic = False
+        converged = False
+        iteration = 0
+        suppressed_total = 0
+        network.round_stats = []
+        degrees = np.array([len(network.nodes[node_id].neighbors) for node_id in ids], dtype=np.int64)
+        has_neighbors = degrees > 0
+        present = np.zeros(shape, dtype=bool)
+        for i, node_id in enumerate(ids):
+            present[i, [index[dest] for dest in network.nodes[node_id].routing_table if dest in index]] = True
+        while not converged and iteration < max_iterations:
+            iteration += 1
+            # Same per-round statistics as the serial engine, from the state being advertised
+            dist, hop, dirty = _state['arrays'][parity], _state['arrays'][2 + parity], _state['arrays'][4 + parity]
+            present |= (dist < infinity) | (hop != NO_HOP)  # Learned entries stay, even once unreachable
+            table_sizes = present.sum(axis=1)
+            active = has_neighbors if periodic else has_neighbors & dirty.any(axis=1)
+            tasks = [(part, parity, periodic) for part in range(len(partitions))]
+            results = pool.map(_run_partition, tasks) if pool else [_run_partition(t) for t in tasks]
+            parity = 1 - parity
+            any_updates = any(updated for updated, _, _ in results)
+            suppressed_total += sum(s for _, _, s in results)
+            network.round_stats.append({
+                'round': iteration,
+                'periodic': periodic,
+                'active_nodes': int(active.sum()),
+                'messages': int(degrees[active].sum()),
+                'entries_sent': sum(sent for _, sent, _ in results),
+                'full_table_entries': int(degrees @ table_sizes),
+                'updated': any_updates
+            })
+            converged = periodic and not any_updates
+            periodic = not any_updates and not converged
+
+        arrays = _state['arrays']
+        network.stamp_changes()  # Changes made before this run
+        _store_state(network, ids, arrays[parity], arrays[2 + parity], arrays[4 + parity], infinity)
+        network.suppressed_messages += suppressed_total
+        return converged
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _state.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def random_network(n_nodes, avg_degree=4, seed=0, max_cost=3, **options):
+    """Connected random topology (spanning tree plus random chords) for benchmarks."""
+    rng = random.Random(seed)
+    edges = {}
+    for i in range(1, n_nodes):
+        edges[(rng.randrange(i), i)] = rng.randint(1, max_cost)
+    target = min(n_nodes * avg_degree // 2, n_nodes * (n_nodes - 1) // 2)
+    while len(edges) < target:
+        a, b = rng.sample(range(n_nodes), 2)
+        edges.setdefault((min(a, b), max(a, b)), rng.randint(1, max_cost))
+    return RIPNetwork.from_edges(range(n_nodes), [(a, b, w) for (a, b), w in edges.items()], **options)
+
+
+def benchmark(n_nodes=1000, avg_degree=4, worker_counts=(1, 2, 4, 8), seed=0, verify=True):
+    """
+    Time the partitioned engine across worker counts on one random topology.
+
+    Returns:
+        List of dicts with workers, seconds, rounds, cut_edges and speedup
+    """
+    import contextlib
+    import io
+
+    rows = []
+    reference = None
+    if verify:
+        serial = random_network(n_nodes, avg_degree, seed, infinity=float('inf'))
+        serial.initialize_routing_tables()
+        with contextlib.redirect_stdout(io.StringIO()):  # simulate_rip prints every table
+            start = time.perf_counter()
+            serial.simulate_rip()
+            serial_seconds = time.perf_counter() - start
+        reference = {node_id: node.routing_table for node_id, node in serial.nodes.items()}
+        print(f"serial engine: {serial_seconds:.2f} s, {len(serial.round_stats)} rounds")
+
+    for workers in worker_counts:
+        network = random_network(n_nodes, avg_degree, seed, infinity=float('inf'))
+        network.initialize_routing_tables()
+        partitions = partition_graph(network, workers)
+        start = time.perf_counter()
+        simulate_rip_parallel(network, workers, partitions=partitions)
+        seconds = time.perf_counter() - start
+        row = {
+            'workers': workers,
+            'seconds': seconds,
+            'rounds': len(network.round_stats),
+            'cut_edges': count_cut_edges(network, partitions),
+            'speedup': rows[0]['seconds'] / seconds if rows else 1.0
+        }
+        if reference is not None:
+            row['identical'] = all(node.routing_table == reference[node_id]
+                                   for node_id, node in network.nodes.items())
+        rows.append(row)
+        print(f"{workers:>2} workers: {seconds:7.2f} s  rounds={row['rounds']}  "
+              f"cut_edges={row['cut_edges']}  speedup={row['speedup']:.2f}x"
+              + (f"  identical={row['identical']}" if 'identical' in row else ''))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the partitioned RIP engine")
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--degree', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-verify', action='store_true', help="Skip the serial reference run")
+    args = parser.parse_args()
+    benchmark(args.nodes, args.degree, tuple(args.workers), args.seed, verify=not args.no_verify)
@@ -0,0 +1,220 @@
+import pickle
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from routing_analysis import analyze_network, connected_components
+
+EVENT_TYPES = ('fail', 'recover', 'cost')
+
+# Per-event measurements kept by random runs and summarized across scenarios
+SUMMARY_METRICS = ('convergence_rounds', 'max_loop_pairs', 'max_loops', 'loop_rounds',
+                   'max_black_holed_pairs', 'black_hole_rounds', 'entries_sent')
+
+
+def apply_event(network, event, original_costs):
+    """Apply one timeline event (fail, recover or cost change) in place."""
+    kind = event.get('type')
+    source, target = event.get('source'), event.get('target')
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type {kind!r}; expected one of {', '.join(EVENT_TYPES)}")
+    if source not in network.nodes or target not in network.nodes:
+        raise ValueError(f"Event references unknown link {source}-{target}")
+
+    up = target in network.nodes[source].neighbors
+    if kind == 'fail':
+        if not up:
+            raise ValueError(f"Link {source}-{target} is not up")
+        original_costs.setdefault(frozenset((source, target)), network.nodes[source].neighbors[target])
+        network.remove_link(source, target)
+    elif kind == 'recover':
+        if up:
+            raise ValueError(f"Link {source}-{target} is already up")
+        cost = event.get('cost', original_costs.get(frozenset((source, target)), 1))
+        network.add_bidirectional_link(source, target, cost)
+    else:
+        if not up:
+            raise ValueError(f"Link {source}-{target} is not up")
+        network.set_link_cost(source, target, event['cost'])
+
+
+def run_scenario(network, timeline, max_rounds=500):
+    """
+    Replay a timeline of link events against a converged RIPNetwork.
+
+    Each event has a `type` (fail, recover or cost), `source`, `target`,
+    an optional `cost` and an optional `at` round. Events due in the same
+    round are applied together; an event that lands before the previous one
+    has settled marks that one as interrupted. After every RIP round the
+    forwarding state is analyzed for loops and black holes (routing_analysis).
+
+    Args:
+        network: Converged RIPNetwork, modified in place
+        timeline: List of event dicts
+        max_rounds: Round budget for the whole scenario
+
+    Returns:
+        List of per-event result dicts in timeline order
+    """
+    pending = deque(sorted(enumerate(timeline), key=lambda item: item[1].get('at', 0)))
+    results = [None] * len(timeline)
+    original_costs = {}
+    state = {'round': 0, 'active': [], 'components': None}
+
+    def apply_due():
+        group = []
+        while pending and pending[0][1].get('at', 0) <= state['round']:
+            position, event = pending.popleft()
+            apply_event(network, event, original_costs)
+            results[position] = {
+                "event": event,
+                "applied_round": state['round'],
+                "convergence_rounds": 0,
+                "max_loop_pairs": 0,
+                "max_loops": 0,
+                "loop_rounds": 0,
+                "max_black_holed_pairs": 0,
+                "black_hole_rounds": 0,
+                "entries_sent": 0,
+                "interrupted": False,
+                "converged": True
+            }
+            group.append(results[position])
+        if not group:
+            return False
+        for result in state['active']:
+            result['interrupted'] = True
+        state['active'] = group
+        state['components'] = connected_components(network)
+        return True
+
+    def on_round(iteration, stats):
+        state['round'] += 1
+        observed = analyze_network(network, state['components']).counts()
+        for result in state['active']:
+            if stats['updated']:
+                result['convergence_rounds'] = state['round'] - result['applied_round']
+            result['entries_sent'] += stats['entries_sent']
+            result['max_loop_pairs'] = max(result['max_loop_pairs'], observed['loop_pairs'])
+            result['max_loops'] = max(result['max_loops'], observed['loops'])
+            result['max_black_holed_pairs'] = max(result['max_black_holed_pairs'],
+                                                  observed['black_holed_pairs'])
+            result['loop_rounds'] += 1 if observed['loop_pairs'] else 0
+            result['black_hole_rounds'] += 1 if observed['black_holed_pairs'] else 0
+        return apply_due()
+
+    while pending:
+        # A converged network stays quiet, so skip straight to the next event
+        state['round'] = max(state['round'], pending[0][1].get('at', 0))
+        apply_due()
+        budget = max_rounds - state['round']
+        if budget <= 0 or not network.simulate_rip(budget, verbose=False, on_round=on_round):
+            for result in state['active']:
+                result['converged'] = False
+            break
+        state['active'] = []
+    return results
+
+
+def random_timeline(network, rng, events=5, max_gap=10, max_cost=10):
+    """Draw a random sequence of link failures, recoveries and cost changes."""
+    up = [(a, b) for a, node in network.nodes.items() for b in node.neighbors if str(a) < str(b)]
+    down = []
+    timeline = []
+    at = 0
+    for _ in range(events):
+        at += rng.randint(0, max_gap)
+        roll = rng.random()
+        if down and (roll < 0.35 or not up):
+            link = down.pop(rng.randrange(len(down)))
+            up.append(link)
+            timeline.append({"at": at, "type": "recover", "source": link[0], "target": link[1]})
+        elif up and roll < 0.75:
+            link = up.pop(rng.randrange(len(up)))
+            down.append(link)
+            timeline.append({"at": at, "type": "fail", "source": link[0], "target": link[1]})
+        elif up:
+            link = rng.choice(up)
+            timeline.append({"at": at, "type": "cost", "source": link[0], "target": link[1],
+                             "cost": rng.randint(1, max_cost)})
+    return timeline
+
+
+_worker_network = None
+
+
+def _init_worker(network_blob):
+    global _worker_network
+    _worker_network = network_blob
+
+
+def _run_random_batch(seeds, events, max_gap, max_rounds):
+    records = []
+    for seed in seeds:
+        network = pickle.loads(_worker_network)
+        timeline = random_timeline(network, random.Random(seed), events, max_gap)
+        for result in run_scenario(network, timeline, max_rounds):
+            record = {metric: result[metric] for metric in SUMMARY_METRICS}
+            record.update(type=result['event']['type'], interrupted=result['interrupted'],
+                          converged=result['converged'], seed=seed)
+            records.append(record)
+    return records
+
+
+def summarize(records):
+    """Distribution summaries of per-event metrics, overall and by event type."""
+    def describe(group):
+        summary = {"events": len(group),
+                   "interrupted": sum(r['interrupted'] for r in group),
+                   "not_converged": sum(not r['converged'] for r in group)}
+        for metric in SUMMARY_METRICS:
+            values = np.array([r[metric] for r in group], dtype=np.float64)
+            if not len(values):
+                continue
+            p50, p90, p99 = np.percentile(values, (50, 90, 99))
+            summary[metric] = {"mean": float(values.mean()), "p50": float(p50), "p90": float(p90),
+                               "p99": float(p99), "max": float(values.max())}
+        rounds = np.array([r['convergence_rounds'] for r in group], dtype=np.int64)
+        summary['convergence_rounds_histogram'] = {
+            str(value): int(count) for value, count in enumerate(np.bincount(rounds)) if count
+        }
+        return summary
+
+    by_type = {kind: describe([r for r in records if r['type'] == kind])
+               for kind in EVENT_TYPES if any(r['type'] == kind for r in records)}
+    return {"overall": describe(records), "by_type": by_type}
+
+
+def run_random_scenarios(network, scenarios=1000, events=5, seed=0, workers=None,
+                         max_gap=10, max_rounds=500, batch_size=50):
+    """
+    Run many randomized timelines against copies of a converged network.
+
+    Args:
+        network: Converged RIPNetwork used as the starting point of every scenario
+        scenarios: Number of random timelines
+        events: Events per timeline
+        seed: Base seed; scenario i uses seed + i, so runs are reproducible
+        workers: Process count; None uses the CPU count, 1 runs in-process
+        max_gap: Largest gap in rounds between consecutive events
+
+    Returns:
+        (per-event records, summary)
+    """
+    blob = pickle.dumps(network, protocol=pickle.HIGHEST_PROTOCOL)
+    seeds = list(range(seed, seed + scenarios))
+    batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+
+    if workers == 1 or len(batches) == 1:
+        _init_worker(blob)
+        records = [r for batch in batches for r in _run_random_batch(batch, events, max_gap, max_rounds)]
+    else:
+        # Workers unpickle a fresh copy of the converged network per scenario
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(blob,)) as pool:
+            futures = [pool.submit(_run_random_batch, batch, events, max_gap, max_rounds)
+                       for batch in batches]
+            records = [r for future in futures for r in future.result()]
+    return records, summarize(records)
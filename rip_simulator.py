@@ -1,64 +1,182 @@
 import random
 import time
 import copy
+import uuid
+from metrics import timed, registry
+
+# RIP metric at which a destination is unreachable (RFC 2453)
+RIP_INFINITY = 16
+
+# Hierarchical routing: nodes outside a node's own area are reached through
+# one summary route per area, keyed by area_destination(area)
+AREA_PREFIX = 'area:'
+DEFAULT_AREA = '0'  # Nodes not assigned an area join it, like OSPF's backbone
+
+
+def area_destination(area):
+    """Routing-table key of the summary route for an area."""
+    return f"{AREA_PREFIX}{area}"
+
+
+def is_area_destination(dest_id):
+    return isinstance(dest_id, str) and dest_id.startswith(AREA_PREFIX)
+
+SPLIT_HORIZON_SUPPRESSED = registry.counter(
+    'dcn_rip_split_horizon_suppressed_total',
+    'Routing entries withheld or poisoned by split horizon.', ('mode',))
 
 class Node:
-    def __init__(self, node_id):
+    def __init__(self, node_id, infinity=RIP_INFINITY):
         self.node_id = node_id
+        self.infinity = infinity
         self.neighbors = {}  # neighbor_id -> direct distance
         self.routing_table = {}  # destination_id -> (next_hop, distance)
+        self.dirty = set()  # Destinations changed since the last advertisement
+        self.entry_versions = {}  # destination_id -> network version of its last change
+        self.table_version = 0  # Network version of the last change to this node
+        self.created_version = 0
+        self.area = None  # Area name when the network is hierarchical
+        self.area_map = None  # Shared node_id -> area mapping of the network
+        self.equal_cost = None  # ((epoch, version), {dest: next hops}) derived by the network
         
     def add_neighbor(self, neighbor_id, distance):
         """Add a direct neighbor with the given distance."""
         self.neighbors[neighbor_id] = distance
         # Initialize routing table with direct neighbors
         self.routing_table[neighbor_id] = (neighbor_id, distance)
+        self.dirty.add(neighbor_id)
+
+    def reset_routing_table(self):
+        """Forget learned routes, keeping only the direct neighbors."""
+        self.routing_table = {n_id: (n_id, d) for n_id, d in self.neighbors.items()}
+        self.dirty = set(self.routing_table)
         
     def initialize_routing_table(self, all_nodes):
-        """Initialize routing table with direct connections and infinity for others."""
+        """
+        Initialize routing table with direct connections and infinity for others.
+
+        In a hierarchical network `all_nodes` lists the node's own area and
+        the other areas' summary destinations; entries outside that scope
+        are dropped and the node is at distance 0 from its own area.
+        """
+        local = (self.node_id,)
+        if self.area is not None:
+            local = (self.node_id, area_destination(self.area))
+            scope = set(all_nodes)
+            for dest_id in [d for d in self.routing_table if d not in scope]:
+                del self.routing_table[dest_id]
+                self.entry_versions.pop(dest_id, None)
+                self.dirty.discard(dest_id)
         for node_id in all_nodes:
-            if node_id == self.node_id:
-                self.routing_table[node_id] = (self.node_id, 0)  # Distance to self is 0
+            if node_id in local:
+                if self.routing_table.get(node_id) != (self.node_id, 0):
+                    self.routing_table[node_id] = (self.node_id, 0)  # Distance to self is 0
+                    self.dirty.add(node_id)
             elif node_id not in self.routing_table:
-                self.routing_table[node_id] = (None, float('inf'))  # Set distance to infinity for unknown nodes
+                self.routing_table[node_id] = (None, self.infinity)  # Set distance to infinity for unknown nodes
                 
-    def get_distance_vector(self):
-        """Return the distance vector to share with neighbors."""
-        return {dest: dist for dest, (_, dist) in self.routing_table.items()}
+    def get_distance_vector(self, destinations=None):
+        """Return the distance vector (or just the given destinations) to share with neighbors."""
+        if destinations is None:
+            return {dest: dist for dest, (_, dist) in self.routing_table.items()}
+        table = self.routing_table
+        return {dest: table[dest][1] for dest in destinations if dest in table}
+
+    def get_advertisement(self, neighbor_id, poisoned_reverse=True, destinations=None):
+        """
+        Return the split-horizon distance vector for one neighbor.
+
+        Routes learned from neighbor_id are left out of the vector sent to it,
+        or advertised as infinity with poisoned reverse. `destinations`
+        limits the vector to those entries (a triggered update).
+
+        Returns:
+            (vector, number of entries withheld or poisoned)
+        """
+        if destinations is None:
+            entries = self.routing_table.items()
+        else:
+            table = self.routing_table
+            entries = [(dest, table[dest]) for dest in destinations if dest in table]
+        if self.area is not None and self.area_map.get(neighbor_id) != self.area:
+            # Area border: only summary routes cross it
+            entries = [(dest, route) for dest, route in entries if is_area_destination(dest)]
+        vector = {}
+        suppressed = 0
+        for dest, (next_hop, dist) in entries:
+            if next_hop == neighbor_id and dest != neighbor_id:
+                suppressed += 1
+                if poisoned_reverse:
+                    vector[dest] = self.infinity
+            else:
+                vector[dest] = dist
+        return vector, suppressed
                 
     def update_routing_table(self, neighbor_id, distance_vector):
-        """Update routing table based on a neighbor's distance vector."""
+        """
+        Update routing table based on a neighbor's distance vector.
+
+        Better routes are adopted from any neighbor, while updates from the
+        current next hop are always accepted, so a route gets worse (or is
+        invalidated at infinity) when the path behind it does.
+        """
         updated = False
+        infinity = self.infinity
         
         # Distance to the neighbor
         direct_distance = self.neighbors[neighbor_id]
         
+        scoped = self.area is not None
         for dest_id, reported_distance in distance_vector.items():
             if dest_id == self.node_id:
                 continue  # Skip self
+            if scoped and dest_id not in self.routing_table:
+                continue  # Another area's internal route
                 
-            # Calculate new potential distance through this neighbor
-            new_distance = direct_distance + reported_distance
+            # Calculate new potential distance through this neighbor, capped at infinity
+            new_distance = min(direct_distance + reported_distance, infinity)
             
-            # Current best known distance
-            _, current_distance = self.routing_table.get(dest_id, (None, float('inf')))
+            # Current best known route
+            current_hop, current_distance = self.routing_table.get(dest_id, (None, infinity))
             
-            # Update if new path is better
-            if new_distance < current_distance:
+            if current_hop == neighbor_id:
+                # Our next hop's view is authoritative, even if it got worse
+                new_route = (neighbor_id, new_distance) if new_distance < infinity else (None, infinity)
+                if new_route != (current_hop, current_distance):
+                    self.routing_table[dest_id] = new_route
+                    self.dirty.add(dest_id)
+                    updated = True
+            elif new_distance < current_distance:
+                # Update if new path is better
                 self.routing_table[dest_id] = (neighbor_id, new_distance)
+                self.dirty.add(dest_id)
                 updated = True
                 
         return updated
+
+    def invalidate_routes_via(self, neighbor_id):
+        """Mark every route whose next hop is neighbor_id as unreachable."""
+        invalidated = 0
+        for dest_id, (next_hop, _) in self.routing_table.items():
+            if next_hop == neighbor_id:
+                self.routing_table[dest_id] = (None, self.infinity)
+                self.dirty.add(dest_id)
+                invalidated += 1
+        return invalidated
     
     def get_next_hop(self, destination_id):
-        """Get the next hop to reach the destination."""
+        """Get the next hop to reach the destination, via its area's summary route if needed."""
         if destination_id in self.routing_table:
             return self.routing_table[destination_id][0]
+        if self.area is not None and destination_id in self.area_map:
+            route = self.routing_table.get(area_destination(self.area_map[destination_id]))
+            if route is not None:
+                return route[0]
         return None
     
     def get_path_to(self, destination_id, network):
         """Get the complete path to the destination."""
-        if destination_id not in self.routing_table:
+        if destination_id != self.node_id and self.get_next_hop(destination_id) is None:
             return []
             
         path = [self.node_id]
@@ -78,22 +196,191 @@ class Node:
         print(f"\nRouting Table for Node {self.node_id}:")
         print("Destination | Next Hop | Distance")
         print("------------|----------|----------")
-        for dest_id in sorted(self.routing_table.keys()):
+        for dest_id in sorted(self.routing_table.keys(), key=str):
             next_hop, distance = self.routing_table[dest_id]
-            if distance == float('inf'):
+            if distance >= self.infinity:
                 distance_str = "∞"
             else:
                 distance_str = str(distance)
             print(f"{dest_id:^11} | {next_hop if next_hop is not None else '-':^8} | {distance_str:^8}")
 
 class RIPNetwork:
-    def __init__(self):
+    def __init__(self, infinity=RIP_INFINITY, split_horizon=True, poisoned_reverse=True,
+                 cost_bound=False):
+        """
+        Args:
+            infinity: Metric treated as unreachable; pass float('inf') to
+                lift the 16-hop limit for large weighted topologies
+            split_horizon: Withhold routes from the neighbor they were learned from
+            poisoned_reverse: Advertise those routes as infinity instead of omitting them
+            cost_bound: Keep infinity above the cost of any simple path
+                ((nodes - 1) * largest link cost), raising it as nodes and
+                links are added, so weighted topologies are not cut off at
+                16 while counting to infinity still terminates
+        """
         self.nodes = {}  # node_id -> Node
+        self.infinity = infinity
+        self.split_horizon = split_horizon
+        self.poisoned_reverse = poisoned_reverse
+        self.cost_bound = cost_bound
+        self.max_cost = 1  # Largest link cost seen, for cost_bound
+        self.suppressed_messages = 0  # Entries withheld or poisoned by split horizon
+        self.round_stats = []  # Per-round advertisement statistics of the last simulate_rip
+        
+        # Change tracking for incremental topology responses
+        self.epoch = uuid.uuid4().hex[:12]  # Versions are only comparable within one epoch
+        self.version = 0
+        self.removed_nodes = {}  # node_id -> version it was removed at
+        self.touched = set()  # Nodes whose links changed since the last stamp
+        
+        self.areas = {}  # node_id -> area; empty for flat routing
+        
+        # Position of the last simulate_rip run, so a checkpoint can resume it
+        self.rip_round = 0
+        self.rip_periodic = False
         
-    def add_node(self, node_id):
-        """Add a node to the network."""
-        self.nodes[node_id] = Node(node_id)
+    @classmethod
+    def from_edges(cls, node_ids, edges, **options):
+        """
+        Build a network in bulk from node ids and (source, target, distance) edges.
+
+        Neighbor maps and initial routing entries are filled directly instead
+        of through repeated add_bidirectional_link calls. Edge endpoints that
+        are not in node_ids are added as nodes.
+        """
+        network = cls(**options)
+        nodes = network.nodes
+        infinity = network.infinity
+        for node_id in node_ids:
+            nodes[node_id] = Node(node_id, infinity)
+        for source, target, distance in edges:
+            if source not in nodes:
+                nodes[source] = Node(source, infinity)
+            if target not in nodes:
+                nodes[target] = Node(target, infinity)
+            nodes[source].neighbors[target] = distance
+            nodes[target].neighbors[source] = distance
+        for node in nodes.values():
+            node.reset_routing_table()
+        network.fit_infinity()
+        return network
+
+    def fit_infinity(self, cost=None):
+        """
+        With cost_bound, raise infinity above the cost of any simple path.
+
+        `cost` is a link cost just added; without it every link is rescanned.
+        """
+        if not self.cost_bound:
+            return
+        if cost is None:
+            self.max_cost = max((distance for node in self.nodes.values()
+                                 for distance in node.neighbors.values()), default=1)
+        else:
+            self.max_cost = max(self.max_cost, cost)
+        bound = (len(self.nodes) - 1) * self.max_cost + 1
+        if bound > self.infinity:
+            self.raise_infinity(bound)
+
+    def raise_infinity(self, infinity):
+        """Move the unreachable metric up, rewriting entries that sat at the old one."""
+        previous = self.infinity
+        self.infinity = infinity
+        for node in self.nodes.values():
+            node.infinity = infinity
+            table = node.routing_table
+            for dest_id, (_, distance) in table.items():
+                if distance >= previous:
+                    table[dest_id] = (None, infinity)
+
+    def stamp_changes(self):
+        """
+        Record pending changes under a new network version.
+
+        Pending changes are the entries in each node's dirty set and nodes
+        whose links changed. Clients holding an older version can then be
+        sent only what changed since.
+        """
+        changed = [node for node in self.nodes.values() if node.dirty or node.node_id in self.touched]
+        self.touched.clear()
+        if not changed:
+            return self.version
+        self.version += 1
+        for node in changed:
+            for dest_id in node.dirty:
+                node.entry_versions[dest_id] = self.version
+            node.table_version = self.version
+        return self.version
+
+    def mark_all_changed(self):
+        """Stamp every routing entry, after tables were replaced wholesale."""
+        self.version += 1
+        for node in self.nodes.values():
+            node.entry_versions = dict.fromkeys(node.routing_table, self.version)
+            node.table_version = self.version
+        self.touched.clear()
+        return self.version
+
+    def add_node(self, node_id, area=None):
+        """Add a node to the network (to `area`, or DEFAULT_AREA, if it is hierarchical)."""
+        self.nodes[node_id] = Node(node_id, self.infinity)
+        self.nodes[node_id].created_version = self.version + 1
+        self.fit_infinity(0)
+        if self.areas:
+            self._assign_area(self.nodes[node_id], DEFAULT_AREA if area is None else area)
+        self.touched.add(node_id)
         return self.nodes[node_id]
+
+    def remove_link(self, node1_id, node2_id):
+        """
+        Remove a bidirectional link in place.
+
+        Both endpoints invalidate the routes that used the link; the next
+        simulate_rip run propagates the change without re-initializing tables.
+        """
+        for a, b in ((node1_id, node2_id), (node2_id, node1_id)):
+            node = self.nodes.get(a)
+            if node is not None and b in node.neighbors:
+                del node.neighbors[b]
+                node.invalidate_routes_via(b)
+                self.touched.add(a)
+
+    def set_link_cost(self, node1_id, node2_id, distance):
+        """
+        Change the cost of an existing link in place.
+
+        Routes over the link are re-metered by the cost difference, as a
+        router does when an interface metric changes, and marked for the next
+        triggered update.
+        """
+        self.fit_infinity(distance)
+        for a, b in ((node1_id, node2_id), (node2_id, node1_id)):
+            node = self.nodes[a]
+            delta = distance - node.neighbors[b]
+            node.neighbors[b] = distance
+            self.touched.add(a)
+            for dest_id, (next_hop, current) in node.routing_table.items():
+                if next_hop == b:
+                    new_distance = min(current + delta, self.infinity)
+                    node.routing_table[dest_id] = (b, new_distance) if new_distance < self.infinity else (None, self.infinity)
+                    node.dirty.add(dest_id)
+
+    def remove_node(self, node_id):
+        """Remove a node and its links in place, dropping it as a destination."""
+        node = self.nodes.get(node_id)
+        if node is None:
+            return
+        for neighbor_id in list(node.neighbors):
+            self.remove_link(node_id, neighbor_id)
+        del self.nodes[node_id]
+        self.areas.pop(node_id, None)
+        for other in self.nodes.values():
+            other.routing_table.pop(node_id, None)
+            other.entry_versions.pop(node_id, None)
+            other.dirty.discard(node_id)
+        self.touched.discard(node_id)
+        self.version += 1
+        self.removed_nodes[node_id] = self.version
         
     def add_bidirectional_link(self, node1_id, node2_id, distance):
         """Add a bidirectional link between two nodes."""
@@ -102,57 +389,230 @@ class RIPNetwork:
         if node2_id not in self.nodes:
             self.add_node(node2_id)
             
+        self.fit_infinity(distance)
         self.nodes[node1_id].add_neighbor(node2_id, distance)
         self.nodes[node2_id].add_neighbor(node1_id, distance)
+        self.touched.update((node1_id, node2_id))
         
+    def _assign_area(self, node, area):
+        self.areas[node.node_id] = area
+        node.area = area
+        node.area_map = self.areas
+
+    def set_areas(self, areas):
+        """
+        Group nodes into areas, or return to flat routing when `areas` is empty.
+
+        Each node then keeps routes to the nodes of its own area plus one
+        summary route per other area; only summaries are advertised across
+        area borders. Routing tables must be re-initialized and converged
+        afterwards. Starts a new epoch, since entries disappear wholesale.
+
+        Routes confined to an area can be much longer than flat ones, so a
+        hierarchical network switches to cost_bound instead of RIP's 16.
+        """
+        if areas:
+            self.cost_bound = True
+            self.fit_infinity()
+        self.areas = {}
+        for node_id, node in self.nodes.items():
+            if areas:
+                self._assign_area(node, str(areas.get(node_id, DEFAULT_AREA)))
+            else:
+                node.area = node.area_map = None
+        self.epoch = uuid.uuid4().hex[:12]
+        self.removed_nodes = {}
+
     def initialize_routing_tables(self):
-        """Initialize routing tables for all nodes."""
+        """Initialize routing tables for all nodes (scoped to their area when hierarchical)."""
         all_node_ids = list(self.nodes.keys())
+        if not self.areas:
+            for node in self.nodes.values():
+                node.initialize_routing_table(all_node_ids)
+            return
+        members = {}
+        for node_id in all_node_ids:
+            members.setdefault(self.areas[node_id], []).append(node_id)
+        summaries = [area_destination(area) for area in members]
         for node in self.nodes.values():
-            node.initialize_routing_table(all_node_ids)
+            node.initialize_routing_table(members[node.area] + summaries)
             
-    def simulate_rip(self, max_iterations=100):
-        """Simulate the RIP algorithm until convergence or max iterations."""
-        iteration = 0
+    @timed('rip_convergence')
+    def simulate_rip(self, max_iterations=100, verbose=True, on_round=None, resume=False):
+        """
+        Simulate the RIP algorithm until convergence or max iterations.
+
+        Rounds send triggered updates: each node advertises only the entries
+        that changed since its last advertisement, and nodes with nothing new
+        stay silent. Once a round changes nothing, a periodic round exchanges
+        full tables; convergence is declared only when that also changes
+        nothing, so the result matches full-table exchange.
+
+        Args:
+            max_iterations: Round limit
+            verbose: Print progress and routing tables
+            on_round: Optional callback(iteration, stats) run after each round;
+                returning True signals a topology change and keeps RIP running
+            resume: Continue from rip_round (e.g. a restored checkpoint)
+                instead of starting a new run; max_iterations still counts
+                from the first round
+        """
+        iteration = self.rip_round if resume else 0
         converged = False
+        suppressed_total = 0
+        periodic = self.rip_periodic if resume else False
+        if not resume:
+            self.round_stats = []
         
-        print("Starting RIP simulation...")
+        if verbose:
+            print("Starting RIP simulation...")
         
         while not converged and iteration < max_iterations:
             iteration += 1
-            print(f"\nIteration {iteration}")
+            if verbose:
+                print(f"\nIteration {iteration}")
+            
+            # Version the changes about to be advertised before dirty sets are cleared
+            self.stamp_changes()
             
             # Make a copy of nodes to simulate simultaneous updates
             updates = []
+            stats = {
+                'round': iteration,
+                'periodic': periodic,
+                'active_nodes': 0,
+                'messages': 0,
+                'entries_sent': 0,
+                'full_table_entries': 0  # What a full exchange would have sent
+            }
             
-            # Each node shares its distance vector with neighbors
+            # Each node shares its changed (or, periodically, all) entries with neighbors
             for node_id, node in self.nodes.items():
-                distance_vector = node.get_distance_vector()
+                stats['full_table_entries'] += len(node.neighbors) * len(node.routing_table)
+                if periodic:
+                    destinations = None
+                elif node.dirty:
+                    destinations = node.dirty
+                else:
+                    continue  # Nothing to advertise
+                node.dirty = set()
+                if not node.neighbors:
+                    continue
+                stats['active_nodes'] += 1
                 
+                if not self.split_horizon:
+                    distance_vector = node.get_distance_vector(destinations)
+                    summary = None
+                    for neighbor_id in node.neighbors:
+                        vector = distance_vector
+                        if node.area is not None and self.areas.get(neighbor_id) != node.area:
+                            if summary is None:  # Only summary routes cross area borders
+                                summary = {d: v for d, v in distance_vector.items() if is_area_destination(d)}
+                            vector = summary
+                        updates.append((neighbor_id, node_id, vector))
+                        stats['entries_sent'] += len(vector)
+                    stats['messages'] += len(node.neighbors)
+                    continue
+                
+                # Split horizon tailors the vector to each neighbor
                 for neighbor_id in node.neighbors:
+                    distance_vector, suppressed = node.get_advertisement(
+                        neighbor_id, self.poisoned_reverse, destinations)
+                    suppressed_total += suppressed
                     updates.append((neighbor_id, node_id, distance_vector))
+                    stats['messages'] += 1
+                    stats['entries_sent'] += len(distance_vector)
             
             # Apply all updates and check if any tables changed
             any_updates = False
             for neighbor_id, sender_id, distance_vector in updates:
                 updated = self.nodes[neighbor_id].update_routing_table(sender_id, distance_vector)
                 any_updates = any_updates or updated
-                
-            # If no updates were made, we've converged
-            converged = not any_updates
+            stats['updated'] = any_updates
+            self.round_stats.append(stats)
+            
+            # Quiet after triggered updates: confirm with one full periodic round
+            converged = periodic and not any_updates
+            periodic = not any_updates and not converged
+            self.rip_round, self.rip_periodic = iteration, periodic
+            
+            if on_round is not None and on_round(iteration, stats):
+                converged = periodic = False  # Topology changed under us
+                self.rip_periodic = False
             
             # Print routing tables after each iteration
-            if iteration == 1 or iteration == max_iterations or converged:
+            if verbose and (iteration == 1 or iteration == max_iterations or converged):
                 for node in self.nodes.values():
                     node.print_routing_table()
                     
-        if converged:
-            print(f"\nRIP converged after {iteration} iterations.")
-        else:
-            print(f"\nRIP did not converge after {max_iterations} iterations.")
+        self.stamp_changes()
+        
+        if verbose:
+            if converged:
+                print(f"\nRIP converged after {iteration} iterations.")
+            else:
+                print(f"\nRIP did not converge after {max_iterations} iterations.")
+            
+            sent = sum(stats['entries_sent'] for stats in self.round_stats)
+            full = sum(stats['full_table_entries'] for stats in self.round_stats)
+            if full:
+                print(f"Advertised {sent} of {full} full-table entries ({100.0 * sent / full:.1f}%).")
+        
+        if suppressed_total:
+            self.suppressed_messages += suppressed_total
+            SPLIT_HORIZON_SUPPRESSED.inc(
+                suppressed_total, mode='poisoned_reverse' if self.poisoned_reverse else 'split_horizon')
             
         return converged
         
+    def equal_cost_hops(self, node_id):
+        """
+        Every next hop of a node that lies on a shortest route, per destination.
+
+        The routing table keeps one next hop per destination, the neighbor
+        that first offered the best distance. Any other neighbor whose own
+        route reaches the destination for exactly the remaining distance is
+        an equally short alternative. The sets are derived from the
+        neighbors' tables and kept until the network version changes.
+
+        Returns:
+            {destination_id: [next hops]} for destinations with more than
+            one, the routing table's next hop first
+        """
+        node = self.nodes[node_id]
+        stamp = (self.epoch, self.version)
+        if node.equal_cost is not None and node.equal_cost[0] == stamp:
+            return node.equal_cost[1]
+        infinity = self.infinity
+        neighbors = [(n_id, cost, self.nodes[n_id].routing_table)
+                     for n_id, cost in node.neighbors.items() if n_id in self.nodes]
+        hops = {}
+        for dest, (next_hop, distance) in node.routing_table.items():
+            if next_hop is None or distance >= infinity:
+                continue
+            alternates = []
+            for n_id, cost, table in neighbors:
+                route = table.get(dest)
+                # A strictly shorter remainder also rules out loops over zero-cost links
+                if (n_id != next_hop and route is not None and route[1] < distance
+                        and abs(cost + route[1] - distance) <= 1e-9 * max(1, abs(distance))):
+                    alternates.append(n_id)
+            if alternates:
+                hops[dest] = [next_hop] + alternates
+        node.equal_cost = (stamp, hops)
+        return hops
+
+    def get_next_hops(self, node_id, destination_id):
+        """All equal-cost next hops from a node towards a destination (empty without a route)."""
+        node = self.nodes[node_id]
+        next_hop = node.get_next_hop(destination_id)
+        if next_hop is None:
+            return []
+        key = destination_id
+        if destination_id not in node.routing_table and node.area is not None:
+            key = area_destination(node.area_map[destination_id])
+        return self.equal_cost_hops(node_id).get(key, [next_hop])
+
     def find_shortest_path(self, source_id, destination_id):
         """Find the shortest path from source to destination."""
         if source_id not in self.nodes or destination_id not in self.nodes:
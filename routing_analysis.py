@@ -0,0 +1,177 @@
+from collections import deque
+
+import numpy as np
+
+from rip_simulator import area_destination
+
+# Forwarding outcome of a (source, destination) pair
+DELIVERED, DROPPED, LOOPING = 0, 1, 2
+
+
+def connected_components(network):
+    """Map each node id to a component label of the current physical topology."""
+    component = {}
+    for start in network.nodes:
+        if start in component:
+            continue
+        component[start] = start
+        queue = deque([start])
+        while queue:
+            node_id = queue.popleft()
+            for neighbor_id in network.nodes[node_id].neighbors:
+                if neighbor_id not in component:
+                    component[neighbor_id] = start
+                    queue.append(neighbor_id)
+    return component
+
+
+def next_hop_matrix(network, ids=None):
+    """
+    Collect every node's usable next hops into an N x N index matrix.
+
+    Entry [s, d] is the index of s's next hop towards d, or -1 when s has no
+    route, the route is at infinity or its next hop is no longer a neighbor.
+    The diagonal points each destination at itself. In a hierarchical
+    network a node's summary route to another area stands in for every
+    node of that area.
+    """
+    ids = list(network.nodes) if ids is None else ids
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    n = len(ids)
+    infinity = network.infinity
+    hop = np.full((n, n), -1, dtype=np.int32)
+    areas = getattr(network, 'areas', None)
+    if areas:
+        members = {}
+        for node_id in ids:
+            members.setdefault(area_destination(areas[node_id]), []).append(index[node_id])
+    for i, node_id in enumerate(ids):
+        node = network.nodes[node_id]
+        neighbors = node.neighbors
+        row = hop[i]
+        for dest, (next_hop, distance) in node.routing_table.items():
+            if next_hop is None or distance >= infinity or next_hop not in neighbors:
+                continue
+            if dest in index:
+                row[index[dest]] = index[next_hop]
+            elif areas and dest in members and dest != area_destination(node.area):
+                row[members[dest]] = index[next_hop]  # Summary route covers the whole area
+    hop[np.arange(n), np.arange(n)] = np.arange(n)
+    return hop
+
+
+class ForwardingAnalysis:
+    """
+    Forwarding outcome of every (source, destination) pair at one instant.
+
+    For each destination the next hops form a functional graph: every node
+    points at one successor, the destination points at itself and nodes
+    without a route point at a sink. Pointer jumping (repeated squaring of
+    the successor map) resolves where each chain ends for all destinations at
+    once in ceil(log2 N) array passes; chains that reach neither the
+    destination nor the sink are trapped in a cycle. The same passes carry
+    the smallest node index seen along the chain, which names each cycle by
+    its lowest member so distinct loops can be counted.
+    """
+
+    def __init__(self, hop, ids=None, components=None):
+        n = hop.shape[0]
+        self.ids = list(range(n)) if ids is None else list(ids)
+        sink = n
+        columns = np.arange(n)[None, :]
+
+        successor = np.empty((n + 1, n), dtype=np.int32)
+        successor[:n] = np.where(hop < 0, sink, hop)
+        successor[sink] = sink
+        lowest = np.repeat(np.arange(n + 1, dtype=np.int32)[:, None], n, axis=1)
+
+        steps = max(1, int(np.ceil(np.log2(n + 1))) + 1)  # 2**steps exceeds any chain length
+        for _ in range(steps):
+            lowest = np.minimum(lowest, lowest[successor, columns])
+            successor = successor[successor, columns]
+
+        final = successor[:n]
+        delivered = final == np.arange(n)[None, :]
+        dropped = final == sink
+        looping = ~(delivered | dropped)
+
+        self.status = np.full((n, n), DELIVERED, dtype=np.int8)
+        self.status[dropped] = DROPPED
+        self.status[looping] = LOOPING
+
+        # After enough steps a trapped chain sits on its cycle, and the jump
+        # map permutes each cycle, so these positions are exactly the cycle nodes
+        self.on_cycle = np.zeros((n, n), dtype=bool)
+        rows, cols = np.nonzero(looping)
+        self.on_cycle[final[rows, cols], cols] = True
+        self.cycle_heads = self.on_cycle & (lowest[:n] == np.arange(n)[:, None])
+
+        if components is not None:
+            labels = {}
+            component = np.array([labels.setdefault(components[node_id], len(labels))
+                                  for node_id in self.ids])
+            same_component = component[:, None] == component[None, :]
+        else:
+            same_component = np.ones((n, n), dtype=bool)
+        self.black_holed = dropped & same_component
+        self.partitioned = dropped & ~same_component
+        self.hop = hop
+
+    def counts(self):
+        looping = self.status == LOOPING
+        return {
+            "loop_pairs": int(looping.sum()),
+            "black_holed_pairs": int(self.black_holed.sum()),
+            "partitioned_pairs": int(self.partitioned.sum()),
+            "looping_destinations": int(looping.any(axis=0).sum()),
+            "loops": int(self.cycle_heads.sum())
+        }
+
+    def loops(self, limit=100):
+        """List forwarding loops as {destination, nodes} with nodes in forwarding order."""
+        result = []
+        heads, destinations = np.nonzero(self.cycle_heads)
+        for head, dest in zip(heads[:limit].tolist(), destinations[:limit].tolist()):
+            cycle = [head]
+            node = int(self.hop[head, dest])
+            while node != head:
+                cycle.append(node)
+                node = int(self.hop[node, dest])
+            result.append({
+                "destination": self.ids[dest],
+                "nodes": [self.ids[i] for i in cycle]
+            })
+        return result
+
+    def black_holes(self, limit=100):
+        """List black-holed (source, destination) pairs."""
+        sources, destinations = np.nonzero(self.black_holed)
+        return [{"source": self.ids[s], "destination": self.ids[d]}
+                for s, d in zip(sources[:limit].tolist(), destinations[:limit].tolist())]
+
+
+def analyze_network(network, components=None):
+    """Analyze the current routing tables of a RIPNetwork."""
+    ids = list(network.nodes)
+    if components is None:
+        components = connected_components(network)
+    return ForwardingAnalysis(next_hop_matrix(network, ids), ids, components)
+
+
+def convergence_timeline(network, max_iterations=100):
+    """
+    Run RIP on an initialized network and analyze forwarding after each round.
+
+    Returns:
+        (converged, list of per-round dicts with round stats and loop counts)
+    """
+    components = connected_components(network)
+    timeline = []
+
+    def on_round(iteration, stats):
+        entry = dict(stats)
+        entry.update(analyze_network(network, components).counts())
+        timeline.append(entry)
+
+    converged = network.simulate_rip(max_iterations, verbose=False, on_round=on_round)
+    return converged, timeline
@@ -0,0 +1,187 @@
+import argparse
+import random
+import time
+from collections import deque
+
+from rip_simulator import DEFAULT_AREA, RIPNetwork
+
+# Flat versus hierarchical (area-summarized) RIP on the same topology
+
+
+def _hops_from(network, sources, hops):
+    """Lower `hops` to the BFS hop count from the nearest of `sources`."""
+    queue = deque(sources)
+    for source in sources:
+        hops[source] = 0
+    while queue:
+        node_id = queue.popleft()
+        for neighbor_id in network.nodes[node_id].neighbors:
+            if hops[node_id] + 1 < hops[neighbor_id]:
+                hops[neighbor_id] = hops[node_id] + 1
+                queue.append(neighbor_id)
+
+
+def assign_areas(network, count):
+    """
+    Group nodes into `count` connected areas.
+
+    Seeds are picked farthest-first (each new seed is the node most hops
+    away from the existing ones, so every component gets one before any
+    gets two), then every node joins the area of the nearest seed by a
+    simultaneous BFS, which keeps each area connected.
+
+    Returns:
+        {node_id: area name}
+    """
+    ids = list(network.nodes)
+    if not ids:
+        return {}
+    hops = dict.fromkeys(ids, float('inf'))
+    seeds = []
+    for _ in range(max(1, min(count, len(ids)))):
+        seed = max(ids, key=hops.get)
+        if seeds and hops[seed] == 0:
+            break
+        seeds.append(seed)
+        _hops_from(network, [seed], hops)
+
+    areas = {seed: str(area) for area, seed in enumerate(seeds)}
+    queue = deque(seeds)
+    while queue:
+        node_id = queue.popleft()
+        for neighbor_id in network.nodes[node_id].neighbors:
+            if neighbor_id not in areas:
+                areas[neighbor_id] = areas[node_id]
+                queue.append(neighbor_id)
+    return areas
+
+
+def split_areas(network, areas):
+    """
+    Areas whose members are not connected through links inside the area.
+
+    Members of an area reach each other only over intra-area routes, so a
+    split area black-holes traffic between its pieces. Nodes missing from
+    `areas` belong to DEFAULT_AREA, as in RIPNetwork.set_areas.
+
+    Returns:
+        Sorted list of area names
+    """
+    area_of = {node_id: str(areas.get(node_id, DEFAULT_AREA)) for node_id in network.nodes}
+    seen = set()
+    explored = set()
+    split = set()
+    for node_id, area in area_of.items():
+        if node_id in seen:
+            continue
+        if area in explored:
+            split.add(area)  # Another piece of this area was already explored
+        explored.add(area)
+        queue = deque([node_id])
+        seen.add(node_id)
+        while queue:
+            current = queue.popleft()
+            for neighbor_id in network.nodes[current].neighbors:
+                if neighbor_id not in seen and area_of[neighbor_id] == area:
+                    seen.add(neighbor_id)
+                    queue.append(neighbor_id)
+    return sorted(split)
+
+
+def _rebuild(network):
+    edges = [(a, b, distance) for a, node in network.nodes.items()
+             for b, distance in node.neighbors.items()]
+    return RIPNetwork.from_edges(list(network.nodes), edges, infinity=network.infinity,
+                                 split_horizon=network.split_horizon,
+                                 poisoned_reverse=network.poisoned_reverse,
+                                 cost_bound=network.cost_bound)
+
+
+def _converge(network, max_iterations):
+    network.initialize_routing_tables()
+    start = time.perf_counter()
+    converged = network.simulate_rip(max_iterations, verbose=False)
+    seconds = time.perf_counter() - start
+    sizes = [len(node.routing_table) for node in network.nodes.values()]
+    return {
+        "converged": converged,
+        "seconds": seconds,
+        "rounds": len(network.round_stats),
+        "entries_sent": sum(stats['entries_sent'] for stats in network.round_stats),
+        "table_entries": sum(sizes),
+        "mean_table_entries": sum(sizes) / len(sizes) if sizes else 0,
+        "max_table_entries": max(sizes, default=0)
+    }
+
+
+def area_report(network, areas, pairs=1000, seed=0, max_iterations=1000):
+    """
+    Converge flat and hierarchical copies of a topology and compare them.
+
+    Summarization trades table size and advertisement work for path
+    stretch: traffic to another area follows the route to the nearest node
+    of that area, which need not lie on the shortest path to the
+    destination. Stretch is measured on a random sample of node pairs.
+
+    Args:
+        network: RIPNetwork whose links are used (left untouched)
+        areas: {node_id: area}
+        pairs: Node pairs sampled for path stretch
+
+    Returns:
+        Dict with flat and hierarchical stats, reductions and stretch
+    """
+    flat = _rebuild(network)
+    hierarchical = _rebuild(network)
+    hierarchical.set_areas(areas)
+    report = {
+        "nodes": len(network.nodes),
+        "areas": len(set(hierarchical.areas.values())),
+        "flat": _converge(flat, max_iterations),
+        "hierarchical": _converge(hierarchical, max_iterations)
+    }
+    for metric in ('table_entries', 'entries_sent', 'seconds', 'rounds'):
+        before = report['flat'][metric]
+        report[f"{metric}_reduction"] = 1 - report['hierarchical'][metric] / before if before else 0.0
+
+    rng = random.Random(seed)
+    ids = list(network.nodes)
+    stretches = []
+    unreachable = 0
+    for _ in range(pairs if len(ids) > 1 else 0):
+        source, destination = rng.sample(ids, 2)
+        flat_path = flat.find_shortest_path(source, destination)
+        if not flat_path:
+            continue
+        path = hierarchical.find_shortest_path(source, destination)
+        if not path:
+            unreachable += 1
+            continue
+        stretches.append(hierarchical.get_path_cost(path) / flat.get_path_cost(flat_path))
+    report['stretch'] = {
+        "pairs": len(stretches),
+        "mean": sum(stretches) / len(stretches) if stretches else None,
+        "max": max(stretches, default=None),
+        "longer_paths": sum(s > 1 for s in stretches),
+        "unreachable": unreachable
+    }
+    return report
+
+
+if __name__ == '__main__':
+    from rip_parallel import random_network
+
+    parser = argparse.ArgumentParser(description="Compare flat and area-summarized RIP")
+    parser.add_argument('--nodes', type=int, default=400)
+    parser.add_argument('--degree', type=int, default=4)
+    parser.add_argument('--areas', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    topology = random_network(args.nodes, args.degree, args.seed, max_cost=1)
+    for count in args.areas:
+        result = area_report(topology, assign_areas(topology, count), seed=args.seed)
+        flat, hier = result['flat'], result['hierarchical']
+        print(f"{count:>3} areas: entries {flat['table_entries']} -> {hier['table_entries']} "
+              f"({100 * result['table_entries_reduction']:.0f}% less), sent {flat['entries_sent']} -> "
+              f"{hier['entries_sent']}, time {flat['seconds']:.2f} s -> {hier['seconds']:.2f} s, "
+              f"stretch mean {result['stretch']['mean']:.3f} max {result['stretch']['max']:.2f}")
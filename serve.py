@@ -0,0 +1,417 @@
+import argparse
+import atexit
+import http.client
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+# Production entry point: preloads and pre-warms app state once in the master
+# process, then serves it from several forked workers.
+
+DEFAULT_HOST = '0.0.0.0'
+DEFAULT_PORT = 8003
+
+# Endpoints that read or change per-process state: the current topology with
+# its areas, layout and path cache, the trace registry, Playfair crack jobs and
+# checkpoint jobs. With several workers these are all forwarded to a single
+# state worker, so every client sees the same topology and jobs.
+STATEFUL_PREFIXES = ('/api/network/', '/api/rip/', '/api/playfair/crack', '/api/tcp/traces',
+                     '/api/checkpoints')
+
+# Peer address of a forwarded request, set by the proxying worker
+PEER_HEADER = 'X-DCN-Peer'
+
+_HOP_BY_HOP = frozenset(('connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+                         'te', 'trailers', 'transfer-encoding', 'upgrade'))
+_PROXY_CHUNK = 64 * 1024
+
+# Budget for a fresh interpreter to import the app and answer /api/health
+HEALTH_COLD_START_TARGET_MS = 500
+
+_STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/api/health')
+answered = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_health_ms': (answered - imported) * 1000,
+    'status': response.status_code,
+}))
+"""
+
+
+class InFlightTracker:
+    """Counts requests being handled so shutdown can wait for them to finish."""
+
+    def __init__(self):
+        self.count = 0
+        self.condition = threading.Condition()
+
+    def enter(self):
+        with self.condition:
+            self.count += 1
+
+    def leave(self):
+        with self.condition:
+            self.count -= 1
+            self.condition.notify_all()
+
+    def drain(self, timeout):
+        """Wait until no requests are in flight; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.count > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to a server listening on a Unix socket."""
+
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _request_body(environ):
+    """Yield the request body in chunks, reading no further than Content-Length."""
+    stream = environ['wsgi.input']
+    if environ.get('wsgi.input_terminated'):
+        yield from iter(lambda: stream.read(_PROXY_CHUNK), b'')
+        return
+    remaining = int(environ.get('CONTENT_LENGTH') or 0)
+    while remaining > 0:
+        chunk = stream.read(min(remaining, _PROXY_CHUNK))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def forward_request(environ, start_response, socket_path, timeout):
+    """Relay one WSGI request to the state worker and stream its response back."""
+    headers = {}
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            name = key[5:].replace('_', '-').title()
+            if name.lower() not in _HOP_BY_HOP and name.lower() != PEER_HEADER.lower():
+                headers[name] = value
+    for key, name in (('CONTENT_TYPE', 'Content-Type'), ('CONTENT_LENGTH', 'Content-Length')):
+        if environ.get(key):
+            headers[name] = environ[key]
+    headers[PEER_HEADER] = environ.get('REMOTE_ADDR', '')
+    chunked = bool(environ.get('wsgi.input_terminated'))
+    if chunked:
+        headers.pop('Content-Length', None)
+        headers['Transfer-Encoding'] = 'chunked'
+    query = environ.get('QUERY_STRING')
+    target = environ.get('RAW_URI') or quote(environ.get('PATH_INFO', '/')) + (f"?{query}" if query else '')
+
+    connection = UnixHTTPConnection(socket_path, timeout)
+    try:
+        has_body = chunked or int(environ.get('CONTENT_LENGTH') or 0) > 0
+        connection.request(environ['REQUEST_METHOD'], target,
+                           body=_request_body(environ) if has_body else None,
+                           headers=headers, encode_chunked=chunked)
+        response = connection.getresponse()
+    except OSError as e:
+        connection.close()
+        logging.error(f"State worker unavailable: {e}")
+        start_response('502 Bad Gateway', [('Content-Type', 'application/json')])
+        return [json.dumps({"error": "State worker unavailable"}).encode()]
+
+    start_response(f"{response.status} {response.reason}",
+                   [(name, value) for name, value in response.getheaders()
+                    if name.lower() not in _HOP_BY_HOP])
+
+    def body():
+        try:
+            yield from iter(lambda: response.read(_PROXY_CHUNK), b'')
+        finally:
+            connection.close()
+    return body()
+
+
+def state_proxy(app, socket_path, timeout):
+    """Serve stateless endpoints locally and forward stateful ones to the state worker."""
+    def proxied_app(environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(STATEFUL_PREFIXES):
+            return forward_request(environ, start_response, socket_path, timeout)
+        return app(environ, start_response)
+    return proxied_app
+
+
+def tracked(app, tracker):
+    """Wrap a WSGI app so the tracker counts its in-flight requests."""
+    def tracked_app(environ, start_response):
+        tracker.enter()
+        try:
+            yield from app(environ, start_response)
+        finally:
+            tracker.leave()
+    return tracked_app
+
+
+def serve_until_signalled(server, tracker, graceful_timeout):
+    """Serve until SIGTERM/SIGINT, then give in-flight requests time to finish."""
+    def shutdown(signum, frame):
+        # shutdown() blocks until serve_forever returns, so run it off the main thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    server.serve_forever()
+    if not tracker.drain(graceful_timeout):
+        logging.warning(f"Worker {os.getpid()} exiting with {tracker.count} requests in flight")
+    server.server_close()
+
+
+def start_state_worker(app, args):
+    """
+    Fork the worker that serves every stateful endpoint.
+
+    It listens on a Unix socket in a fresh private directory and takes the
+    client address from PEER_HEADER, which only the proxying workers can set.
+    It exits when its parent does.
+
+    Returns:
+        (pid, socket path)
+    """
+    from werkzeug.serving import make_server
+
+    socket_path = os.path.join(tempfile.mkdtemp(prefix='dcn-state-'), 'state.sock')
+
+    def peer_app(environ, start_response):
+        environ['REMOTE_ADDR'] = environ.pop('HTTP_X_DCN_PEER', '')
+        return app(environ, start_response)
+
+    tracker = InFlightTracker()
+    server = make_server(f"unix://{socket_path}", 0, tracked(peer_app, tracker),
+                         threaded=args.threads > 1)
+    server.daemon_threads = False
+    parent = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        def watch_parent():
+            while os.getppid() == parent:
+                time.sleep(1)
+            server.shutdown()
+        threading.Thread(target=watch_parent, daemon=True).start()
+        serve_until_signalled(server, tracker, args.graceful_timeout)
+        os._exit(0)
+    server.socket.close()
+    logging.info(f"State worker {pid} serving stateful endpoints on {socket_path}")
+    return pid, socket_path
+
+
+def stop_state_worker(pid, socket_path, owner):
+    """Stop the state worker and remove its socket (only from the process that started it)."""
+    if os.getpid() != owner:
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
+    shutil.rmtree(os.path.dirname(socket_path), ignore_errors=True)
+
+
+def prewarm(app_module):
+    """Build the expensive shared state before workers are forked."""
+    timings = {}
+
+    start = time.perf_counter()
+    app_module.load_sample_network()  # Converges and seeds the shared topology cache
+    timings['sample_network'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from tcp_reno_simulator import TCPRenoSimulator
+    simulator = TCPRenoSimulator(max_time=10, seed=0)
+    simulator.plot_results(simulator.simulate_transmission(10000), return_base64=True)
+    timings['matplotlib'] = time.perf_counter() - start  # Font cache, Agg backend, pyplot
+
+    start = time.perf_counter()
+    from playfair_cipher import encrypt, decrypt
+    decrypt(encrypt('PREWARM', 'NETWORK'), 'NETWORK')
+    timings['playfair'] = time.perf_counter() - start
+
+    for stage, seconds in timings.items():
+        logging.info(f"Pre-warmed {stage} in {seconds * 1000:.1f} ms")
+    return timings
+
+
+def load_app():
+    import app as app_module
+    prewarm(app_module)
+    return app_module.app
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class DCNApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{args.host}:{args.port}")
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread' if args.threads > 1 else 'sync')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('graceful_timeout', args.graceful_timeout)
+            self.cfg.set('timeout', args.timeout)
+
+        def load(self):
+            app = load_app()
+            if args.workers <= 1:
+                return app
+            pid, socket_path = start_state_worker(app, args)
+            # Gunicorn workers inherit this handler; only the master acts on it
+            atexit.register(stop_state_worker, pid, socket_path, os.getpid())
+            return state_proxy(app, socket_path, args.timeout)
+
+    DCNApplication().run()
+
+
+def run_builtin(args):
+    """Pre-forking server on werkzeug for hosts without gunicorn."""
+    from werkzeug.serving import make_server
+
+    app = load_app()
+    if args.workers <= 1:
+        tracker = InFlightTracker()
+        server = make_server(args.host, args.port, tracked(app, tracker), threaded=args.threads > 1)
+        server.daemon_threads = False
+        serve_until_signalled(server, tracker, args.graceful_timeout)
+        return
+
+    # Forked before the public socket is bound, so it only serves the Unix socket
+    state_pid, socket_path = start_state_worker(app, args)
+    tracker = InFlightTracker()
+    server = make_server(args.host, args.port, tracked(state_proxy(app, socket_path, args.timeout), tracker),
+                         threaded=args.threads > 1)
+    server.daemon_threads = False
+
+    children = [state_pid]
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            serve_until_signalled(server, tracker, args.graceful_timeout)
+            os._exit(0)
+        children.append(pid)
+    logging.info(f"Serving on {args.host}:{args.port} with {len(children) - 1} workers")
+
+    def forward(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    for pid in children:
+        os.waitpid(pid, 0)
+    server.server_close()
+    shutil.rmtree(os.path.dirname(socket_path), ignore_errors=True)
+
+
+def measure_startup(target_ms=HEALTH_COLD_START_TARGET_MS, top=15):
+    """
+    Report cold-start cost of the API in a fresh interpreter.
+
+    Runs a probe under `python -X importtime`, prints the cumulative import
+    cost of each top-level module and the wall time from process launch to
+    the first /api/health response, and compares it against target_ms.
+
+    Returns:
+        True if the cold start met the target
+    """
+    launched = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _STARTUP_PROBE],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    wall_ms = (time.perf_counter() - launched) * 1000
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        return False
+
+    # Lines look like "import time: self [us] | cumulative | <indent>name"
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if cumulative.strip().isdigit() and depth <= 1:
+            # Depth 0 is the probe's own imports, depth 1 what they pull in directly
+            modules.append((int(cumulative) / 1000, '  ' * depth + name.strip()))
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print("Imports by cumulative cost (top level and direct dependencies):")
+    for ms, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    print(f"\nImport app:          {probe['import_ms']:8.1f} ms")
+    print(f"First /api/health:   {probe['first_health_ms']:8.1f} ms")
+    print(f"Process cold start:  {wall_ms:8.1f} ms (target {target_ms} ms)")
+    met = wall_ms <= target_ms and probe['status'] == 200
+    print("Cold start target met" if met else "Cold start target MISSED")
+    return met
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the DCN API in production mode")
+    parser.add_argument('--host', default=os.environ.get('DCN_HOST', DEFAULT_HOST))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DCN_PORT', DEFAULT_PORT)))
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('DCN_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('DCN_THREADS', 4)))
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help="Seconds to let in-flight simulations finish on shutdown")
+    parser.add_argument('--timeout', type=int, default=300,
+                        help="Worker timeout for long simulations (gunicorn only)")
+    parser.add_argument('--server', choices=('auto', 'gunicorn', 'builtin'), default='auto')
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="Report per-module import cost and cold-start time, then exit")
+    parser.add_argument('--startup-target-ms', type=float, default=HEALTH_COLD_START_TARGET_MS)
+    args = parser.parse_args(argv)
+
+    if args.measure_startup:
+        return 0 if measure_startup(args.startup_target_ms) else 1
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(process)d] %(message)s')
+
+    server = args.server
+    if server == 'auto':
+        try:
+            import gunicorn  # noqa: F401
+            server = 'gunicorn'
+        except ImportError:
+            server = 'builtin'
+
+    if server == 'gunicorn':
+        run_gunicorn(args)
+    else:
+        run_builtin(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,396 @@
+import json
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from rip_simulator import RIPNetwork, Node, is_area_destination
+from tcp_reno_simulator import TCPRenoSimulator
+
+# Snapshots of RIP and TCP simulations, so long runs can stop and resume
+# (e.g. across worker restarts) and converged states can be forked into
+# what-if variants without recomputing the prefix.
+#
+# A checkpoint is one compressed .npz file: a JSON header (kind, options,
+# scalar state, RNG state) plus flat arrays for routing tables, links and
+# histories. Files are written to a temporary name and renamed into place,
+# so a crash mid-write leaves the previous checkpoint intact.
+
+CHECKPOINT_DIR = os.environ.get('DCN_CHECKPOINT_DIR') or os.path.join(tempfile.gettempdir(), 'dcn-checkpoints')
+CHECKPOINT_KINDS = ('rip', 'tcp')
+
+_CHECKPOINT_ID = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+_TCP_STATES = ('slow_start', 'congestion_avoidance', 'fast_recovery')
+
+# TCP simulator attributes restored verbatim, on top of the constructor defaults
+_TCP_FIELDS = ('mss', 'cwnd', 'ssthresh', 'max_time', 'packet_loss_rate', 'max_cwnd', 'seed',
+               'time', 'state', 'dup_acks', 'total_packets_sent', 'packets_lost',
+               'packet_loss_events', 'data_size', 'remaining_data')
+_LONG_HORIZON_FIELDS = ('max_points', 'timeout_probability', 'history_stride', '_next_sample')
+
+
+def _integral(values):
+    finite = values[np.isfinite(values)]
+    return bool(np.all(finite == np.round(finite)))
+
+
+def _number(value, integral):
+    return int(value) if integral and np.isfinite(value) else float(value)
+
+
+def rip_snapshot(network, status='running'):
+    """
+    Capture a RIPNetwork mid-run: links, routing tables, pending triggered
+    updates, the round counter and round statistics.
+
+    Returns:
+        (header, arrays) for CheckpointStore.save
+    """
+    ids = list(network.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    summaries = sorted({dest for node in network.nodes.values() for dest in node.routing_table
+                        if dest not in index and is_area_destination(dest)})
+    destinations = {dest: i for i, dest in enumerate(ids + summaries)}
+
+    link_source, link_target, link_cost = [], [], []
+    table_node, table_dest, table_hop, table_distance = [], [], [], []
+    dirty_node, dirty_dest = [], []
+    for i, (node_id, node) in enumerate(network.nodes.items()):
+        for neighbor_id, cost in node.neighbors.items():
+            link_source.append(i)
+            link_target.append(index[neighbor_id])
+            link_cost.append(cost)
+        for dest, (next_hop, distance) in node.routing_table.items():
+            table_node.append(i)
+            table_dest.append(destinations[dest])
+            table_hop.append(-1 if next_hop is None else index[next_hop])
+            table_distance.append(distance)
+        for dest in node.dirty:
+            if dest in destinations:
+                dirty_node.append(i)
+                dirty_dest.append(destinations[dest])
+
+    arrays = {
+        'link_source': np.array(link_source, dtype=np.int32),
+        'link_target': np.array(link_target, dtype=np.int32),
+        'link_cost': np.array(link_cost, dtype=np.float64),
+        'table_node': np.array(table_node, dtype=np.int32),
+        'table_dest': np.array(table_dest, dtype=np.int32),
+        'table_hop': np.array(table_hop, dtype=np.int32),
+        'table_distance': np.array(table_distance, dtype=np.float64),
+        'dirty_node': np.array(dirty_node, dtype=np.int32),
+        'dirty_dest': np.array(dirty_dest, dtype=np.int32)
+    }
+    header = {
+        'kind': 'rip',
+        'status': status,
+        'ids': ids,
+        'summaries': summaries,
+        'options': {
+            'infinity': network.infinity,
+            'split_horizon': network.split_horizon,
+            'poisoned_reverse': network.poisoned_reverse,
+            'cost_bound': network.cost_bound
+        },
+        'integral_costs': _integral(arrays['link_cost']),
+        'integral_distances': _integral(arrays['table_distance']),
+        'areas': [[node_id, area] for node_id, area in network.areas.items()],
+        'round': network.rip_round,
+        'periodic': network.rip_periodic,
+        'round_stats': network.round_stats,
+        'suppressed_messages': network.suppressed_messages,
+        'progress': {'round': network.rip_round, 'nodes': len(ids)}
+    }
+    return header, arrays
+
+
+def restore_rip(header, arrays):
+    """Rebuild a RIPNetwork from rip_snapshot output, ready for simulate_rip(resume=True)."""
+    options = header['options']
+    network = RIPNetwork(**options)
+    ids = header['ids']
+    destinations = ids + header['summaries']
+    for node_id in ids:
+        network.nodes[node_id] = Node(node_id, network.infinity)
+    nodes = [network.nodes[node_id] for node_id in ids]
+
+    integral = header['integral_costs']
+    for i, j, cost in zip(arrays['link_source'].tolist(), arrays['link_target'].tolist(),
+                          arrays['link_cost'].tolist()):
+        nodes[i].neighbors[ids[j]] = _number(cost, integral)
+    integral = header['integral_distances']
+    for i, d, hop, distance in zip(arrays['table_node'].tolist(), arrays['table_dest'].tolist(),
+                                   arrays['table_hop'].tolist(), arrays['table_distance'].tolist()):
+        nodes[i].routing_table[destinations[d]] = (None if hop < 0 else ids[hop], _number(distance, integral))
+    for i, d in zip(arrays['dirty_node'].tolist(), arrays['dirty_dest'].tolist()):
+        nodes[i].dirty.add(destinations[d])
+    network.fit_infinity()  # Recover the largest link cost for later edits
+
+    if header['areas']:
+        for node_id, area in header['areas']:
+            network._assign_area(network.nodes[node_id], area)
+    network.rip_round = header['round']
+    network.rip_periodic = header['periodic']
+    network.round_stats = header['round_stats']
+    network.suppressed_messages = header['suppressed_messages']
+    network.mark_all_changed()  # A restored network is a new epoch for API clients
+    return network
+
+
+def tcp_snapshot(simulator, status='running'):
+    """
+    Capture a TCP simulator mid-transfer: window state, counters, RNG state
+    and the (possibly downsampled) histories so far.
+
+    Returns:
+        (header, arrays) for CheckpointStore.save
+    """
+    from tcp_long_horizon import LongHorizonTCPSimulator
+    long_horizon = isinstance(simulator, LongHorizonTCPSimulator)
+    fields = _TCP_FIELDS + (_LONG_HORIZON_FIELDS if long_horizon else ())
+    version, internal, gauss = simulator.rng.getstate()
+    header = {
+        'kind': 'tcp',
+        'status': status,
+        'simulator': 'long_horizon' if long_horizon else 'reno',
+        'state': {field: getattr(simulator, field) for field in fields},
+        'rng': [version, None, gauss],
+        'progress': {'time': simulator.time, 'remaining_data': simulator.remaining_data,
+                     'data_size': simulator.data_size}
+    }
+    arrays = {
+        'cwnd': np.array(simulator.cwnd_history, dtype=np.float64),
+        'ssthresh': np.array(simulator.ssthresh_history, dtype=np.int64),
+        'state': np.array([_TCP_STATES.index(state) for state in simulator.state_history], dtype=np.uint8),
+        'time': np.array(simulator.time_history, dtype=np.int64),
+        'rtt': np.array(simulator.rtt_history, dtype=np.float64),
+        'rng_internal': np.array(internal, dtype=np.uint32)
+    }
+    return header, arrays
+
+
+def restore_tcp(header, arrays):
+    """Rebuild a TCP simulator from tcp_snapshot output, ready for simulate_transmission(resume=True)."""
+    if header['simulator'] == 'long_horizon':
+        from tcp_long_horizon import LongHorizonTCPSimulator
+        simulator = LongHorizonTCPSimulator()
+    else:
+        simulator = TCPRenoSimulator()
+    for field, value in header['state'].items():
+        setattr(simulator, field, value)
+    version, _, gauss = header['rng']
+    simulator.rng.setstate((version, tuple(arrays['rng_internal'].tolist()), gauss))
+    simulator.cwnd_history = arrays['cwnd'].tolist()
+    simulator.ssthresh_history = arrays['ssthresh'].tolist()
+    simulator.state_history = [_TCP_STATES[code] for code in arrays['state'].tolist()]
+    simulator.time_history = arrays['time'].tolist()
+    simulator.rtt_history = arrays['rtt'].tolist()
+    return simulator
+
+
+class CheckpointStore:
+    """Checkpoint files in one directory, addressed by id."""
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        self.directory = directory
+
+    def path(self, checkpoint_id):
+        if not _CHECKPOINT_ID.match(str(checkpoint_id)):
+            raise ValueError("Checkpoint ids are 1-64 letters, digits, '.', '_' or '-'")
+        return os.path.join(self.directory, f"{checkpoint_id}.npz")
+
+    def exists(self, checkpoint_id):
+        return os.path.exists(self.path(checkpoint_id))
+
+    def save(self, checkpoint_id, header, arrays):
+        """Write a checkpoint atomically, replacing any earlier one with this id."""
+        path = self.path(checkpoint_id)
+        os.makedirs(self.directory, exist_ok=True)
+        header = dict(header, id=checkpoint_id, saved=time.time())
+        encoded = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, __header__=encoded, **arrays)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        return path
+
+    def load(self, checkpoint_id, header_only=False):
+        """Return (header, arrays) of a checkpoint; KeyError when it does not exist."""
+        path = self.path(checkpoint_id)
+        if not os.path.exists(path):
+            raise KeyError(checkpoint_id)
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data['__header__'].tobytes().decode('utf-8'))
+            arrays = {} if header_only else {name: data[name] for name in data.files if name != '__header__'}
+        return header, arrays
+
+    def describe(self, checkpoint_id):
+        header, _ = self.load(checkpoint_id, header_only=True)
+        return {
+            'id': checkpoint_id,
+            'kind': header['kind'],
+            'status': header['status'],
+            'saved': header['saved'],
+            'bytes': os.path.getsize(self.path(checkpoint_id)),
+            'progress': header['progress'],
+            'parent': header.get('parent')
+        }
+
+    def list(self):
+        if not os.path.isdir(self.directory):
+            return []
+        ids = sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith('.npz'))
+        return [self.describe(checkpoint_id) for checkpoint_id in ids]
+
+    def delete(self, checkpoint_id):
+        path = self.path(checkpoint_id)
+        if not os.path.exists(path):
+            raise KeyError(checkpoint_id)
+        os.unlink(path)
+
+
+def run_rip_job(store, job_id, network=None, max_iterations=100, checkpoint_every=10):
+    """
+    Converge a RIP network, checkpointing every `checkpoint_every` rounds.
+
+    If a checkpoint for `job_id` exists the run resumes from it (and
+    `network` is ignored); otherwise `network` starts from fresh tables.
+    `max_iterations` counts rounds from the start of the job, so a stopped
+    job continues when re-run with a larger limit; re-running a converged
+    job only reports its result.
+
+    Returns:
+        (network, summary dict)
+    """
+    resumed_from = None
+    if store.exists(job_id):
+        header, arrays = store.load(job_id)
+        if header['kind'] != 'rip':
+            raise ValueError(f"Checkpoint {job_id} is not a RIP checkpoint")
+        network = restore_rip(header, arrays)
+        resumed_from = network.rip_round
+        if header['status'] == 'converged':
+            return network, _rip_summary(job_id, network, True, resumed_from)
+    elif network is None:
+        raise ValueError("A new RIP job needs a network")
+    else:
+        for node in network.nodes.values():
+            node.reset_routing_table()
+        network.initialize_routing_tables()
+
+    def on_round(iteration, stats):
+        if checkpoint_every and iteration % checkpoint_every == 0:
+            store.save(job_id, *rip_snapshot(network))
+
+    converged = network.simulate_rip(max_iterations, verbose=False, on_round=on_round,
+                                     resume=resumed_from is not None)
+    store.save(job_id, *rip_snapshot(network, 'converged' if converged else 'stopped'))
+    return network, _rip_summary(job_id, network, converged, resumed_from)
+
+
+def _rip_summary(job_id, network, converged, resumed_from):
+    return {
+        'checkpoint_id': job_id,
+        'converged': converged,
+        'rounds': network.rip_round,
+        'resumed_from_round': resumed_from,
+        'entries_sent': sum(stats['entries_sent'] for stats in network.round_stats),
+        'table_entries': sum(len(node.routing_table) for node in network.nodes.values())
+    }
+
+
+def fork_rip(store, checkpoint_id, events, save_as=None, max_iterations=500):
+    """
+    Apply link events (rip_scenarios format) to a checkpointed network and
+    re-converge it incrementally, leaving the checkpoint untouched.
+
+    Returns:
+        (network, summary dict)
+    """
+    from rip_scenarios import apply_event
+
+    header, arrays = store.load(checkpoint_id)
+    if header['kind'] != 'rip':
+        raise ValueError(f"Checkpoint {checkpoint_id} is not a RIP checkpoint")
+    network = restore_rip(header, arrays)
+    original_costs = {}
+    for event in events:
+        apply_event(network, event, original_costs)
+    start_round = network.rip_round
+    converged = network.simulate_rip(start_round + max_iterations, verbose=False, resume=True)
+    summary = _rip_summary(save_as, network, converged, start_round)
+    summary['fork_rounds'] = network.rip_round - start_round
+    summary['parent'] = checkpoint_id
+    if save_as:
+        snapshot, snapshot_arrays = rip_snapshot(network, 'converged' if converged else 'stopped')
+        store.save(save_as, dict(snapshot, parent=checkpoint_id), snapshot_arrays)
+    return network, summary
+
+
+def run_tcp_job(store, job_id, simulator=None, data_size=None, checkpoint_every=None):
+    """
+    Run a TCP transfer, checkpointing every `checkpoint_every` RTTs; resumes
+    from an existing checkpoint for `job_id` like run_rip_job.
+
+    Returns:
+        (results dict, resumed-from time or None)
+    """
+    resumed_from = None
+    if store.exists(job_id):
+        header, arrays = store.load(job_id)
+        if header['kind'] != 'tcp':
+            raise ValueError(f"Checkpoint {job_id} is not a TCP checkpoint")
+        simulator = restore_tcp(header, arrays)
+        resumed_from = simulator.time
+    elif simulator is None:
+        raise ValueError("A new TCP job needs a simulator")
+
+    results = simulator.simulate_transmission(
+        data_size, resume=resumed_from is not None, checkpoint_every=checkpoint_every,
+        on_checkpoint=lambda sim: store.save(job_id, *tcp_snapshot(sim)))
+    store.save(job_id, *tcp_snapshot(simulator, 'complete'))
+    return results, resumed_from
+
+
+def fork_tcp(store, checkpoint_id, overrides, save_as=None):
+    """
+    Continue a checkpointed TCP transfer under changed conditions
+    (packet_loss_rate, max_cwnd, max_time, timeout_probability for
+    long-horizon runs, or a new `seed` for the loss RNG), leaving the
+    checkpoint untouched.
+
+    Returns:
+        results dict of the forked run
+    """
+    import random
+
+    header, arrays = store.load(checkpoint_id)
+    if header['kind'] != 'tcp':
+        raise ValueError(f"Checkpoint {checkpoint_id} is not a TCP checkpoint")
+    simulator = restore_tcp(header, arrays)
+    if overrides.get('packet_loss_rate') is not None:
+        simulator.packet_loss_rate = max(0.0, min(1.0, float(overrides['packet_loss_rate'])))
+    if overrides.get('max_cwnd') is not None:
+        simulator.max_cwnd = max(1.0, float(overrides['max_cwnd']))
+    if overrides.get('max_time') is not None:
+        simulator.max_time = max(simulator.time, int(overrides['max_time']))
+    if overrides.get('timeout_probability') is not None and hasattr(simulator, 'timeout_probability'):
+        simulator.timeout_probability = max(0.0, min(1.0, float(overrides['timeout_probability'])))
+    if overrides.get('seed') is not None:
+        simulator.seed = overrides['seed']
+        simulator.rng = random.Random(overrides['seed'])
+    start = simulator.time
+    results = simulator.simulate_transmission(None, resume=True)
+    results['forked_at'] = start
+    results['parent'] = checkpoint_id
+    if save_as:
+        snapshot, snapshot_arrays = tcp_snapshot(simulator, 'complete')
+        store.save(save_as, dict(snapshot, parent=checkpoint_id), snapshot_arrays)
+    return results
@@ -189,10 +189,15 @@ print_success "Ports are ready"
 # Start servers
 print_status "Starting servers..."
 
-# Start backend in background
-print_info "Starting Flask backend server on port 8003..."
-export FLASK_ENV=development
-nohup python3 app.py > backend.log 2>&1 &
+# Start backend in background (DCN_PRODUCTION=1 uses the multi-worker server)
+if [ "${DCN_PRODUCTION:-0}" = "1" ]; then
+    print_info "Starting production backend server on port 8003..."
+    nohup python3 serve.py --port 8003 > backend.log 2>&1 &
+else
+    print_info "Starting Flask backend server on port 8003..."
+    export FLASK_ENV=development
+    nohup python3 app.py > backend.log 2>&1 &
+fi
 BACKEND_PID=$!
 
 # Wait a moment for backend to start
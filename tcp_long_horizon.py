@@ -0,0 +1,247 @@
+import math
+
+import numpy as np
+
+from metrics import timed
+from tcp_reno_simulator import TCPRenoSimulator
+
+# Loss-free stretches shorter than this are stepped exactly
+EXACT_STEPS = 32
+
+
+class LongHorizonTCPSimulator(TCPRenoSimulator):
+    """
+    TCP Reno simulator for multi-GB transfers over millions of RTTs.
+
+    Instead of drawing a loss decision every RTT, the gap to the next loss
+    event is sampled directly from the geometric distribution and the
+    deterministic slow start / congestion avoidance growth in between is
+    fast-forwarded in closed form. Slow start is exact; congestion avoidance
+    uses the continuous solution cwnd(t) = sqrt(cwnd0^2 + 2t) of the
+    cwnd += 1/cwnd recurrence. Histories are kept as a streaming sample whose
+    stride doubles whenever max_points is reached, so memory stays bounded.
+    """
+
+    def __init__(self, mss=1460, initial_cwnd=1, ssthresh=65535, max_time=10_000_000,
+                 packet_loss_rate=0.0001, max_cwnd=None, max_points=2000,
+                 timeout_probability=0.3, seed=None):
+        super().__init__(mss=mss, initial_cwnd=initial_cwnd, ssthresh=ssthresh,
+                         max_time=max_time, packet_loss_rate=packet_loss_rate,
+                         max_cwnd=max_cwnd, seed=seed)
+        self.max_points = max(2, int(max_points))
+        self.timeout_probability = timeout_probability
+        self.history_stride = 1
+        self._next_sample = 0
+
+    def _loss_free_steps(self):
+        """Sample the number of loss-free RTTs before the next loss event."""
+        p = self.packet_loss_rate
+        if p <= 0.0:
+            return self.max_time
+        if p >= 1.0:
+            return 0
+        return int(math.log(1.0 - self.rng.random()) / math.log1p(-p))
+
+    def _decimate(self):
+        """Halve the stored history and double the sampling stride."""
+        for history in (self.cwnd_history, self.ssthresh_history,
+                        self.state_history, self.time_history):
+            history[:] = history[::2]
+        self.history_stride *= 2
+
+    def _sample(self):
+        """Record the current step if it falls on the sampling stride."""
+        if self.time < self._next_sample:
+            return
+        if len(self.time_history) >= self.max_points:
+            self._decimate()
+        self.cwnd_history.append(float(self.cwnd))
+        self.ssthresh_history.append(int(self.ssthresh))
+        self.state_history.append(self.state)
+        self.time_history.append(self.time)
+        self._next_sample = self.time + self.history_stride
+
+    def _sample_segment(self, steps, window_at):
+        """Record stride-aligned points inside a fast-forwarded segment."""
+        end = self.time + steps
+        start = max(self._next_sample, self.time)
+        if start >= end:
+            return
+        while -(-(end - start) // self.history_stride) > self.max_points - len(self.time_history):
+            self._decimate()
+        times = np.arange(start, end, self.history_stride)
+        self.cwnd_history.extend(window_at(times - self.time).tolist())
+        self.ssthresh_history.extend([int(self.ssthresh)] * len(times))
+        self.state_history.extend([self.state] * len(times))
+        self.time_history.extend(times.tolist())
+        self._next_sample = int(times[-1]) + self.history_stride
+
+    def _packets_for(self, remaining_data):
+        return max(1, min(int(self.cwnd), (remaining_data + self.mss - 1) // self.mss))
+
+    def _exact_step(self, remaining_data, loss):
+        """Advance one RTT exactly as TCPRenoSimulator does."""
+        self._sample()
+        packets_to_send = self._packets_for(remaining_data)
+        self.total_packets_sent += packets_to_send
+
+        if loss:
+            is_timeout = self.rng.random() < self.timeout_probability
+            self._handle_packet_loss(is_timeout)
+            self.packets_lost += 1
+            acked_packets = 0 if is_timeout else max(0, packets_to_send - 1)
+        else:
+            acked_packets = packets_to_send
+            self._update_cwnd(ack_received=True)
+
+        self.time += 1
+        return max(0, remaining_data - min(acked_packets * self.mss, remaining_data))
+
+    def _slow_start_segment(self):
+        """Return (phase length, cumulative packets fn, window fn) for slow start."""
+        c, cap = self.cwnd, self.max_cwnd
+        length = math.inf if cap < self.ssthresh else max(1, math.ceil(self.ssthresh - c))
+        capped_after = math.inf if math.isinf(cap) else max(0, math.ceil(cap - c))
+
+        def packets(j):
+            a = min(j, capped_after)
+            return a * int(c) + a * (a - 1) // 2 + (0 if a == j else (j - a) * int(cap))
+
+        def window_at(i):
+            return np.minimum(c + i, cap)
+
+        return length, packets, window_at
+
+    def _congestion_avoidance_segment(self):
+        """Return (phase length, cumulative packets fn, window fn) for congestion avoidance."""
+        c, cap = self.cwnd, self.max_cwnd
+        base = c * c
+        capped_after = math.inf if math.isinf(cap) else max(0, math.ceil((cap * cap - base) / 2))
+
+        def packets(j):
+            a = min(j, capped_after)
+            end = math.sqrt(base + 2 * a)
+            # Trapezoid-corrected integral of sqrt(c^2 + 2t), minus 0.5 per step for floor()
+            total = ((base + 2 * a) ** 1.5 - c ** 3) / 3 - (end - c) / 2 - 0.5 * a
+            if a < j:
+                total += (j - a) * int(cap)
+            return max(j, int(round(total)))
+
+        def window_at(i):
+            return np.minimum(np.sqrt(base + 2 * i), cap)
+
+        return math.inf, packets, window_at
+
+    def _advance(self, remaining_data, steps):
+        """Fast-forward up to `steps` loss-free RTTs, stopping when data runs out."""
+        while steps > 0 and remaining_data > 0:
+            remaining_packets = (remaining_data + self.mss - 1) // self.mss
+            if (self.state == "fast_recovery" or steps <= EXACT_STEPS
+                    or remaining_packets <= int(self.cwnd)):
+                remaining_data = self._exact_step(remaining_data, loss=False)
+                steps -= 1
+                continue
+
+            if self.state == "slow_start":
+                length, packets, window_at = self._slow_start_segment()
+            else:
+                length, packets, window_at = self._congestion_avoidance_segment()
+            m = int(min(steps, length))
+
+            if packets(m) >= remaining_packets:
+                # Transfer completes inside this segment: find the finishing step
+                lo, hi = 1, m
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if packets(mid) >= remaining_packets:
+                        hi = mid
+                    else:
+                        lo = mid + 1
+                m = lo
+                sent = remaining_packets
+                remaining_data = 0
+            else:
+                sent = packets(m)
+                remaining_data -= sent * self.mss
+
+            self._sample_segment(m, window_at)
+            self.cwnd = max(1.0, float(window_at(np.float64(m))))
+            if self.state == "slow_start" and m == length:
+                self.state = "congestion_avoidance"
+            self.total_packets_sent += sent
+            self.time += m
+            steps -= m
+
+        return remaining_data
+
+    @timed('tcp_long_horizon')
+    def simulate_transmission(self, data_size, trace=None, resume=False, checkpoint_every=None,
+                              on_checkpoint=None):
+        """
+        Simulate a long TCP Reno transfer with bounded-memory histories.
+
+        Args:
+            data_size: Size of data to transmit in bytes
+            trace: Not supported in long-horizon mode
+            resume, checkpoint_every, on_checkpoint: As for TCPRenoSimulator;
+                checkpoints fall after the loss event that crosses each
+                multiple of checkpoint_every RTTs
+
+        Returns:
+            Dictionary with the same fields as TCPRenoSimulator, with
+            downsampled histories and the final sampling stride
+        """
+        if trace is not None:
+            raise ValueError("Trace replay is not supported in long-horizon mode")
+
+        if not resume:
+            self.cwnd = max(1, float(self.cwnd))
+            self.cwnd_history = []
+            self.ssthresh_history = []
+            self.state_history = []
+            self.time_history = []
+            self.history_stride = 1
+            self._next_sample = 0
+            self.time = 0
+            self.total_packets_sent = 0
+            self.packets_lost = 0
+            self.packet_loss_events = 0
+            self.state = "slow_start"
+            self.dup_acks = 0
+            self.data_size = max(1, int(data_size))
+            self.remaining_data = self.data_size
+
+        data_size = self.data_size
+        remaining_data = self.remaining_data
+        next_checkpoint = self.time + checkpoint_every if checkpoint_every else None
+
+        while remaining_data > 0 and self.time < self.max_time:
+            gap = min(self._loss_free_steps(), self.max_time - self.time)
+            remaining_data = self._advance(remaining_data, gap)
+            if remaining_data == 0 or self.time >= self.max_time:
+                break
+            remaining_data = self._exact_step(remaining_data, loss=True)
+            self.remaining_data = remaining_data
+            if next_checkpoint is not None and self.time >= next_checkpoint and on_checkpoint is not None:
+                on_checkpoint(self)
+                next_checkpoint = self.time + checkpoint_every
+        self.remaining_data = remaining_data
+
+        return {
+            "cwnd_history": self.cwnd_history,
+            "ssthresh_history": self.ssthresh_history,
+            "state_history": self.state_history,
+            "time_history": self.time_history,
+            "time_taken": self.time,
+            "time_steps": self.time,
+            "total_packets_sent": self.total_packets_sent,
+            "packets_lost": self.packets_lost,
+            "packet_loss_events": self.packet_loss_events,
+            "data_size": data_size,
+            "data_transmitted": data_size - remaining_data,
+            "transmission_complete": remaining_data == 0,
+            "final_cwnd": self.cwnd,
+            "final_ssthresh": self.ssthresh,
+            "history_stride": self.history_stride,
+            "long_horizon": True
+        }
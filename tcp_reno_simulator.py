@@ -1,12 +1,12 @@
 import random
-import matplotlib.pyplot as plt
-import numpy as np
-from matplotlib.patches import Patch
 import base64
+import itertools
 import io
+from metrics import timed
 
 class TCPRenoSimulator:
-    def __init__(self, mss=1460, initial_cwnd=1, ssthresh=65535, max_time=100, packet_loss_rate=0.05):
+    def __init__(self, mss=1460, initial_cwnd=1, ssthresh=65535, max_time=100, packet_loss_rate=0.05,
+                 max_cwnd=100, seed=None):
         """
         Initialize TCP Reno simulator.
         
@@ -16,12 +16,16 @@ class TCPRenoSimulator:
             ssthresh: Slow start threshold in MSS
             max_time: Maximum simulation time in steps
             packet_loss_rate: Probability of packet loss (0.0 to 1.0)
+            max_cwnd: Upper bound on the congestion window in MSS (None for no cap)
+            seed: Seed for the loss RNG; runs with the same seed are reproducible
         """
         self.mss = max(1, int(mss))
         self.cwnd = max(1, float(initial_cwnd))
         self.ssthresh = max(2, int(ssthresh))
         self.max_time = max(10, int(max_time))
         self.packet_loss_rate = max(0.0, min(1.0, float(packet_loss_rate)))
+        self.seed = seed
+        self.rng = random.Random(seed)
         
         # For tracking
         self.time = 0
@@ -35,12 +39,19 @@ class TCPRenoSimulator:
         self.packets_lost = 0
         self.packet_loss_events = 0
         
+        # Progress of the current run, kept here so it can be checkpointed
+        self.data_size = 0
+        self.remaining_data = 0
+        self.rtt_history = []
+        
         # Prevent infinite growth
-        self.max_cwnd = 100  # Maximum allowed congestion window
+        self.max_cwnd = float('inf') if max_cwnd is None else max(1, float(max_cwnd))
         
-    def _detect_packet_loss(self):
+    def _detect_packet_loss(self, loss_rate=None):
         """Simulate random packet loss."""
-        return random.random() < self.packet_loss_rate
+        if loss_rate is None:
+            loss_rate = self.packet_loss_rate
+        return self.rng.random() < loss_rate
         
     def _handle_packet_loss(self, is_timeout=False):
         """Handle packet loss based on whether it's a timeout or fast retransmit."""
@@ -96,39 +107,77 @@ class TCPRenoSimulator:
             self.cwnd = float(self.ssthresh)
             self.state = "congestion_avoidance"
             
-    def simulate_transmission(self, data_size):
+    @timed('tcp_simulation')
+    def simulate_transmission(self, data_size, trace=None, resume=False, checkpoint_every=None,
+                              on_checkpoint=None, history=True):
         """
         Simulate TCP Reno transmission of data.
         
         Args:
             data_size: Size of data to transmit in bytes
+            trace: Optional iterable of (loss_rate, rtt) records, one per RTT.
+                When given, each step draws its loss probability and delay from
+                the next record instead of the constant packet_loss_rate, and
+                the simulation stops early if the trace runs out.
+            resume: Continue the run held in this simulator's state (e.g.
+                restored from a checkpoint) instead of starting over;
+                data_size is ignored and the trace is skipped to the current step
+            checkpoint_every: Call on_checkpoint(self) every this many steps
+            history: Record the per-step histories; turn off for long trace
+                replays that only need the summary
             
         Returns:
             Dictionary with simulation results
         """
-        # Reset simulation state
-        self.cwnd = max(1, float(self.cwnd))
-        self.cwnd_history = []
-        self.ssthresh_history = []
-        self.state_history = []
-        self.time_history = []
-        self.time = 0
-        self.total_packets_sent = 0
-        self.packets_lost = 0
-        self.packet_loss_events = 0
-        self.state = "slow_start"
-        self.dup_acks = 0
+        if not resume:
+            # Reset simulation state
+            self.cwnd = max(1, float(self.cwnd))
+            self.cwnd_history = []
+            self.ssthresh_history = []
+            self.state_history = []
+            self.time_history = []
+            self.time = 0
+            self.total_packets_sent = 0
+            self.packets_lost = 0
+            self.packet_loss_events = 0
+            self.state = "slow_start"
+            self.dup_acks = 0
+            self.data_size = max(1, int(data_size))
+            self.remaining_data = self.data_size
+            self.rtt_history = []
         
-        data_size = max(1, int(data_size))
-        remaining_data = data_size
+        data_size = self.data_size
+        remaining_data = self.remaining_data
+        
+        # Trace-driven runs pull one (loss_rate, rtt) record per step
+        records = iter(trace) if trace is not None else None
+        if records is not None and resume:
+            records = itertools.islice(records, self.time, None)
+        rtt_history = self.rtt_history
+        elapsed_time = sum(rtt_history)
+        trace_exhausted = False
+        next_checkpoint = self.time + checkpoint_every if checkpoint_every else None
         
         # Continue until all data is sent or max time is reached
         while remaining_data > 0 and self.time < self.max_time:
+            if records is not None:
+                record = next(records, None)
+                if record is None:
+                    trace_exhausted = True
+                    break
+                step_loss_rate, step_rtt = record
+                elapsed_time += float(step_rtt)
+                if history:
+                    rtt_history.append(float(step_rtt))
+            else:
+                step_loss_rate = None
+                
             # Record current state
-            self.cwnd_history.append(float(self.cwnd))
-            self.ssthresh_history.append(int(self.ssthresh))
-            self.state_history.append(self.state)
-            self.time_history.append(self.time)
+            if history:
+                self.cwnd_history.append(float(self.cwnd))
+                self.ssthresh_history.append(int(self.ssthresh))
+                self.state_history.append(self.state)
+                self.time_history.append(self.time)
             
             # Calculate how many packets to send in this round
             packets_to_send = min(int(self.cwnd), (remaining_data + self.mss - 1) // self.mss)
@@ -136,12 +185,12 @@ class TCPRenoSimulator:
             self.total_packets_sent += packets_to_send
             
             # Check for packet loss
-            packet_loss = self._detect_packet_loss()
+            packet_loss = self._detect_packet_loss(step_loss_rate)
             
             if packet_loss:
                 # Simulate either timeout or fast recovery based on a random choice
                 # (In a real system, this would depend on whether duplicate ACKs are received)
-                is_timeout = random.random() < 0.3  # 30% chance of timeout
+                is_timeout = self.rng.random() < 0.3  # 30% chance of timeout
                 
                 self._handle_packet_loss(is_timeout)
                 self.packets_lost += 1
@@ -160,13 +209,17 @@ class TCPRenoSimulator:
             # Update remaining data
             data_acknowledged = min(acked_packets * self.mss, remaining_data)
             remaining_data = max(0, remaining_data - data_acknowledged)
+            self.remaining_data = remaining_data
             
             self.time += 1
+            if next_checkpoint is not None and self.time >= next_checkpoint and on_checkpoint is not None:
+                on_checkpoint(self)
+                next_checkpoint = self.time + checkpoint_every
             
         # Calculate time taken (in seconds, assuming each step is 1 RTT)
         time_taken = self.time  # seconds
         
-        return {
+        results = {
             "cwnd_history": self.cwnd_history,
             "ssthresh_history": self.ssthresh_history,
             "state_history": self.state_history,
@@ -183,6 +236,14 @@ class TCPRenoSimulator:
             "final_ssthresh": self.ssthresh
         }
         
+        if records is not None:
+            results["rtt_history"] = rtt_history
+            results["elapsed_time"] = elapsed_time
+            results["trace_exhausted"] = trace_exhausted
+            
+        return results
+        
+    @timed('tcp_plot')
     def plot_results(self, results=None, return_base64=False):
         """Plot the congestion window and slow start threshold over time."""
         if results is None:
@@ -195,6 +256,10 @@ class TCPRenoSimulator:
             
         if not results["cwnd_history"]:
             return None
+        
+        # Plotting stack is imported on first use to keep module import cheap
+        import matplotlib.pyplot as plt
+        from matplotlib.patches import Patch
             
         # Clear any existing plots
         plt.clf()
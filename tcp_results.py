@@ -0,0 +1,145 @@
+import base64
+import json
+import struct
+
+import numpy as np
+
+# Small integer codes for TCP Reno states
+STATE_CODES = {
+    "slow_start": 0,
+    "congestion_avoidance": 1,
+    "fast_recovery": 2
+}
+STATE_NAMES = {code: name for name, code in STATE_CODES.items()}
+
+# Framed binary response: magic, version, header length, JSON header, columns
+BINARY_MIMETYPE = 'application/x-tcp-sim'
+BINARY_MAGIC = b'TCPS'
+BINARY_VERSION = 1
+_FRAME_HEADER = struct.Struct('<4sBI')
+
+_HISTORY_KEYS = ("cwnd_history", "ssthresh_history", "state_history",
+                 "time_history", "rtt_history")
+
+
+def encode_states(state_history):
+    """Map a list of state names to a uint8 code array."""
+    return np.fromiter((STATE_CODES[state] for state in state_history),
+                       dtype=np.uint8, count=len(state_history))
+
+
+def run_length_segments(codes):
+    """Return [start, length, state_code] segments for a state code array."""
+    if len(codes) == 0:
+        return []
+    starts = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.concatenate((starts, [len(codes)])))
+    return [[int(s), int(n), int(codes[s])] for s, n in zip(starts, lengths)]
+
+
+def downsample_indices(length, max_points):
+    """Evenly spaced sample indices, always keeping the first and last step."""
+    if max_points is None or length <= max_points:
+        return np.arange(length)
+    max_points = max(2, int(max_points))
+    return np.unique(np.linspace(0, length - 1, max_points).round().astype(np.int64))
+
+
+def compact_results(results, max_points=None):
+    """
+    Convert simulate_transmission output to a columnar form.
+
+    Histories become NumPy columns (float32 cwnd and RTT, int64 ssthresh,
+    uint8 state codes),
+    state changes are run-length encoded at full resolution and the
+    duplicated time_steps field is dropped.
+
+    Args:
+        results: Dictionary returned by TCPRenoSimulator.simulate_transmission
+        max_points: Downsample the columns to at most this many points
+
+    Returns:
+        Tuple of (scalar fields dict, columns dict of NumPy arrays)
+    """
+    codes = encode_states(results.get("state_history", []))
+    length = len(results.get("cwnd_history", []))
+    indices = downsample_indices(length, max_points)
+
+    columns = {
+        "time": np.asarray(results.get("time_history", range(length)), dtype=np.int32)[indices],
+        "cwnd": np.asarray(results.get("cwnd_history", []), dtype=np.float32)[indices],
+        "ssthresh": np.asarray(results.get("ssthresh_history", []), dtype=np.int64)[indices],
+        "state": codes[indices]
+    }
+    if "rtt_history" in results:
+        columns["rtt"] = np.asarray(results["rtt_history"], dtype=np.float32)[indices]
+
+    fields = {key: value for key, value in results.items()
+              if key not in _HISTORY_KEYS and key != "time_steps"}
+    fields["history_length"] = length
+    fields["downsampled"] = len(indices) < length
+    fields["state_codes"] = STATE_CODES
+    fields["state_segments"] = run_length_segments(codes)
+    return fields, columns
+
+
+def to_base64_json(fields, columns):
+    """Compact JSON payload with each column as base64 little-endian data."""
+    payload = dict(fields)
+    payload["encoding"] = "base64"
+    payload["columns"] = {
+        name: {
+            "dtype": column.dtype.newbyteorder('<').str,
+            "length": len(column),
+            "data": base64.b64encode(column.astype(column.dtype.newbyteorder('<')).tobytes()).decode('ascii')
+        }
+        for name, column in columns.items()
+    }
+    return payload
+
+
+def to_binary_frame(fields, columns):
+    """
+    Pack results into the framed binary format.
+
+    Layout: 4-byte magic, uint8 version, uint32 header length, UTF-8 JSON
+    header (scalar fields plus column name/dtype/offset/length), then the
+    raw little-endian column bytes back to back.
+    """
+    descriptors = []
+    blobs = []
+    offset = 0
+    for name, column in columns.items():
+        data = column.astype(column.dtype.newbyteorder('<')).tobytes()
+        descriptors.append({
+            "name": name,
+            "dtype": column.dtype.newbyteorder('<').str,
+            "offset": offset,
+            "length": len(column)
+        })
+        blobs.append(data)
+        offset += len(data)
+
+    header = dict(fields)
+    header["columns"] = descriptors
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return b''.join([_FRAME_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(header_bytes)),
+                     header_bytes] + blobs)
+
+
+def from_binary_frame(frame):
+    """Decode a framed binary payload back into (header, columns)."""
+    magic, version, header_length = _FRAME_HEADER.unpack_from(frame, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a TCP simulation frame")
+    start = _FRAME_HEADER.size
+    header = json.loads(frame[start:start + header_length].decode('utf-8'))
+    body = memoryview(frame)[start + header_length:]
+    columns = {}
+    for column in header.pop("columns"):
+        dtype = np.dtype(column["dtype"])
+        columns[column["name"]] = np.frombuffer(
+            body, dtype=dtype, count=column["length"], offset=column["offset"]
+        )
+    return header, columns
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import struct
+import tempfile
+from array import array
+
+# Shared by every worker process of this user on the host; override to point
+# workers elsewhere. The directory is created private (0700) and ignored if
+# anyone else could write to it.
+TOPOLOGY_CACHE_DIR = os.environ.get(
+    'DCN_TOPOLOGY_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), f"dcn-topology-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+)
+TOPOLOGY_CACHE_ENTRIES = int(os.environ.get('DCN_TOPOLOGY_CACHE_ENTRIES', 256))
+TOPOLOGY_CACHE_BYTES = int(os.environ.get('DCN_TOPOLOGY_CACHE_BYTES', 512 * 1024 * 1024))
+
+# Networks at least this large converge on the partitioned engine when
+# DCN_RIP_WORKERS > 1 (see rip_parallel.py)
+RIP_WORKERS = int(os.environ.get('DCN_RIP_WORKERS', 1))
+PARALLEL_MIN_NODES = int(os.environ.get('DCN_RIP_PARALLEL_MIN_NODES', 500))
+
+_HEADER = struct.Struct('<I')
+
+
+def topology_key(network):
+    """Hash a RIPNetwork's nodes, link costs, areas and protocol options into a cache key."""
+    links = set()
+    for node_id, node in network.nodes.items():
+        for neighbor_id, distance in node.neighbors.items():
+            a, b = sorted((repr(node_id), repr(neighbor_id)))
+            links.add((a, b, repr(distance)))
+    options = (repr(network.infinity), network.split_horizon, network.poisoned_reverse,
+               sorted((repr(node_id), repr(area)) for node_id, area in network.areas.items()))
+    blob = repr((sorted(repr(node_id) for node_id in network.nodes), sorted(links), options))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def private_directory(path):
+    """Create `path` with mode 0700; returns False if it is not owned by us alone."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.stat(path)
+    except OSError:
+        return False
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        return False
+    return True
+
+
+def encode_tables(tables):
+    """
+    Serialize {node_id: {dest: (next_hop, distance)}} as a JSON header
+    (node ids, extra destinations) followed by flat int32/float64 arrays.
+    """
+    ids = list(tables)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    extra = sorted({dest for table in tables.values() for dest in table if dest not in index}, key=repr)
+    if any(not isinstance(node_id, (str, int)) or isinstance(node_id, bool) for node_id in ids + extra):
+        raise TypeError("Only string and integer node ids can be cached")
+    destinations = dict(index)
+    for i, dest in enumerate(extra):
+        destinations[dest] = len(ids) + i
+
+    rows, dests, hops, distances = array('i'), array('i'), array('i'), array('d')
+    for i, table in enumerate(tables.values()):
+        for dest, (next_hop, distance) in table.items():
+            rows.append(i)
+            dests.append(destinations[dest])
+            hops.append(-1 if next_hop is None else index[next_hop])
+            distances.append(distance)
+    integral = all(math.isinf(d) or d == int(d) for d in distances)
+    header = json.dumps({'ids': ids, 'extra': extra, 'count': len(rows), 'integral': integral}).encode('utf-8')
+    return b''.join((_HEADER.pack(len(header)), header, rows.tobytes(), dests.tobytes(),
+                     hops.tobytes(), distances.tobytes()))
+
+
+def decode_tables(blob):
+    """Inverse of encode_tables; raises ValueError on malformed input."""
+    (length,) = _HEADER.unpack_from(blob)
+    header = json.loads(blob[_HEADER.size:_HEADER.size + length].decode('utf-8'))
+    ids, extra, count = header['ids'], header['extra'], header['count']
+    columns = []
+    offset = _HEADER.size + length
+    for typecode in 'iiid':
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(blob[offset:offset + size])
+        if len(column) != count:
+            raise ValueError("Truncated topology cache entry")
+        columns.append(column)
+        offset += size
+    if offset != len(blob):
+        raise ValueError("Trailing data in topology cache entry")
+
+    rows, dests, hops, distances = columns
+    destinations = ids + extra
+    if count and (min(rows) < 0 or max(rows) >= len(ids) or min(dests) < 0
+                  or max(dests) >= len(destinations) or min(hops) < -1 or max(hops) >= len(ids)):
+        raise ValueError("Topology cache entry refers to unknown nodes")
+    tables = {node_id: {} for node_id in ids}
+    integral = header['integral']
+    for i, d, hop, distance in zip(rows, dests, hops, distances):
+        if integral and math.isfinite(distance):
+            distance = int(distance)
+        tables[ids[i]][destinations[d]] = (None if hop < 0 else ids[hop], distance)
+    return tables
+
+
+class TopologyCache:
+    """
+    On-disk cache of converged routing tables shared across worker processes.
+
+    Entries are encoded with encode_tables (data only, nothing executable)
+    and written atomically (temp file + rename), so concurrent workers never
+    see partial files and a topology converged by one worker is reused by
+    all the others. The least recently used entries are evicted beyond
+    `max_entries` or `max_bytes`.
+    """
+
+    def __init__(self, directory=TOPOLOGY_CACHE_DIR, max_entries=TOPOLOGY_CACHE_ENTRIES,
+                 max_bytes=TOPOLOGY_CACHE_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = private_directory(directory)
+        if not self.enabled:
+            logging.warning(f"Topology cache disabled: {directory} is not a private directory")
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.tables")
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                tables = decode_tables(f.read())
+            os.utime(path)  # Recently used entries survive eviction
+            return tables
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    def put(self, key, tables):
+        if not self.enabled:
+            return
+        try:
+            blob = encode_tables(tables)
+        except TypeError:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        try:
+            entries = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                       for entry in os.scandir(self.directory) if entry.name.endswith('.tables')]
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        total = 0
+        for count, (_, size, path) in enumerate(entries, 1):
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+def converge_network(network, cache=None, incremental=False):
+    """
+    Bring a RIPNetwork's routing tables to convergence, reusing cached tables.
+
+    Routing tables are rebuilt from the current links, so stale routes left
+    behind by earlier topology changes never leak into the result. With
+    incremental=True the existing tables are kept and RIP only propagates the
+    changes made in place (remove_link, remove_node, new links or nodes).
+
+    Returns:
+        True if the tables came from the cache, False if RIP was run
+    """
+    key = topology_key(network) if cache is not None else None
+    if key is not None:
+        tables = cache.get(key)
+        if tables is not None:
+            # Version only the entries the cached tables actually change
+            for node_id, table in tables.items():
+                node = network.nodes[node_id]
+                old = node.routing_table
+                node.dirty = {dest for dest, route in table.items() if old.get(dest) != route}
+                node.routing_table = dict(table)
+            network.stamp_changes()
+            for node in network.nodes.values():
+                node.dirty = set()
+            return True
+
+    if not incremental:
+        for node in network.nodes.values():
+            node.reset_routing_table()
+    network.initialize_routing_tables()
+    if RIP_WORKERS > 1 and len(network.nodes) >= PARALLEL_MIN_NODES and not network.areas:
+        from rip_parallel import simulate_rip_parallel
+        simulate_rip_parallel(network, RIP_WORKERS)
+    else:
+        network.simulate_rip(verbose=False)
+
+    if key is not None:
+        cache.put(key, {node_id: node.routing_table for node_id, node in network.nodes.items()})
+    return False
@@ -0,0 +1,258 @@
+import csv
+import io
+import json
+import struct
+from xml.etree import ElementTree
+from xml.sax.saxutils import quoteattr
+
+from topology_ingest import TopologyIngest
+
+FORMATS = ('csv', 'graphml', 'csr')
+MIMETYPES = {
+    'csv': 'text/csv',
+    'graphml': 'application/graphml+xml',
+    'csr': 'application/octet-stream'
+}
+
+# CSR layout: magic, uint32 header length, JSON header (node ids, dtypes),
+# then int64 indptr[n+1], int32 indices[m] and weights[m], all little-endian
+CSR_MAGIC = b'DCNCSR01'
+_CSR_PREFIX = struct.Struct('<8sI')
+
+_GRAPHML_NS = '{http://graphml.graphdrawing.org/xmlns}'
+_COST_ATTRIBUTES = ('cost', 'distance', 'weight')
+
+
+class TopologyImportError(ValueError):
+    """Raised when an imported topology fails validation; carries the ingest summary."""
+
+    def __init__(self, summary):
+        super().__init__(f"Topology rejected: {summary['error_count']} invalid items")
+        self.summary = summary
+
+
+def network_edges(network):
+    """Return (node_ids, edges) for a RIPNetwork with each link listed once."""
+    node_ids = list(network.nodes)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    edges = []
+    for node_id, node in network.nodes.items():
+        for neighbor_id, distance in node.neighbors.items():
+            if index[node_id] < index.get(neighbor_id, -1):
+                edges.append((node_id, neighbor_id, distance))
+    return node_ids, edges
+
+
+def data_edges(network_data):
+    """Return (node_ids, edges) for the dict topology shape used by the API."""
+    node_ids = [node['id'] for node in network_data['nodes']]
+    edges = [(link['source'], link['target'], link.get('distance', link.get('cost', 1)))
+             for link in network_data['links']]
+    return node_ids, edges
+
+
+def _parse_cost(value):
+    value = value.strip()
+    if not value:
+        return 1
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+# --- Edge-list CSV -------------------------------------------------------
+
+def export_csv(node_ids, edges):
+    """Edge list with a `source,target,cost` header; isolated nodes get a one-column row."""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['source', 'target', 'cost'])
+    connected = set()
+    for source, target, distance in edges:
+        writer.writerow([source, target, distance])
+        connected.add(source)
+        connected.add(target)
+    for node_id in node_ids:
+        if node_id not in connected:
+            writer.writerow([node_id])
+    return out.getvalue().encode('utf-8')
+
+
+def import_csv(stream):
+    """Read an edge-list CSV from a byte stream; returns (node_ids, edges)."""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    node_ids = {}
+    edges = []
+    for row in csv.reader(text):
+        if not row or row[0].startswith('#'):
+            continue
+        if row[0].strip().lower() == 'source':
+            continue  # Header
+        source = row[0].strip()
+        node_ids.setdefault(source, None)
+        if len(row) < 2 or not row[1].strip():
+            continue
+        target = row[1].strip()
+        node_ids.setdefault(target, None)
+        edges.append((source, target, _parse_cost(row[2]) if len(row) > 2 else 1))
+    return list(node_ids), edges
+
+
+# --- GraphML -------------------------------------------------------------
+
+def export_graphml(node_ids, edges):
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n',
+        '  <key id="cost" for="edge" attr.name="cost" attr.type="double"/>\n',
+        '  <graph id="G" edgedefault="undirected">\n'
+    ]
+    parts.extend(f'    <node id={quoteattr(str(node_id))}/>\n' for node_id in node_ids)
+    parts.extend(
+        f'    <edge source={quoteattr(str(source))} target={quoteattr(str(target))}>'
+        f'<data key="cost">{distance}</data></edge>\n'
+        for source, target, distance in edges
+    )
+    parts.append('  </graph>\n</graphml>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def import_graphml(stream):
+    """Stream-parse GraphML nodes and edges; cost comes from a cost/distance/weight key."""
+    cost_keys = set()
+    node_ids = []
+    edges = []
+    open_elements = []
+    for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        tag = element.tag.replace(_GRAPHML_NS, '')
+        if tag == 'key':
+            if element.get('attr.name', element.get('id', '')).lower() in _COST_ATTRIBUTES:
+                cost_keys.add(element.get('id'))
+        elif tag == 'node':
+            node_ids.append(element.get('id'))
+        elif tag == 'edge':
+            distance = 1
+            for data in element:
+                if data.get('key') in cost_keys and data.text:
+                    distance = _parse_cost(data.text)
+            edges.append((element.get('source'), element.get('target'), distance))
+        else:
+            continue
+        # Detach finished elements so neither the graph nor the root keeps them
+        if open_elements:
+            open_elements[-1].remove(element)
+    return node_ids, edges
+
+
+# --- Compressed sparse row binary ---------------------------------------
+
+def export_csr(node_ids, edges):
+    """Pack the symmetric adjacency as CSR arrays."""
+    import numpy as np
+
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    src = np.fromiter((index[s] for s, _, _ in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((index[t] for _, t, _ in edges), dtype=np.int64, count=len(edges))
+    weights = np.array([d for _, _, d in edges], dtype=np.float64)
+    integral = bool(np.all(weights == np.round(weights)))
+    weight_dtype = np.dtype('<i8') if integral else np.dtype('<f8')
+
+    rows = np.concatenate((src, dst))
+    cols = np.concatenate((dst, src))
+    both = np.concatenate((weights, weights))
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(len(node_ids) + 1, dtype='<i8')
+    np.cumsum(np.bincount(rows, minlength=len(node_ids)), out=indptr[1:])
+
+    header = json.dumps({
+        "nodes": [str(node_id) for node_id in node_ids],
+        "weight_dtype": weight_dtype.str
+    }, separators=(',', ':')).encode('utf-8')
+    return b''.join([
+        _CSR_PREFIX.pack(CSR_MAGIC, len(header)),
+        header,
+        indptr.tobytes(),
+        cols[order].astype('<i4').tobytes(),
+        both[order].astype(weight_dtype).tobytes()
+    ])
+
+
+def import_csr(data):
+    """Decode a CSR payload; returns (node_ids, edges) with each link once."""
+    import numpy as np
+
+    if len(data) < _CSR_PREFIX.size:
+        raise ValueError("Not a DCN CSR topology file")
+    magic, header_length = _CSR_PREFIX.unpack_from(data, 0)
+    if magic != CSR_MAGIC:
+        raise ValueError("Not a DCN CSR topology file")
+    offset = _CSR_PREFIX.size
+    header = json.loads(bytes(data[offset:offset + header_length]).decode('utf-8'))
+    offset += header_length
+    if (not isinstance(header, dict) or not isinstance(header.get("nodes"), list)
+            or header.get("weight_dtype") not in ('<i8', '<f8')):
+        raise ValueError("Malformed CSR header")
+
+    node_ids = header["nodes"]
+    n = len(node_ids)
+    if len(data) < offset + (n + 1) * 8:
+        raise ValueError("CSR payload is truncated")
+    indptr = np.frombuffer(data, dtype='<i8', count=n + 1, offset=offset)
+    offset += indptr.nbytes
+    m = int(indptr[-1])
+    if indptr[0] != 0 or np.any(np.diff(indptr) < 0):
+        raise ValueError("CSR indptr must start at 0 and be non-decreasing")
+    if len(data) != offset + m * (4 + 8):
+        raise ValueError("CSR payload size does not match indptr")
+    indices = np.frombuffer(data, dtype='<i4', count=m, offset=offset)
+    offset += indices.nbytes
+    weights = np.frombuffer(data, dtype=header["weight_dtype"], count=m, offset=offset)
+    if m and (indices.min() < 0 or indices.max() >= n):
+        raise ValueError(f"CSR indices must lie in [0, {n})")
+
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    # Each undirected link is stored in both rows; keep the diagonal so
+    # validation reports self-loops instead of dropping them
+    upper = rows <= indices
+    ids = np.array(node_ids, dtype=object)
+    edges = list(zip(ids[rows[upper]].tolist(), ids[indices[upper]].tolist(),
+                     weights[upper].tolist()))
+    return node_ids, edges
+
+
+EXPORTERS = {'csv': export_csv, 'graphml': export_graphml, 'csr': export_csr}
+
+
+def export_topology(fmt, node_ids, edges):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unsupported topology format: {fmt}")
+    return EXPORTERS[fmt](node_ids, edges)
+
+
+def validate_topology(node_ids, edges):
+    """Run imported nodes and edges through the load-topology checks."""
+    ingest = TopologyIngest()
+    for node_id in node_ids:
+        ingest.add_node({'id': node_id})
+    for source, target, distance in edges:
+        ingest.add_edge(source, target, distance)
+    ingest.finish()
+    if ingest.error_counts:
+        raise TopologyImportError(ingest.summary())
+    return ingest
+
+
+def import_topology(fmt, stream):
+    """Load and validate a topology in the given format into a RIPNetwork."""
+    if fmt == 'csv':
+        node_ids, edges = import_csv(stream)
+    elif fmt == 'graphml':
+        node_ids, edges = import_graphml(stream)
+    elif fmt == 'csr':
+        node_ids, edges = import_csr(stream.read())
+    else:
+        raise ValueError(f"Unsupported topology format: {fmt}")
+    return validate_topology(node_ids, edges).build_network()
@@ -0,0 +1,253 @@
+import codecs
+import json
+import math
+import time
+
+from rip_simulator import RIPNetwork
+
+_READ_SIZE = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+_MAX_REPORTED_ERRORS = 50
+
+
+class TopologyParseError(ValueError):
+    """Raised when the request body is not a well-formed topology document."""
+
+
+class _StreamScanner:
+    """Character buffer over a byte stream, refilled on demand."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.json = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(_READ_SIZE)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b'', final=True)
+        else:
+            # Drop consumed text so the buffer stays proportional to one chunk
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise TopologyParseError(f"Expected '{char}' in topology document")
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise TopologyParseError(f"Invalid JSON in topology document: {e.msg}")
+            # A number may continue in the next chunk; make sure it is terminated
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_topology_items(stream, container=None):
+    """
+    Stream (section, item) pairs from a topology JSON document.
+
+    Yields ('nodes', node_dict) and ('links', link_dict) one at a time,
+    descending into the `container` key (e.g. 'data' for load-topology
+    payloads) when present; any other top-level key is yielded as
+    ('meta', (key, value)).
+    """
+    scanner = _StreamScanner(stream)
+    yield from _iter_object(scanner, container, top_level=True)
+    if scanner.peek() != '':
+        raise TopologyParseError("Unexpected data after topology document")
+
+
+def _iter_object(scanner, container, top_level):
+    scanner.expect('{')
+    if scanner.peek() == '}':
+        scanner.pos += 1
+        return
+    while True:
+        key = scanner.value()
+        scanner.expect(':')
+        if key in ('nodes', 'links') and scanner.peek() == '[':
+            scanner.pos += 1
+            if scanner.peek() == ']':
+                scanner.pos += 1
+            else:
+                while True:
+                    yield key, scanner.value()
+                    separator = scanner.peek()
+                    scanner.pos += 1
+                    if separator == ']':
+                        break
+                    if separator != ',':
+                        raise TopologyParseError(f"Malformed '{key}' array")
+        elif top_level and key == container and scanner.peek() == '{':
+            yield from _iter_object(scanner, None, top_level=False)
+        else:
+            yield 'meta', (key, scanner.value())
+
+        separator = scanner.peek()
+        scanner.pos += 1
+        if separator == '}':
+            return
+        if separator != ',':
+            raise TopologyParseError("Malformed topology object")
+
+
+def _valid_id(value):
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+class TopologyIngest:
+    """
+    Single-pass validator and accumulator for streamed topology items.
+
+    Checks node ids (strings or integers), duplicate nodes, self-loops,
+    duplicate links (in either direction), non-numeric, non-finite or
+    negative costs and links to unknown nodes.
+    Links may arrive before their nodes; endpoint checks for those are
+    settled in finish().
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.node_ids = set()
+        self.links = []  # Accepted link dicts as submitted
+        self.edges = []  # (source, target, distance) for bulk construction
+        self.edge_keys = set()
+        self.meta = {}
+        self.error_counts = {}
+        self.errors = []
+
+    def _error(self, kind, message):
+        self.error_counts[kind] = self.error_counts.get(kind, 0) + 1
+        if len(self.errors) < _MAX_REPORTED_ERRORS:
+            self.errors.append({"type": kind, "message": message})
+
+    def add(self, section, item):
+        if section == 'nodes':
+            self.add_node(item)
+        elif section == 'links':
+            self.add_link(item)
+        else:
+            key, value = item
+            self.meta[key] = value
+
+    def add_node(self, node):
+        node_id = node.get('id') if isinstance(node, dict) else None
+        if node_id is None:
+            self._error('missing_node_id', f"Node without id: {str(node)[:80]}")
+            return
+        if not _valid_id(node_id):
+            self._error('invalid_node_id', f"Node id must be a string or integer: {node_id!r:.80}")
+            return
+        if node_id in self.node_ids:
+            self._error('duplicate_node', f"Duplicate node {node_id}")
+            return
+        self.node_ids.add(node_id)
+        self.nodes.append(node)
+
+    def add_link(self, link):
+        if not isinstance(link, dict) or 'source' not in link or 'target' not in link:
+            self._error('malformed_link', f"Link without source/target: {str(link)[:80]}")
+            return
+        self.add_edge(link['source'], link['target'], link.get('distance', link.get('cost', 1)), link)
+
+    def add_edge(self, source, target, distance, link=None):
+        """Validate one (source, target, distance) edge; `link` is the submitted item, if any."""
+        if not (_valid_id(source) and _valid_id(target)):
+            self._error('malformed_link', f"Link endpoints must be strings or integers: "
+                                          f"{source!r:.40}-{target!r:.40}")
+            return
+        if isinstance(distance, bool) or not isinstance(distance, (int, float)):
+            self._error('invalid_cost', f"Link {source}-{target} has non-numeric cost {distance!r}")
+            return
+        if isinstance(distance, float) and not math.isfinite(distance):
+            self._error('invalid_cost', f"Link {source}-{target} has non-finite cost {distance}")
+            return
+        if distance < 0:
+            self._error('negative_cost', f"Link {source}-{target} has negative cost {distance}")
+            return
+        if source == target:
+            self._error('self_loop', f"Link {source}-{target} is a self-loop")
+            return
+        key = (source, target) if str(source) <= str(target) else (target, source)
+        if key in self.edge_keys:
+            self._error('duplicate_link', f"Duplicate link {source}-{target}")
+            return
+        self.edge_keys.add(key)
+        self.edges.append((source, target, distance))
+        self.links.append(link)
+
+    def finish(self):
+        """Drop links whose endpoints never appeared among the nodes."""
+        valid_edges = []
+        valid_links = []
+        for edge, link in zip(self.edges, self.links):
+            missing = [n for n in edge[:2] if n not in self.node_ids]
+            if missing:
+                self._error('unknown_endpoint',
+                            f"Link {edge[0]}-{edge[1]} references unknown node {missing[0]}")
+                continue
+            valid_edges.append(edge)
+            valid_links.append(link)
+        self.edges = valid_edges
+        self.links = valid_links
+        return self
+
+    def build_network(self):
+        return RIPNetwork.from_edges([node['id'] for node in self.nodes], self.edges, cost_bound=True)
+
+    def summary(self):
+        return {
+            "node_count": len(self.nodes),
+            "link_count": len(self.links),
+            "error_count": sum(self.error_counts.values()),
+            "error_counts": self.error_counts,
+            "errors": self.errors
+        }
+
+
+def ingest_topology(stream, container=None):
+    """
+    Parse and validate a topology document from a byte stream in one pass.
+
+    Args:
+        stream: File-like object yielding the JSON request body
+        container: Optional key wrapping the nodes/links (e.g. 'data')
+
+    Returns:
+        Finished TopologyIngest with validated nodes, links and edges
+    """
+    start = time.perf_counter()
+    ingest = TopologyIngest()
+    for section, item in iter_topology_items(stream, container):
+        ingest.add(section, item)
+    ingest.finish()
+    ingest.elapsed = time.perf_counter() - start
+    return ingest
@@ -0,0 +1,390 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+# Server-side force-directed layout for topologies that arrive without
+# coordinates. A pivot-MDS embedding of hop distances gives the global shape,
+# then Fruchterman-Reingold iterations refine it. Repulsion is approximated
+# on two uniform grids: neighbouring cells of a fine grid push from their
+# centres of mass, and so do distant cells of a coarse one, so an iteration
+# costs O(N + E) instead of O(N^2). After topology changes only the nodes
+# near the change move.
+
+LINK_LENGTH = 60.0  # Ideal distance between linked nodes, in screen units
+MARGIN = 40.0
+PIVOTS = 50
+ITERATIONS = 60
+INCREMENTAL_ITERATIONS = 30
+INCREMENTAL_HOPS = 2  # Nodes this close to a change are relaxed
+COARSE_GRID = 8  # Far-field repulsion cells per side
+# Damping of far-field repulsion: at full strength the summed push of a large
+# topology stretches links to several times LINK_LENGTH
+FAR_FIELD = 0.1
+
+
+def _csr(n, sources, targets):
+    """Symmetric adjacency of an undirected edge list as (offsets, neighbors)."""
+    a = np.concatenate((sources, targets))
+    b = np.concatenate((targets, sources))
+    order = np.argsort(a, kind='stable')
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(a, minlength=n), out=offsets[1:])
+    return offsets, b[order]
+
+
+def _expand(offsets, neighbors, frontier):
+    """Neighbors of every node in `frontier`, concatenated."""
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    owner = np.repeat(np.arange(len(frontier)), counts)
+    return neighbors[starts[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)]
+
+
+def hop_distances(offsets, neighbors, sources, limit=None):
+    """Level-synchronous BFS from `sources`; unreached nodes (or beyond `limit` hops) get -1."""
+    n = len(offsets) - 1
+    distance = np.full(n, -1, dtype=np.int64)
+    frontier = np.unique(np.asarray(sources, dtype=np.int64))
+    distance[frontier] = 0
+    level = 0
+    while len(frontier) and (limit is None or level < limit):
+        level += 1
+        reached = _expand(offsets, neighbors, frontier)
+        frontier = np.unique(reached[distance[reached] < 0])
+        distance[frontier] = level
+    return distance
+
+
+def pivot_mds(offsets, neighbors, pivots=PIVOTS, seed=0):
+    """
+    2-D embedding from hop distances to a few farthest-first pivot nodes
+    (Brandes and Pich's PivotMDS), scaled to a square of side sqrt(N).
+    """
+    n = len(offsets) - 1
+    rng = np.random.default_rng(seed)
+    if n < 3:
+        return rng.random((n, 2))
+    count = min(pivots, n)
+    columns = np.empty((n, count))
+    nearest = np.full(n, np.inf)
+    pivot = int(rng.integers(n))
+    for k in range(count):
+        distance = hop_distances(offsets, neighbors, [pivot]).astype(np.float64)
+        unreached = distance < 0
+        # Other components sit just beyond this one's far edge
+        distance[unreached] = distance.max() + 1 if not unreached.all() else 1
+        columns[:, k] = distance
+        nearest = np.minimum(nearest, distance)
+        pivot = int(np.argmax(nearest))
+    squared = columns ** 2
+    centered = squared - squared.mean(axis=0) - squared.mean(axis=1, keepdims=True) + squared.mean()
+    centered *= -0.5
+    u, s, _ = np.linalg.svd(centered, full_matrices=False)
+    coordinates = u[:, :2] * s[:2]
+    # Spread the embedding over about one square unit per node, the density
+    # the forces settle at; small-diameter graphs would otherwise start
+    # crammed into a few grid cells
+    extent = np.ptp(coordinates, axis=0).max()
+    coordinates *= np.sqrt(n) / extent if extent > 0 else 1.0
+    return coordinates + rng.normal(scale=0.05, size=coordinates.shape)  # Separate twins
+
+
+def _cell_sums(xy, keys):
+    """Per occupied cell: sorted keys, node counts and coordinate sums."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse).astype(np.float64)
+    sums = np.stack([np.bincount(inverse, weights=xy[:, axis]) for axis in (0, 1)], axis=1)
+    return unique, counts, sums
+
+
+def repulsion(xy, active, length, coarse=COARSE_GRID):
+    """
+    Approximate Fruchterman-Reingold repulsion (k^2 / d) on the active nodes.
+
+    Near field: every node in the 3 x 3 block of grid cells (one link
+    length wide) around a node pushes from its cell's centre of mass, with
+    the node itself taken out of its own cell. Far field: a coarse
+    `coarse` x `coarse` grid over the whole layout, whose non-adjacent
+    cells push from their centres of mass (damped by FAR_FIELD), keeps
+    distant parts of the topology apart. Both cost O(N) per iteration,
+    however dense the layout gets.
+    """
+    force = np.zeros((len(active), 2))
+    k2 = length ** 2
+    origin = xy.min(axis=0)
+    point = xy[active]
+
+    cells = np.floor((xy - origin) / length).astype(np.int64) + 1
+    height = int(cells[:, 1].max()) + 2
+    keys = cells[:, 0] * height + cells[:, 1]
+    unique, counts, sums = _cell_sums(xy, keys)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            wanted = keys[active] + dx * height + dy
+            slot = np.minimum(np.searchsorted(unique, wanted), len(unique) - 1)
+            found = unique[slot] == wanted
+            count = np.where(found, counts[slot], 0.0)
+            total = np.where(found[:, None], sums[slot], 0.0)
+            if dx == 0 and dy == 0:
+                count = count - 1  # Leave the node itself out of its own cell
+                total = total - point
+            occupied = count > 0
+            delta = point - total / np.maximum(count, 1)[:, None]
+            d2 = np.maximum((delta ** 2).sum(axis=1), 1e-4 * k2)
+            force += np.where(occupied[:, None], delta * (count * k2 / d2)[:, None], 0.0)
+
+    span = np.maximum(np.ptp(xy, axis=0), length) / coarse
+    block = np.minimum(((xy - origin) / span).astype(np.int64), coarse - 1)
+    block_keys = block[:, 0] * coarse + block[:, 1]
+    block_counts = np.bincount(block_keys, minlength=coarse * coarse).astype(np.float64)
+    block_sums = np.stack([np.bincount(block_keys, weights=xy[:, axis], minlength=coarse * coarse)
+                           for axis in (0, 1)], axis=1)
+    occupied = np.flatnonzero(block_counts)
+    centres = block_sums[occupied] / block_counts[occupied, None]
+    bx, by = np.divmod(occupied, coarse)
+    own = block[active]
+    far = (np.abs(own[:, 0:1] - bx[None, :]) > 1) | (np.abs(own[:, 1:2] - by[None, :]) > 1)
+    delta = point[:, None, :] - centres[None, :, :]
+    d2 = np.maximum((delta ** 2).sum(axis=2), k2)
+    weight = np.where(far, block_counts[occupied][None, :] * k2 / d2, 0.0)
+    force += FAR_FIELD * (delta * weight[:, :, None]).sum(axis=1)
+    return force
+
+
+def relax(xy, sources, targets, movable=None, iterations=ITERATIONS, length=LINK_LENGTH,
+          temperature=None):
+    """
+    Fruchterman-Reingold iterations with grid-approximated repulsion, in place.
+
+    Args:
+        xy: (N, 2) float positions
+        sources, targets: Edge endpoint index arrays
+        movable: Index array of the nodes allowed to move (default: all);
+            the others still push and pull on them
+        temperature: Largest step of the first iteration, cooling linearly
+    """
+    n = len(xy)
+    if n == 0 or iterations <= 0:
+        return xy
+    active = np.arange(n) if movable is None else np.asarray(movable, dtype=np.int64)
+    if not len(active):
+        return xy
+    is_active = np.zeros(n, dtype=bool)
+    is_active[active] = True
+    edge_mask = is_active[sources] | is_active[targets]
+    sources, targets = sources[edge_mask], targets[edge_mask]
+    if temperature is None:
+        temperature = length * max(1.0, np.sqrt(n) / 10)
+
+    for iteration in range(iterations):
+        step = temperature * (1 - iteration / iterations) + 0.5
+        force = np.zeros((n, 2))
+        force[active] = repulsion(xy, active, length)
+
+        delta = xy[targets] - xy[sources]
+        pull = delta * (np.sqrt((delta ** 2).sum(axis=1)) / length)[:, None]  # d^2 / k
+        for axis in (0, 1):
+            force[:, axis] += np.bincount(sources, weights=pull[:, axis], minlength=n)
+            force[:, axis] -= np.bincount(targets, weights=pull[:, axis], minlength=n)
+
+        force = force[active]
+        norm = np.sqrt((force ** 2).sum(axis=1))
+        scale = np.minimum(norm, step) / np.maximum(norm, 1e-9)
+        xy[active] += force * scale[:, None]
+    return xy
+
+
+def force_layout(ids, edges, pinned=None, seed=0, length=LINK_LENGTH, iterations=ITERATIONS):
+    """
+    Lay out a whole topology.
+
+    Args:
+        ids: Node ids
+        edges: (a, b) id pairs
+        pinned: {node_id: (x, y)} kept fixed, e.g. hand-placed nodes
+
+    Returns:
+        (N, 2) array of positions in `ids` order
+    """
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    n = len(ids)
+    sources = np.array([index[a] for a, _ in edges], dtype=np.int64)
+    targets = np.array([index[b] for _, b in edges], dtype=np.int64)
+    offsets, neighbors = _csr(n, sources, targets)
+    xy = pivot_mds(offsets, neighbors, seed=seed) * length
+    fixed = np.array([index[node_id] for node_id in (pinned or {}) if node_id in index], dtype=np.int64)
+    if len(fixed):
+        # Move the embedding onto the hand-placed nodes, then hold those in place
+        coordinates = np.array([pinned[ids[i]] for i in fixed], dtype=np.float64)
+        xy += coordinates.mean(axis=0) - xy[fixed].mean(axis=0)
+        xy[fixed] = coordinates
+        movable = np.setdiff1d(np.arange(n), fixed)
+    else:
+        movable = None
+    relax(xy, sources, targets, movable, iterations, length)
+    if not len(fixed) and n:
+        xy += MARGIN - xy.min(axis=0)
+    return xy
+
+
+class TopologyLayout:
+    """
+    Positions for the current network, kept per topology version.
+
+    When the network changes within its epoch, new nodes start next to
+    their placed neighbours and only nodes within INCREMENTAL_HOPS of an
+    added or removed node or link are relaxed; everything else keeps its
+    position. A new epoch (a different network) is laid out from scratch.
+    """
+
+    def __init__(self, length=LINK_LENGTH):
+        self.length = length
+        self.epoch = None
+        self.version = None
+        self.ids = []
+        self.xy = np.zeros((0, 2))
+        self.edges = set()
+        self.pinned = {}
+        self.layout_version = 0
+        self.moved = {}  # node_id -> layout_version of its last move
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _edges(network):
+        """Each link once, in the network's node order (so layouts are reproducible)."""
+        order = {node_id: i for i, node_id in enumerate(network.nodes)}
+        return [(a, b) for a, node in network.nodes.items() for b in node.neighbors
+                if b in order and order[a] < order[b]]
+
+    def update(self, network, pinned=None):
+        """Bring the positions up to date with `network`; returns this layout."""
+        pinned = pinned or {}
+        with self.lock:
+            if network.epoch == self.epoch and network.version == self.version and pinned == self.pinned:
+                return self
+            start = time.perf_counter()
+            ids = list(network.nodes)
+            edge_list = self._edges(network)
+            edges = {frozenset(edge) for edge in edge_list}
+            if network.epoch != self.epoch or pinned != self.pinned or not self.ids:
+                self.xy = force_layout(ids, edge_list, pinned, length=self.length)
+                moved = ids
+                mode = 'full'
+            elif set(ids) == set(self.ids) and edges == self.edges:
+                moved = []
+                mode = 'unchanged'
+            else:
+                moved = self._relax_changes(ids, edge_list, edges)
+                mode = 'incremental'
+            self.epoch, self.version, self.ids, self.edges, self.pinned = \
+                network.epoch, network.version, ids, edges, dict(pinned)
+            self.moved = {node_id: version for node_id, version in self.moved.items() if node_id in network.nodes}
+            if moved:
+                self.layout_version += 1
+                for node_id in moved:
+                    self.moved[node_id] = self.layout_version
+            self.stats = {"mode": mode, "moved": len(moved), "seconds": time.perf_counter() - start}
+            return self
+
+    def _relax_changes(self, ids, edge_list, edges):
+        old = {node_id: i for i, node_id in enumerate(self.ids)}
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        n = len(ids)
+        changed_edges = edges ^ self.edges
+        seeds = {node_id for edge in changed_edges for node_id in edge if node_id in index}
+        seeds.update(node_id for node_id in ids if node_id not in old)
+        sources = np.array([index[a] for a, _ in edge_list], dtype=np.int64)
+        targets = np.array([index[b] for _, b in edge_list], dtype=np.int64)
+        offsets, neighbors = _csr(n, sources, targets)
+
+        xy = np.full((n, 2), np.nan)
+        kept = [i for i, node_id in enumerate(ids) if node_id in old]
+        xy[kept] = self.xy[[old[ids[i]] for i in kept]]
+        # New nodes start at the centre of their placed neighbours, repeated
+        # so chains of new nodes grow outward from the existing layout
+        rng = np.random.default_rng(len(ids))
+        missing = np.flatnonzero(np.isnan(xy[:, 0]))
+        while len(missing):
+            placed = []
+            for i in missing.tolist():
+                around = neighbors[offsets[i]:offsets[i + 1]]
+                around = around[~np.isnan(xy[around, 0])]
+                if len(around):
+                    placed.append((i, xy[around].mean(axis=0)))
+            if not placed:
+                # Not connected to anything placed: start beside the layout
+                center = np.nanmax(xy, axis=0) if len(kept) else np.zeros(2)
+                placed = [(i, center + (self.length, 0)) for i in missing.tolist()]
+            for i, point in placed:
+                xy[i] = point + rng.normal(scale=self.length / 4, size=2)
+            missing = np.flatnonzero(np.isnan(xy[:, 0]))
+
+        pinned = {index[node_id] for node_id in self.pinned if node_id in index}
+        seed_index = [index[node_id] for node_id in seeds]
+        near = np.flatnonzero(hop_distances(offsets, neighbors, seed_index, INCREMENTAL_HOPS) >= 0) \
+            if seed_index else np.array([], dtype=np.int64)
+        movable = np.array([i for i in near.tolist() if i not in pinned], dtype=np.int64)
+        relax(xy, sources, targets, movable, INCREMENTAL_ITERATIONS, self.length, temperature=self.length)
+        self.xy = xy
+        return [ids[i] for i in movable.tolist()]
+
+    def positions(self, node_ids=None):
+        """{node_id: {'x', 'y'}} for the given nodes (default: all)."""
+        index = {node_id: i for i, node_id in enumerate(self.ids)}
+        node_ids = self.ids if node_ids is None else node_ids
+        return {node_id: {'x': round(float(self.xy[index[node_id], 0]), 1),
+                          'y': round(float(self.xy[index[node_id], 1]), 1)}
+                for node_id in node_ids if node_id in index}
+
+    def moved_since(self, layout_version):
+        return [node_id for node_id, version in self.moved.items() if version > layout_version]
+
+
+def edge_crossings(xy, sources, targets, sample=2000, seed=0):
+    """Fraction of crossing pairs among randomly sampled non-adjacent edge pairs (a layout quality check)."""
+    rng = np.random.default_rng(seed)
+    m = len(sources)
+    if m < 2:
+        return 0.0
+    a, b = rng.integers(m, size=sample), rng.integers(m, size=sample)
+    shared = ((sources[a] == sources[b]) | (sources[a] == targets[b]) |
+              (targets[a] == sources[b]) | (targets[a] == targets[b]))
+    a, b = a[~shared], b[~shared]
+    p, q, r, s = xy[sources[a]], xy[targets[a]], xy[sources[b]], xy[targets[b]]
+
+    def orientation(u, v, w):
+        return np.sign((v[:, 0] - u[:, 0]) * (w[:, 1] - u[:, 1]) - (v[:, 1] - u[:, 1]) * (w[:, 0] - u[:, 0]))
+
+    crossing = ((orientation(p, q, r) != orientation(p, q, s)) &
+                (orientation(r, s, p) != orientation(r, s, q)))
+    return float(crossing.mean()) if len(a) else 0.0
+
+
+if __name__ == '__main__':
+    from rip_parallel import random_network
+
+    parser = argparse.ArgumentParser(description="Time the server-side topology layout")
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1000, 10000, 30000])
+    parser.add_argument('--degree', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    for n_nodes in args.nodes:
+        topology = random_network(n_nodes, args.degree, args.seed, max_cost=1)
+        layout = TopologyLayout()
+        layout.update(topology)
+        full = layout.stats['seconds']
+        index = {node_id: i for i, node_id in enumerate(layout.ids)}
+        edge_list = TopologyLayout._edges(topology)
+        sources = np.array([index[a] for a, _ in edge_list])
+        targets = np.array([index[b] for _, b in edge_list])
+        crossings = edge_crossings(layout.xy, sources, targets)
+
+        topology.add_node('new')
+        topology.add_bidirectional_link('new', 0, 1)
+        topology.version += 1
+        layout.update(topology)
+        print(f"{n_nodes:>6} nodes: full layout {full:.2f} s (crossing rate {crossings:.3f}), "
+              f"add-node relaxed {layout.stats['moved']} nodes in {layout.stats['seconds']:.3f} s")
@@ -0,0 +1,105 @@
+TOPOLOGY_FIELDS = ('neighbors', 'routing_table', 'position', 'links')
+OPTIONAL_FIELDS = ('ecmp',)  # Only returned when asked for by name
+
+
+def parse_fields(value):
+    """Parse a comma-separated `fields` parameter; None selects every default field."""
+    if not value:
+        return set(TOPOLOGY_FIELDS)
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = fields - set(TOPOLOGY_FIELDS) - set(OPTIONAL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; "
+                         f"expected any of {', '.join(TOPOLOGY_FIELDS + OPTIONAL_FIELDS)}")
+    return fields
+
+
+def _encode_table(items, infinity, compact, delta):
+    table = {}
+    for dest, (next_hop, distance) in items:
+        if distance >= infinity:
+            if compact:
+                if delta:
+                    table[dest] = None  # Became unreachable since the client's version
+                continue
+            distance = -1  # Unreachable, whether RIP's 16 or link-state's inf (not valid JSON)
+        table[dest] = [next_hop, distance]
+    return table
+
+
+def serialize_topology(graph, positions=None, links=None, fields=None, offset=0, limit=None,
+                       since=None, epoch=None, compact=False):
+    """
+    Render a converged RIPNetwork for the topology endpoint.
+
+    Args:
+        graph: RIPNetwork to render
+        positions: Optional {node_id: node dict with x/y} for layout
+        links: Optional link list to echo back
+        fields: Subset of TOPOLOGY_FIELDS and OPTIONAL_FIELDS to include
+            (default: all of TOPOLOGY_FIELDS). `ecmp` adds every node's
+            equal-cost next hops, in full even in a delta
+        offset, limit: Page through nodes in insertion order
+        since, epoch: Version and epoch from an earlier response; when they
+            match this network, only nodes and routing entries changed since
+            that version are returned, plus ids of removed nodes
+        compact: Leave unreachable routing entries out (null in deltas);
+            otherwise they are sent with distance -1
+
+    Clients paging through a delta should keep the version from the first
+    page. A delta is only possible while the epoch is unchanged; otherwise a
+    full response is returned with `delta` false.
+    """
+    fields = set(TOPOLOGY_FIELDS) if fields is None else fields
+    delta = since is not None and epoch == graph.epoch and 0 <= since <= graph.version
+    infinity = graph.infinity
+
+    node_ids = list(graph.nodes)
+    if delta:
+        node_ids = [node_id for node_id in node_ids if graph.nodes[node_id].table_version > since]
+    total = len(node_ids)
+    end = total if limit is None else min(total, offset + limit)
+    page = node_ids[offset:end]
+
+    nodes = []
+    for node_id in page:
+        node = graph.nodes[node_id]
+        entry = {'id': node_id}
+        if node.area is not None:
+            entry['area'] = node.area
+        if 'neighbors' in fields:
+            entry['neighbors'] = [{'id': n_id, 'distance': distance}
+                                  for n_id, distance in node.neighbors.items()]
+        if 'routing_table' in fields:
+            if delta and node.created_version <= since:
+                table = node.routing_table
+                items = [(dest, table[dest]) for dest, version in node.entry_versions.items()
+                         if version > since and dest in table]
+                entry['routing_table'] = _encode_table(items, infinity, compact, delta=True)
+            else:
+                entry['routing_table'] = _encode_table(node.routing_table.items(), infinity,
+                                                       compact, delta=False)
+        if 'ecmp' in fields:
+            entry['ecmp'] = graph.equal_cost_hops(node_id)
+        if 'position' in fields and positions is not None:
+            original = positions.get(node_id, {})
+            entry['x'] = original.get('x')
+            entry['y'] = original.get('y')
+        nodes.append(entry)
+
+    response = {
+        'success': True,
+        'epoch': graph.epoch,
+        'version': graph.version,
+        'delta': delta,
+        'total_nodes': total,
+        'offset': offset,
+        'next_offset': end if end < total else None,
+        'nodes': nodes
+    }
+    if delta:
+        response['removed_nodes'] = [node_id for node_id, version in graph.removed_nodes.items()
+                                     if version > since]
+    if 'links' in fields and offset == 0 and not delta:  # Links are fixed within an epoch
+        response['links'] = links if links is not None else []
+    return response
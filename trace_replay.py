@@ -0,0 +1,237 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tcp_reno_simulator import TCPRenoSimulator
+
+# Binary traces are headerless little-endian float32 (loss_rate, rtt) pairs
+TRACE_DTYPE = np.dtype([('loss', '<f4'), ('rtt', '<f4')])
+TRACE_FORMATS = ('bin', 'csv')
+TRACE_DIR = os.environ.get('DCN_TRACE_DIR', 'traces')
+
+# Records converted to Python floats per memmap slice
+_BLOCK_RECORDS = 4096
+_COPY_CHUNK = 1 << 20
+# Shortest CSV record ("0,1\n"), used to bound a CSV trace's length by its size
+_MIN_CSV_RECORD = 4
+
+
+class LossTrace:
+    """A recorded per-RTT loss/delay trace read lazily from disk.
+
+    The file is memory-mapped and records are decoded one block at a time,
+    so iterating a multi-GB trace never materializes it in memory. Each
+    record is a (loss_rate, rtt) pair where loss_rate is the probability of
+    a loss event during that RTT (0/1 for recorded loss indicators) and rtt
+    is the round-trip time in seconds.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.format = fmt or _guess_format(path)
+        if self.format not in TRACE_FORMATS:
+            raise ValueError(f"Unsupported trace format: {self.format}")
+
+    def __iter__(self):
+        if self.format == 'bin':
+            return self._iter_binary()
+        return self._iter_csv()
+
+    def __len__(self):
+        if self.format == 'bin':
+            return os.path.getsize(self.path) // TRACE_DTYPE.itemsize
+        return sum(1 for _ in self._iter_csv())
+
+    def _iter_binary(self):
+        if os.path.getsize(self.path) < TRACE_DTYPE.itemsize:
+            return
+        records = np.memmap(self.path, dtype=TRACE_DTYPE, mode='r')
+        for start in range(0, len(records), _BLOCK_RECORDS):
+            block = records[start:start + _BLOCK_RECORDS]
+            yield from zip(block['loss'].tolist(), block['rtt'].tolist())
+
+    def _iter_csv(self):
+        if os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                fields = line.strip().split(b',')
+                if len(fields) < 2:
+                    continue
+                try:
+                    yield float(fields[0]), float(fields[1])
+                except ValueError:
+                    continue  # Header or comment line
+
+    def summary(self, max_records=None):
+        """Return record count and mean loss/RTT, scanning at most max_records."""
+        count = 0
+        loss_total = 0.0
+        rtt_total = 0.0
+        for loss, rtt in self:
+            count += 1
+            loss_total += loss
+            rtt_total += rtt
+            if max_records is not None and count >= max_records:
+                break
+        return {
+            "records": count,
+            "mean_loss_rate": loss_total / count if count else 0.0,
+            "mean_rtt": rtt_total / count if count else 0.0
+        }
+
+
+def _guess_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    return 'csv' if ext in ('csv', 'txt') else 'bin'
+
+
+def write_binary_trace(path, loss_rates, rtts):
+    """Write loss/RTT sequences to the binary trace format."""
+    records = np.empty(len(loss_rates), dtype=TRACE_DTYPE)
+    records['loss'] = loss_rates
+    records['rtt'] = rtts
+    records.tofile(path)
+    return path
+
+
+class TraceRegistry:
+    """Uploaded and registered traces, keyed by a content-derived id."""
+
+    def __init__(self, directory=TRACE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.traces = {}  # trace_id -> metadata
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.traces = json.load(f)
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_path, 'w') as f:
+            json.dump(self.traces, f, indent=2)
+
+    def upload(self, stream, fmt, name=None):
+        """Stream an uploaded trace body to disk and register it."""
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unsupported trace format: {fmt}")
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f".upload-{os.getpid()}-{time.time_ns()}")
+        digest = hashlib.sha256()
+        size = 0
+        with open(tmp_path, 'wb') as out:
+            while True:
+                chunk = stream.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        if fmt == 'bin' and size % TRACE_DTYPE.itemsize:
+            os.unlink(tmp_path)
+            raise ValueError(f"Binary traces are whole {TRACE_DTYPE.itemsize}-byte records; got {size} bytes")
+        trace_id = digest.hexdigest()[:16]
+        path = os.path.join(self.directory, f"{trace_id}.{fmt}")
+        os.replace(tmp_path, path)
+        return self._register(trace_id, path, fmt, name, size)
+
+    def _inside(self, path):
+        root = os.path.realpath(self.directory)
+        return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+    def register_path(self, path, fmt=None, name=None):
+        """
+        Register a trace file already on the server. Relative paths are
+        resolved against the trace directory, and the file (after resolving
+        symlinks) must lie inside it.
+        """
+        path = os.path.realpath(os.path.join(self.directory, path))
+        if not self._inside(path):
+            raise ValueError(f"Trace files must be inside the trace directory ({self.directory})")
+        if not os.path.isfile(path):
+            raise ValueError("Trace file not found")
+        fmt = fmt or _guess_format(path)
+        stat = os.stat(path)
+        if fmt == 'bin' and stat.st_size % TRACE_DTYPE.itemsize:
+            raise ValueError(f"Binary traces are whole {TRACE_DTYPE.itemsize}-byte records; got {stat.st_size} bytes")
+        key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        trace_id = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return self._register(trace_id, path, fmt, name, stat.st_size)
+
+    def _register(self, trace_id, path, fmt, name, size):
+        trace = LossTrace(path, fmt)
+        metadata = {
+            "id": trace_id,
+            "name": name or os.path.basename(path),
+            "path": path,
+            "format": fmt,
+            "size_bytes": size
+        }
+        if fmt == 'bin':
+            metadata["records"] = len(trace)
+        self.traces[trace_id] = metadata
+        self._save_index()
+        return metadata
+
+    def get(self, trace_id):
+        metadata = self.traces.get(trace_id)
+        if metadata is None or not self._inside(metadata["path"]):
+            return None
+        return LossTrace(metadata["path"], metadata["format"])
+
+    def record_bound(self, trace_id):
+        """Upper bound on a trace's record count, from its metadata alone."""
+        metadata = self.traces[trace_id]
+        if "records" in metadata:
+            return metadata["records"]
+        return metadata["size_bytes"] // _MIN_CSV_RECORD
+
+    def list(self):
+        return [metadata for metadata in self.traces.values() if self._inside(metadata["path"])]
+
+
+def _replay_one(path, fmt, data_size, params, include_history):
+    """Run one parameter set against a trace (executed in a worker process)."""
+    simulator = TCPRenoSimulator(**params)
+    results = simulator.simulate_transmission(data_size, trace=LossTrace(path, fmt),
+                                              history=include_history)
+    if not include_history:
+        for key in ("cwnd_history", "ssthresh_history", "state_history",
+                    "time_history", "rtt_history"):
+            results.pop(key, None)
+    results["parameters"] = params
+    return results
+
+
+def replay_trace(trace, data_size, parameter_sets, workers=None, include_history=False):
+    """
+    Replay one trace against many simulator parameter sets.
+
+    Args:
+        trace: LossTrace to replay
+        data_size: Size of data to transmit in bytes
+        parameter_sets: List of TCPRenoSimulator keyword-argument dicts
+        workers: Process count; None uses the CPU count, 1 runs in-process
+        include_history: Keep per-step histories in each result
+
+    Returns:
+        List of result dictionaries in the order of parameter_sets
+    """
+    parameter_sets = list(parameter_sets) or [{}]
+    jobs = [(trace.path, trace.format, data_size, params, include_history)
+            for params in parameter_sets]
+
+    if workers == 1 or len(jobs) == 1:
+        return [_replay_one(*job) for job in jobs]
+
+    # Workers reopen the trace by path, so only the path crosses process bounds
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_replay_one, *job) for job in jobs]
+        return [future.result() for future in futures]
+
@@ -0,0 +1,337 @@
+import argparse
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from routing_analysis import next_hop_matrix
+from rip_simulator import area_destination
+
+# Link loads for a whole traffic matrix routed over the converged tables.
+#
+# Demand is tracked per (current node, destination) cell of a flat N*N array.
+# The forwarding structure lists, for every cell, the cells it hands traffic
+# to, the directed link used and the share (1, or 1/k across k equal-cost
+# next hops). One step moves every active cell forward at once: link loads
+# are a scatter-add (bincount) over the links used, and traffic arriving at
+# the same (node, destination) cell is merged before the next step, so the
+# work per step is bounded by N*N regardless of how many demands there are.
+
+MAX_NODES = 5000
+
+_structures = OrderedDict()  # (epoch, version, ecmp) -> ForwardingStructure
+_structures_lock = threading.Lock()
+
+
+class ForwardingStructure:
+    """Cell-to-cell forwarding of one routing state, in CSR form."""
+
+    def __init__(self, network, ecmp=False):
+        ids = list(network.nodes)
+        n = len(ids)
+        if n > MAX_NODES:
+            raise ValueError(f"Traffic matrices are limited to {MAX_NODES} nodes")
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        self.ids = ids
+        self.n = n
+
+        # Directed links, sorted by u * n + v so cells can look theirs up
+        src, dst = [], []
+        for node_id, node in network.nodes.items():
+            for neighbor_id in node.neighbors:
+                if neighbor_id in index:
+                    src.append(index[node_id])
+                    dst.append(index[neighbor_id])
+        keys = np.array(src, dtype=np.int64) * n + np.array(dst, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        self.link_keys = keys[order]
+        self.link_source = np.array(src, dtype=np.int64)[order]
+        self.link_target = np.array(dst, dtype=np.int64)[order]
+
+        hop = next_hop_matrix(network, ids)
+        rows, cols = np.nonzero(hop >= 0)
+        off_diagonal = rows != cols
+        rows, cols = rows[off_diagonal].astype(np.int64), cols[off_diagonal].astype(np.int64)
+        cells = rows * n + cols
+        nexts = hop[rows, cols].astype(np.int64)
+        shares = np.ones(len(cells))
+
+        if ecmp:
+            extra_cells, extra_nexts, extra_shares = self._equal_cost_entries(network, index)
+            if extra_cells:
+                extra_cells = np.array(extra_cells, dtype=np.int64)
+                keep = ~np.isin(cells, extra_cells)
+                cells = np.concatenate((cells[keep], extra_cells))
+                nexts = np.concatenate((nexts[keep], np.array(extra_nexts, dtype=np.int64)))
+                shares = np.concatenate((shares[keep], np.array(extra_shares)))
+
+        order = np.argsort(cells, kind='stable')
+        cells, nexts, shares = cells[order], nexts[order], shares[order]
+        self.offsets = np.searchsorted(cells, np.arange(n * n + 1, dtype=np.int64))
+        rows = cells // n
+        self.targets = nexts * n + cells % n
+        self.links = np.searchsorted(self.link_keys, rows * n + nexts)
+        self.shares = shares
+        self.ecmp = ecmp
+
+    @staticmethod
+    def _equal_cost_entries(network, index):
+        """(cell, next node, share) for every destination with several equal-cost next hops."""
+        members = {}
+        for node_id, area in (getattr(network, 'areas', None) or {}).items():
+            members.setdefault(area_destination(area), []).append(index[node_id])
+        n = len(index)
+        cells, nexts, shares = [], [], []
+        for node_id, node in network.nodes.items():
+            i = index[node_id]
+            for dest, hops in network.equal_cost_hops(node_id).items():
+                hops = [index[h] for h in hops if h in index and h in node.neighbors]
+                if len(hops) < 2:
+                    continue
+                if dest in index:
+                    columns = [index[dest]]
+                elif dest in members and dest != area_destination(node.area):
+                    columns = members[dest]  # Summary route covers the whole area
+                else:
+                    continue
+                for column in columns:
+                    for h in hops:
+                        cells.append(i * n + column)
+                        nexts.append(h)
+                        shares.append(1.0 / len(hops))
+        return cells, nexts, shares
+
+    def route(self, demand):
+        """
+        Push a flat N*N demand array through the network.
+
+        Returns:
+            (per-link loads, dict of delivered, dropped, looping and steps)
+        """
+        n = self.n
+        loads = np.zeros(len(self.link_keys))
+        cells = np.flatnonzero(demand)
+        volume = demand[cells].astype(np.float64)
+        delivered = dropped = 0.0
+        steps = 0
+        for steps in range(n + 1):  # A loop-free route has fewer than n hops
+            arrived = cells // n == cells % n
+            delivered += volume[arrived].sum()
+            cells, volume = cells[~arrived], volume[~arrived]
+            if not len(cells):
+                break
+            if steps == n:
+                break  # Whatever is left circles in a forwarding loop
+
+            starts = self.offsets[cells]
+            counts = self.offsets[cells + 1] - starts
+            dropped += volume[counts == 0].sum()  # No usable route: black hole
+            owner = np.repeat(np.arange(len(cells)), counts)
+            position = starts[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+            moved = volume[owner] * self.shares[position]
+            loads += np.bincount(self.links[position], weights=moved, minlength=len(loads))
+
+            merged = np.bincount(self.targets[position], weights=moved, minlength=n * n)
+            cells = np.flatnonzero(merged)
+            volume = merged[cells]
+        return loads, {
+            "delivered": float(delivered),
+            "dropped": float(dropped),
+            "looping": float(volume.sum()),
+            "steps": steps
+        }
+
+
+def forwarding_structure(network, ecmp=False):
+    """Build, or reuse for the same network version, the forwarding structure."""
+    key = (network.epoch, network.version, bool(ecmp))
+    with _structures_lock:
+        structure = _structures.get(key)
+        if structure is not None:
+            _structures.move_to_end(key)
+            return structure, True
+    structure = ForwardingStructure(network, ecmp)
+    with _structures_lock:
+        _structures[key] = structure
+        while len(_structures) > 4:
+            _structures.popitem(last=False)
+    return structure, False
+
+
+def _checked(values):
+    values = np.asarray(values, dtype=np.float64)
+    if not np.all(np.isfinite(values)) or np.any(values < 0):
+        raise ValueError("Demands must be finite and non-negative")
+    return values
+
+
+def parse_traffic_matrix(payload, network):
+    """
+    Turn a request body into a flat N*N demand array in the network's node order.
+
+    Accepted forms: `matrix` (dense rows, ordered by `nodes` or by the
+    network's node order), `demands` as [source, destination, volume] lists
+    or {source, destination, demand} objects, or `model: "gravity"` with a
+    `total` volume.
+    """
+    ids = list(network.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    n = len(ids)
+    demand = np.zeros(n * n)
+
+    def positions(node_ids):
+        unknown = [str(node_id) for node_id in node_ids if node_id not in index]
+        if unknown:
+            raise ValueError(f"Unknown nodes: {', '.join(sorted(set(unknown))[:20])}")
+        return np.array([index[node_id] for node_id in node_ids], dtype=np.int64)
+
+    if payload.get('matrix') is not None:
+        order = positions(payload.get('nodes') or ids)
+        matrix = _checked(payload['matrix'])
+        if matrix.shape != (len(order), len(order)):
+            raise ValueError(f"Matrix must be {len(order)} x {len(order)}")
+        np.add.at(demand, (order[:, None] * n + order[None, :]).ravel(), matrix.ravel())
+    elif payload.get('demands') is not None:
+        entries = [(d['source'], d['destination'], d.get('demand', d.get('volume', 0)))
+                   if isinstance(d, dict) else tuple(d) for d in payload['demands']]
+        if any(len(entry) != 3 for entry in entries):
+            raise ValueError("Each demand needs a source, a destination and a volume")
+        if entries:
+            sources, destinations, volumes = zip(*entries)
+            cells = positions(sources) * n + positions(destinations)
+            demand += np.bincount(cells, weights=_checked(volumes), minlength=n * n)
+    elif payload.get('model') == 'gravity':
+        return gravity_matrix(network, float(payload.get('total', 1000.0)))
+    else:
+        raise ValueError("Provide a matrix, a demands list or model=gravity")
+    return demand
+
+
+def gravity_matrix(network, total=1000.0):
+    """Gravity-model demand: each pair gets traffic proportional to the product of the endpoints' degrees."""
+    weight = np.array([len(node.neighbors) for node in network.nodes.values()], dtype=np.float64)
+    matrix = np.outer(weight, weight)
+    np.fill_diagonal(matrix, 0.0)
+    scale = matrix.sum()
+    return (matrix * (total / scale) if scale else matrix).ravel()
+
+
+def link_report(structure, loads, capacity=None, link_capacities=None, top=10, bins=10):
+    """
+    Hottest links and the utilization distribution.
+
+    Args:
+        capacity: Capacity of every link direction
+        link_capacities: {(source, target): capacity} overriding it per direction
+            (links left out are unlimited when no `capacity` is given);
+            with neither, utilization is relative to the busiest link
+
+    Returns:
+        Dict with top_links, histogram and summary counts
+    """
+    ids = structure.ids
+    limited = bool(capacity or link_capacities)
+    if limited:
+        cap = np.full(len(loads), float(capacity) if capacity else math.inf)
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        for (source, target), value in (link_capacities or {}).items():
+            if source not in index or target not in index:
+                raise ValueError(f"Unknown link {source} -> {target}")
+            key = index[source] * structure.n + index[target]
+            position = np.searchsorted(structure.link_keys, key)
+            if position == len(cap) or structure.link_keys[position] != key:
+                raise ValueError(f"Unknown link {source} -> {target}")
+            cap[position] = value
+    else:
+        cap = np.full(len(loads), loads.max() if len(loads) and loads.max() > 0 else 1.0)
+    utilization = np.divide(loads, cap, out=np.zeros_like(loads), where=cap > 0)
+
+    top = min(top, len(loads))
+    hottest = np.argpartition(-loads, top - 1)[:top] if top else np.array([], dtype=np.int64)
+    hottest = hottest[np.argsort(-loads[hottest], kind='stable')]
+    counts, edges = np.histogram(utilization, bins=bins,
+                                 range=(0.0, max(1.0, float(utilization.max())) if len(loads) else 1.0))
+    return {
+        "links": len(loads),
+        "loaded_links": int(np.count_nonzero(loads)),
+        "overloaded_links": int(np.count_nonzero(utilization > 1.0)) if limited else 0,
+        "max_utilization": float(utilization.max()) if len(loads) else 0.0,
+        "mean_utilization": float(utilization.mean()) if len(loads) else 0.0,
+        "top_links": [{
+            "source": ids[structure.link_source[i]],
+            "target": ids[structure.link_target[i]],
+            "load": float(loads[i]),
+            "utilization": float(utilization[i])
+        } for i in hottest.tolist()],
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()}
+    }
+
+
+def route_traffic_matrix(network, demand, ecmp=False, capacity=None, link_capacities=None,
+                         top=10, bins=10):
+    """Route a flat demand array over `network`'s tables and report link loads (see link_report)."""
+    start = time.perf_counter()
+    structure, reused = forwarding_structure(network, ecmp)
+    built = time.perf_counter()
+    loads, totals = structure.route(demand)
+    routed = time.perf_counter()
+    report = link_report(structure, loads, capacity, link_capacities, top, bins)
+    report.update(totals)
+    report.update(
+        offered=float(demand.sum()),
+        demands=int(np.count_nonzero(demand)),
+        ecmp=bool(ecmp),
+        structure_cached=reused,
+        structure_seconds=built - start,
+        route_seconds=routed - built
+    )
+    return report
+
+
+def _walk_loads(network, demand):
+    """Reference link loads from walking every demand's path hop by hop."""
+    ids = list(network.nodes)
+    n = len(ids)
+    loads = {}
+    for cell in np.flatnonzero(demand).tolist():
+        path = network.find_shortest_path(ids[cell // n], ids[cell % n])
+        for a, b in zip(path or [], (path or [])[1:]):
+            loads[(a, b)] = loads.get((a, b), 0.0) + demand[cell]
+    return loads
+
+
+if __name__ == '__main__':
+    from rip_parallel import random_network
+    from topology_cache import converge_network
+
+    parser = argparse.ArgumentParser(description="Route a gravity traffic matrix and time link-load accumulation")
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--degree', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ecmp', action='store_true')
+    parser.add_argument('--verify', action='store_true', help="Compare against walking every path")
+    args = parser.parse_args()
+
+    topology = random_network(args.nodes, args.degree, args.seed, max_cost=1, infinity=float('inf'))
+    converge_network(topology)
+    topology.stamp_changes()
+    matrix = gravity_matrix(topology)
+    result = route_traffic_matrix(topology, matrix, args.ecmp)
+    print(f"{args.nodes} nodes, {result['demands']} demands: structure {result['structure_seconds']:.2f} s, "
+          f"routing {result['route_seconds']:.2f} s in {result['steps']} steps; "
+          f"delivered {result['delivered']:.1f} of {result['offered']:.1f}")
+    for link in result['top_links'][:5]:
+        print(f"  {link['source']} -> {link['target']}: {link['load']:.2f}")
+    if args.verify and not args.ecmp:
+        start = time.perf_counter()
+        reference = _walk_loads(topology, matrix)
+        seconds = time.perf_counter() - start
+        structure, _ = forwarding_structure(topology)
+        loads, _ = structure.route(matrix)
+        ids = structure.ids
+        worst = max((abs(loads[i] - reference.get((ids[a], ids[b]), 0.0))
+                     for i, (a, b) in enumerate(zip(structure.link_source.tolist(),
+                                                    structure.link_target.tolist()))), default=0.0)
+        print(f"path walk: {seconds:.2f} s, largest difference {worst:.2e}")